@@ -0,0 +1,164 @@
+########################################################################################################
+#
+#	batch_runner.py -- Runs the strings of a Turing Machine on a pool of processes
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. How the batch is split
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. How the batch is split
+#
+#   Every input string is independent, so the strings are sent in chunks to a pool of worker processes.
+#   Each worker loads (and compiles, if asked) the machine once, when it starts, and then only receives
+#   chunks of strings and returns their verdicts.
+#
+#   The size of the chunks adapts to how long the strings take: after each chunk the time per string is
+#   measured and the next chunks are sized to take about TARGET_CHUNK_SECONDS. Fast strings travel in big
+#   chunks, so the cost of sending them is small, and slow ones in small chunks, so the work stays
+#   balanced between the workers.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The verdicts are written in the same order as the input strings, the chunks are collected in the
+#       order they were sent.
+#   b. Only a bounded number of chunks is in flight at any time, so the strings can be streamed and the
+#       memory used does not depend on how many there are.
+#   c. The workers always run quietly, the steps of parallel runs would be interleaved.
+#   d. The strings of a mapped file (see mapped_strings.py) are not read by the main process: it only sends
+#       where each chunk starts in the file, and each worker reads its chunk from its own map of the file.
+#
+
+import itertools # Takes the chunks from the strings
+import os # Number of processors
+import sys # Standard output
+import time # Measures how long the chunks take
+from collections import deque # Chunks in flight, in the order they were sent
+from concurrent.futures import ProcessPoolExecutor # Pool of worker processes
+
+# Time each chunk should take, in seconds
+TARGET_CHUNK_SECONDS = 0.05
+
+# Limits for the number of strings in a chunk
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 10000
+
+# Machine of each worker process, loaded once by _init_worker
+_worker_machine = None
+
+""" Creates and loads the machine of a configuration file, compiled (and accelerated) if the engine asks for it.
+    The interpreted machines can also stop when they repeat a configuration. Precompiled machines are read
+    from the saved definition of the file, see definition_cache.py, and optimized machines are optimized
+    after loading them, see optimizer.py. The nondeterministic engine searches by iterative deepening if
+    deepening is set """
+def build_machine(config, machine_type='mtd', engine='interpreted', accelerate=False, detect_cycles=False,
+                  precompiled=False, optimize=False, deepening=False):
+    if(machine_type == 'mtkc'):
+        from turing_machine_multitape import MultitapeTuringMachine
+        tm = MultitapeTuringMachine()
+    else:
+        from turing_machine import TuringMachine
+        tm = TuringMachine()
+    if(precompiled):
+        from definition_cache import DefinitionCache
+        definitions = DefinitionCache(config, optimize)
+        definitions.load(tm)
+    else:
+        tm.load_machine_definition(config)
+        if(optimize):
+            tm.optimize()
+    tm.detect_cycles(detect_cycles)
+
+    if(engine == 'compiled'):
+        from compiled_machine import CompiledMachine
+        return definitions.compile(tm, accelerate) if precompiled else CompiledMachine(tm, accelerate)
+    elif(engine == 'generated'):
+        from generated_machine import GeneratedMachine
+        return definitions.compile(tm, generate=True) if precompiled else GeneratedMachine(tm)
+    elif(engine == 'vectorized'):
+        from vectorized_machine import VectorizedMachine
+        return VectorizedMachine(tm, definitions.compile(tm) if precompiled else None)
+    elif(engine == 'nondeterministic'):
+        from nondeterministic_machine import NondeterministicMachine
+        return NondeterministicMachine(tm, deepening)
+    return tm
+
+""" Loads the machine of a worker process, it is called once when the process starts """
+def _init_worker(config, machine_type, engine, accelerate, detect_cycles, precompiled, optimize, deepening):
+    global _worker_machine
+    _worker_machine = build_machine(config, machine_type, engine, accelerate, detect_cycles, precompiled, optimize,
+                                    deepening)
+
+""" Runs a chunk of strings on the machine of the worker. Returns the verdicts and the time it took """
+def _run_chunk(chunk):
+    start = time.perf_counter()
+
+    # The vectorized engine runs the whole chunk at once
+    if hasattr(_worker_machine, 'decide_batch'):
+        verdicts = [verdict for verdict, steps in _worker_machine.decide_batch(chunk)]
+    else:
+        verdicts = [_worker_machine.decide(initial_string)[0] for initial_string in chunk]
+    return verdicts, time.perf_counter() - start
+
+""" Reads count strings of a mapped file from the byte offset, skipping skip strings, and runs them on the
+    machine of the worker. Returns the same as _run_chunk """
+def _run_range(filename, offset, skip, count):
+    from mapped_strings import strings_at
+    chunk = strings_at(filename, offset, skip, count)
+
+    # Only the compiled engines take the bytes of the strings
+    if not hasattr(_worker_machine, '_encode_input') and not hasattr(_worker_machine, 'decide_batch'):
+        chunk = [initial_string.decode() for initial_string in chunk]
+    return _run_chunk(chunk)
+
+""" Runs the strings on a pool of jobs processes, writing the verdicts in the order of the strings. The
+    strings of a mapped file are read by the workers, see mapped_strings.py """
+def run_parallel(strings, config, machine_type='mtd', engine='interpreted', jobs=None, accelerate=False,
+                 detect_cycles=False, precompiled=False, optimize=False, deepening=False, mapped=None,
+                 output=sys.stdout):
+    jobs = jobs or os.cpu_count() or 1
+    strings = iter(strings)
+    chunk_size = MIN_CHUNK_SIZE
+    in_flight = deque()
+    position = 0 # Next string of the mapped file
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(config, machine_type, engine, accelerate, detect_cycles, precompiled,
+                                       optimize, deepening)) as pool:
+        while True:
+            # Keep every worker busy, with some chunks waiting so they never starve
+            while len(in_flight) < 4 * jobs:
+                if mapped is not None:
+                    size = min(chunk_size, len(mapped) - position)
+                    if size <= 0:
+                        break
+                    in_flight.append((size, pool.submit(_run_range, mapped.filename, *mapped.locate(position), size)))
+                    position += size
+                    continue
+
+                chunk = [''.join(initial_string) for initial_string in itertools.islice(strings, chunk_size)]
+                if not chunk:
+                    break
+                in_flight.append((len(chunk), pool.submit(_run_chunk, chunk)))
+
+            if not in_flight:
+                break
+
+            # The oldest chunk goes first, so the verdicts keep the order of the strings
+            size, future = in_flight.popleft()
+            verdicts, elapsed = future.result()
+            output.write('\n'.join(verdicts) + '\n')
+
+            # Size the next chunks so they take about TARGET_CHUNK_SECONDS
+            seconds_per_string = elapsed / size
+            if seconds_per_string > 0:
+                chunk_size = int(TARGET_CHUNK_SECONDS / seconds_per_string)
+            else:
+                chunk_size *= 2
+            chunk_size = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, chunk_size))
+    output.flush()
@@ -0,0 +1,257 @@
+#!/bin/python3
+
+########################################################################################################
+#
+#	benchmark.py -- Measures the engines on the generated workloads of workloads.py
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Measures
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Measures
+#
+#   Each workload runs on each engine, and for each pair the benchmark measures:
+#
+#       steps_per_second : steps simulated by all the inputs divided by the time they took
+#       latency_ms       : 50th, 90th and 99th percentiles of the time of each input, in milliseconds
+#       peak_memory_kb   : maximum resident memory of the process that ran them
+#       verdicts         : SHA-256 of the verdicts and steps, every engine should give the same one
+#       workload         : SHA-256 of the configuration and the inputs of the workload
+#       relative_speed   : how many times faster than the interpreted engine it ran the workload
+#
+#   The results are saved as JSON, with the scale of the workloads, and compared with a baseline saved
+#   before at the same scale: a pair whose relative speed fell below the baseline divided by the
+#   threshold, or whose verdicts changed, is a regression and the benchmark exits with status 1.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Each pair runs in a process of its own, so its peak memory is not mixed with the others. The
+#       interpreted engine runs in the same process to measure the relative speed, after the peak memory
+#       of the pair is taken.
+#   b. The machines are loaded and compiled before the timing starts, only the runs of the inputs count.
+#   c. The inputs of each pair run REPEATS times and the fastest time is the one measured.
+#   d. The steps per second depend on the host and on its load, so the speeds compared are the relative
+#       ones: each repeat of a pair is followed by a repeat on the interpreted engine, so both see the same
+#       load. A baseline saved on one host can be used on another, but a slower interpreted engine is only
+#       noticed by its own steps per second.
+#   e. Baselines of another scale are not compared, and neither are the pairs whose workload changed
+#       (see workloads.py), since their steps and verdicts are not the same.
+#
+
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import workloads
+from batch_runner import build_machine
+
+# Times each workload runs, the fastest one is measured so other processes disturb it less
+REPEATS = 3
+
+# Baseline compared with by default
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Engine the speeds of the others are relative to
+REFERENCE = 'interpreted'
+
+""" Value at the given percentile of a sorted list """
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+""" Runs the inputs of a workload once on a machine. Returns the time they took, the time of each one and
+    their verdicts and steps """
+def run_inputs(machine, inputs):
+    latencies = []
+    results = []
+    start = time.perf_counter()
+    for initial_string in inputs:
+        input_start = time.perf_counter()
+        results.append(machine.decide(initial_string))
+        latencies.append(time.perf_counter() - input_start)
+    return time.perf_counter() - start, latencies, results
+
+""" Runs the inputs of a workload on an engine repeats times, each one followed by a run on the reference
+    engine. Returns the measures of the fastest times """
+def measure(workload, engine, repeats=REPEATS):
+    machine = build_machine(workload.config, workload.machine_type, engine)
+    seconds = reference_seconds = None
+    for repeat in range(repeats):
+        run_seconds, run_latencies, results = run_inputs(machine, workload.inputs)
+        if seconds is None or run_seconds < seconds:
+            seconds, latencies = run_seconds, run_latencies
+
+        # The peak memory is taken before the reference engine is loaded, see remark a
+        if repeat == 0:
+            peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            reference = machine if engine == REFERENCE else \
+                build_machine(workload.config, workload.machine_type, REFERENCE)
+        if reference is not machine:
+            run_seconds = run_inputs(reference, workload.inputs)[0]
+            if reference_seconds is None or run_seconds < reference_seconds:
+                reference_seconds = run_seconds
+    if reference is machine:
+        reference_seconds = seconds
+
+    latencies.sort()
+    steps = sum(steps for verdict, steps in results)
+    with open(workload.config, 'rb') as f:
+        definition = repr((workload.machine_type, f.read(), workload.inputs))
+    return {'inputs': len(workload.inputs),
+            'steps': steps,
+            'seconds': round(seconds, 6),
+            'steps_per_second': round(steps / seconds) if seconds > 0 else 0,
+            'relative_speed': round(reference_seconds / seconds, 4) if seconds > 0 else 0,
+            'latency_ms': {name: round(percentile(latencies, fraction) * 1000, 4)
+                           for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))},
+            'peak_memory_kb': peak_memory,
+            'verdicts': hashlib.sha256(repr(results).encode('utf-8')).hexdigest(),
+            'workload': hashlib.sha256(definition.encode('utf-8')).hexdigest()}
+
+""" Runs a workload on an engine in a new process. Returns its measures """
+def measure_in_process(name, engine, scale):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', name, engine,
+                             '--scale', str(scale)], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+""" Compares the results with a baseline of the same scale. Returns the lines that describe the regressions
+    and the ones of the pairs that could not be compared """
+def regressions(results, baseline, threshold):
+    found = []
+    skipped = []
+    for key, result in results.items():
+        expected = baseline['results'].get(key)
+        if expected is None:
+            continue
+        if result['workload'] != expected.get('workload'):
+            skipped.append(f"{key}: the workload changed since the baseline")
+            continue
+        if result['verdicts'] != expected['verdicts']:
+            found.append(f"{key}: the verdicts changed")
+        if key.endswith(f"/{REFERENCE}"):
+            continue
+        if result['relative_speed'] * threshold < expected['relative_speed']:
+            found.append(f"{key}: {result['relative_speed']} times the {REFERENCE} engine, the baseline is "
+                         f"{expected['relative_speed']} times")
+    return found, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the Turing machine engines.")
+    parser.add_argument('-e',
+                        '--engines',
+                        action='store',
+                        type=str,
+                        default='interpreted,compiled,generated',
+                        help='Engines to measure, separated by commas')
+
+    parser.add_argument('-w',
+                        '--workloads',
+                        action='store',
+                        type=str,
+                        help='Workloads to run, separated by commas. All of them by default')
+
+    parser.add_argument('--scale',
+                        action='store',
+                        type=float,
+                        default=1,
+                        help='Multiplies the number of inputs (and steps) of the workloads')
+
+    parser.add_argument('-o',
+                        '--output',
+                        action='store',
+                        type=str,
+                        help='Save the results in this JSON file')
+
+    parser.add_argument('-b',
+                        '--baseline',
+                        action='store',
+                        type=str,
+                        default=BASELINE,
+                        help='Compare with this JSON file of results')
+
+    parser.add_argument('--save-baseline',
+                        action='store_true',
+                        help='Save the results as the new baseline instead of comparing with it')
+
+    parser.add_argument('-t',
+                        '--threshold',
+                        action='store',
+                        type=float,
+                        default=1.5,
+                        help='How many times slower than the baseline, relative to the interpreted engine, '
+                             'is a regression')
+
+    parser.add_argument('--measure',
+                        nargs=2,
+                        metavar=('WORKLOAD', 'ENGINE'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        suite = {workload.name: workload for workload in workloads.suite(directory, args.scale)}
+
+        # Run by the parent process, print the measures of a single pair
+        if(args.measure):
+            name, engine = args.measure
+            print(json.dumps(measure(suite[name], engine)))
+            return
+
+        names = args.workloads.split(',') if args.workloads else list(suite)
+        results = {}
+        print(f"{'workload':<20}{'engine':<13}{'steps/s':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak KB':>10}")
+        for name in names:
+            for engine in args.engines.split(','):
+                result = measure_in_process(name, engine, args.scale)
+                results[f"{name}/{engine}"] = result
+                latency = result['latency_ms']
+                print(f"{name:<20}{engine:<13}{result['steps_per_second']:>12}{latency['p50']:>10}"
+                      f"{latency['p90']:>10}{latency['p99']:>10}{result['peak_memory_kb']:>10}")
+
+    # Every engine must give the same verdicts
+    for name in names:
+        if len({results[f"{name}/{engine}"]['verdicts'] for engine in args.engines.split(',')}) > 1:
+            print(f"MISMATCH {name}: the engines gave different verdicts")
+
+    saved = {'scale': args.scale, 'results': results}
+    if(args.output):
+        with open(args.output, 'w') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+
+    if(args.save_baseline):
+        with open(args.baseline, 'w') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+        return
+
+    # Compare with the baseline, if there is one of the same scale
+    if(os.path.exists(args.baseline)):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if(not isinstance(baseline, dict) or 'results' not in baseline):
+            print(f"{args.baseline} has no scale, save it again with --save-baseline")
+            sys.exit(1)
+        if(baseline.get('scale') != args.scale):
+            print(f"{args.baseline} was measured at scale {baseline.get('scale')}, not {args.scale}, it is not "
+                  f"compared")
+            return
+        found, skipped = regressions(results, baseline, args.threshold)
+        for line in skipped:
+            print(f"SKIPPED {line}")
+        for line in found:
+            print(f"REGRESSION {line}")
+        if(found):
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,140 @@
+########################################################################################################
+#
+#	checkpoint.py -- Saves the configuration of long runs so they can be resumed
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Checkpoint files
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Checkpoint files
+#
+#   Every interval steps the machines save their configuration (see snapshot() in turing_machine.py and
+#   turing_machine_multitape.py) to the checkpoint file:
+#
+#       fingerprint : SHA-256 of the machine definition, see result_cache.py
+#       index       : position of the running string among the strings of the run
+#       input       : the running string
+#       state       : current state
+#       step        : current step
+#       heads       : position of each head
+#       tapes       : written span of each tape and its symbols, without the blanks at its ends
+#
+#   The file starts with MAGIC and VERSION, followed by the fields pickled and compressed with zlib.
+#
+#   A run that resumes from the file skips the strings before index, continues the running string from
+#   the saved configuration and then runs the rest of the strings. The file is deleted when every
+#   string has finished.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The file is written to a temporary file and then renamed, so a crash while it is written leaves
+#       the previous checkpoint in place.
+#   b. The verdicts printed after the last checkpoint are printed again by the run that resumes, since
+#       the strings that finished between checkpoints are not saved.
+#   c. A checkpoint of a different machine is refused, the fingerprint must match. So is a run whose strings
+#       are not the ones of the checkpoint, and the file is kept.
+#   d. The fields are read with the unpickler of the saved definitions (see definition_cache.py), which
+#       refuses any class or function, so a file placed where the checkpoint was expected only holds data.
+#       A file that cannot be read that way, or lacks some field, is refused as well.
+#
+
+import io # Reads the fields with the restricted unpickler
+import os # Atomic replacement of the checkpoint file
+import pickle # Format of the fields
+import zlib # Compression of the fields
+from definition_cache import SafeUnpickler # Only rebuilds data, see remark d
+from result_cache import machine_fingerprint # Identifies the machine that saved the checkpoint
+
+# First bytes of the checkpoint files and version of their format
+MAGIC = b'TMCP'
+VERSION = 1
+
+# Steps between checkpoints when no interval is given
+DEFAULT_INTERVAL = 10 ** 6
+
+# Fields every checkpoint has
+FIELDS = ('fingerprint', 'index', 'input', 'state', 'step', 'heads', 'tapes')
+
+########################################################################################################
+# Checkpointer class. Saves the configuration of a machine and resumes the run from the saved one.
+#
+class Checkpointer:
+    """ Checkpoint file of the runs of a machine """
+
+    # Constructor method. When resuming, reads the checkpoint left by the previous run, if there is one
+    def __init__(self, filename, machine, interval=None, resume=False):
+        self._filename = filename
+        self.interval = interval or DEFAULT_INTERVAL
+        self._fingerprint = machine_fingerprint(machine)
+        self._index = 0 # Position of the running string
+        self._saved = self._load() if resume else None # Checkpoint to resume from
+
+    """ Reads the checkpoint file, None if there is none """
+    def _load(self):
+        try:
+            with open(self._filename, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError(f"{self._filename} is not a checkpoint file")
+
+        # A file cut while it was copied, or otherwise damaged, cannot be resumed either
+        try:
+            saved = SafeUnpickler(io.BytesIO(zlib.decompress(data[len(MAGIC) + 1:]))).load()
+        except (zlib.error, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ImportError, ValueError,
+                KeyError, IndexError):
+            raise ValueError(f"{self._filename} is not a checkpoint file")
+        if not isinstance(saved, dict) or any(field not in saved for field in FIELDS):
+            raise ValueError(f"{self._filename} is not a checkpoint file")
+        if saved['fingerprint'] != self._fingerprint:
+            raise ValueError(f"{self._filename} was saved by a different machine")
+        return saved
+
+    """ Yields each string with the configuration it resumes from, None for the strings that start from
+        the beginning. The strings the checkpoint had already finished are skipped """
+    def runs(self, strings):
+        saved = self._saved
+        self._saved = None
+        for index, initial_string in enumerate(strings):
+            self._index = index
+            if saved is None:
+                yield initial_string, None
+            elif index == saved['index']:
+                if ''.join(initial_string) != saved['input']:
+                    raise ValueError(f"The string {index} is not the one saved in {self._filename}")
+                yield initial_string, saved
+                saved = None
+
+        # The strings ended before the one saved, the checkpoint is kept for the right strings file
+        if saved is not None:
+            raise ValueError(f"There are fewer strings than the {saved['index'] + 1} saved in {self._filename}")
+
+        # Every string finished, there is nothing left to resume
+        self.remove()
+
+    """ First step after step that is saved """
+    def next_step(self, step):
+        return (step // self.interval + 1) * self.interval
+
+    """ Saves the configuration of the machine running a string """
+    def save(self, machine, initial_string):
+        saved = machine.snapshot()
+        saved.update(fingerprint=self._fingerprint, index=self._index, input=''.join(initial_string))
+
+        temporary = f"{self._filename}.{os.getpid()}"
+        with open(temporary, 'wb') as f:
+            f.write(MAGIC + bytes([VERSION]))
+            f.write(zlib.compress(pickle.dumps(saved, protocol=pickle.HIGHEST_PROTOCOL)))
+        os.replace(temporary, self._filename)
+
+    """ Deletes the checkpoint file """
+    def remove(self):
+        if os.path.exists(self._filename):
+            os.remove(self._filename)
@@ -0,0 +1,719 @@
+########################################################################################################
+#
+#	compiled_machine.py -- Runs a Turing Machine compiled into integer tables
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Compiled representation
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Compiled representation
+#
+#   A loaded TuringMachine or MultitapeTuringMachine is translated into small integers:
+#
+#       states  : 0..|Q|-1, in the order they are declared in the configuration file
+#       symbols : 0..|Γ|-1, shared by every tape. For the single tape machine the symbol 0 is the empty
+#                 cell (None) and for the multitape machine it is the blank '_'
+#       moves   : the offset added to the head, 1 right, -1 left and 0 stay
+#
+#   δ is stored as a flat array indexed by state * |Γ|^k + s_1 + s_2 * |Γ| + ... + s_k * |Γ|^(k-1),
+#   where s_i is the symbol under the head of tape i. Each entry is the number of the action to apply,
+#   or -1 when there is no rule. Actions are kept in parallel arrays (next state, write, move) and the
+#   tapes are compact tapes (bytearrays) of symbol ids.
+#
+#   The quiet runs of machines with several tapes keep all the tapes in a single TapeBlock (see tape.py)
+#   instead, with the heads as indexes in it. The symbols under every head are read at once as a bytes key
+#   and looked up in a dict for each state, (s_1, ..., s_k) -> action, which only has the keys of the rules.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The run loop works only with integers. States and symbols are decoded back to strings only to
+#       trace the steps, so the verdicts and the printed steps are the same as the interpreted run.
+#   b. A write of -1 is the wildcard write of the multitape machine, it keeps the symbol on the tape. With
+#       a single tape it is replaced by the symbol read, since the single tape loops always write.
+#   c. Accelerated runs execute sweeps as macro-steps. A sweep is a group of rules that keep the machine
+#       in the same state and move the heads the same way, like q0,0,_,q0,0,0,r,r and q0,1,_,q0,1,1,r,r,
+#       where what each tape reads is any symbol of a set and what it writes is a function of the symbol
+#       read on one of the tapes. A whole run of matching cells is found with bytes.lstrip/rstrip, the
+#       writes are done with bytes.translate and the step counter is advanced by the length of the run,
+#       so the verdicts and steps (and max_steps) are the same as stepping one cell at a time.
+#   d. The block loop does not check the heads against the ends of the tapes: a head that left them is on a
+#       guard cell, whose key has no rule, and the block grows before looking it up again. It is not used
+#       by the accelerated runs, or when the machine has 255 symbols or more, as the guard needs an id.
+#   e. The strings of a mapped file (see mapped_strings.py) come as bytes. When every input character is
+#       a single ASCII byte they are checked against the alphabet and translated into symbol ids with
+#       bytes.translate, once for the whole string.
+#
+
+from array import array # Compact arrays of integers for the transition table and the actions
+from operator import add # Moves every head at once
+from tape import Tape, TapeBlock # Two-way infinite tapes that grow on demand
+
+########################################################################################################
+# CompiledMachine class. Compiles a loaded Turing machine into integer tables and runs its strings.
+#
+class CompiledMachine:
+    """ Integer encoded version of a loaded Turing machine with its own run loop """
+
+    # Upper bound for the entries of the flat transition table
+    MAX_TABLE_SIZE = 1 << 24
+
+    # Number of cells looked at first when measuring a sweep, it doubles while the sweep goes on
+    SWEEP_WINDOW = 64
+
+    # Attributes set by _compile, which can be saved with tables and given back to the constructor
+    COMPILED_FIELDS = ('_state_names', '_state_ids', '_symbol_names', '_symbol_ids', '_input_ids', '_stride', '_table',
+                       '_next_states', '_writes', '_moves', '_rule_indexes', '_single_writes', '_single_moves',
+                       '_next_bases', '_halts', '_sweep_slots', '_sweeps', '_packed_rows')
+
+    # Constructor method. Compiles the definition of the given (already loaded) machine, or takes the
+    # tables already compiled for it. Accelerated machines run sweeps as macro-steps
+    def __init__(self, machine, accelerate=False, tables=None):
+        self._machine = machine # The machine that was compiled, it also holds the strings to run
+        self._accelerate = accelerate
+        self.FinalState = type(machine).FinalState
+        self.VERDICTS = type(machine).VERDICTS
+
+        # The single tape machine starts with empty (None) cells, the multitape one with blanks
+        self._multitape = hasattr(machine, '_number_of_tapes')
+        self._number_of_tapes = machine._number_of_tapes if self._multitape else 1
+        self._max_length = machine._max_length
+        self._max_steps = machine._max_steps
+
+        self._state_names = [] # Id -> state
+        self._state_ids = {} # State -> id
+        self._symbol_names = [] # Id -> symbol
+        self._symbol_ids = {} # Symbol -> id
+        self._input_ids = {} # Valid input character -> symbol id
+
+        self._table = array('i') # Flat δ: action id or -1
+        self._next_states = array('i') # Action -> next state
+        self._writes = [] # Action -> array with the symbol written on each tape (-1 keeps it)
+        self._moves = [] # Action -> array with the move of each tape
+        self._rule_indexes = array('i') # Action -> index of the rule in the configuration file
+        self._tapes = [] # Compact tapes of symbol ids, reused by every input
+        self._sweep_slots = bytearray() # Slot of the table -> 1 if a sweep can start there
+        self._sweeps = {} # Slot of the table -> sweep, a tuple with (tape, move, symbols, source, writes) per moving tape
+        self._packed_rows = None # State -> dict of the symbols under every head as bytes -> action, if packed
+
+        if tables is None:
+            self._compile()
+        else:
+            for field in self.COMPILED_FIELDS:
+                setattr(self, field, tables[field])
+            self._tapes = [Tape(0, compact=True) for tape_index in range(self._number_of_tapes)]
+        self._pack()
+        self._byte_tables()
+
+    """ The compiled tables, to build the same machine again without compiling it """
+    def tables(self):
+        return {field: getattr(self, field) for field in self.COMPILED_FIELDS}
+
+    """ Interns the states and symbols and builds the flat transition table """
+    def _compile(self):
+        machine = self._machine
+
+        # States, in declaration order and then any other state the rules use
+        for state in machine._states + [machine._initial_state, machine._accept_state, machine._reject_state]:
+            self._intern_state(state)
+
+        # Symbol 0 is what a cell holds before anything is written on it
+        self._intern_symbol('_' if self._multitape else None)
+        for character in machine._input_alphabet:
+            self._input_ids[character] = self._intern_symbol(character)
+
+        # The wildcard rules of the multitape machine get an entry for each combination of symbols they match,
+        # their states and symbols are interned first so the size of the table is checked before expanding them
+        index = machine._transition_index
+        if self._multitape and machine._wildcard_rules:
+            for symbols in machine._tape_symbols():
+                for symbol in sorted(symbols):
+                    self._intern_symbol(symbol)
+            for state, rules in machine._wildcard_rules.items():
+                self._intern_state(state)
+                for read_symbols, action in rules:
+                    self._intern_state(action[1])
+            self._table_size()
+            index = machine._expanded_index()
+
+        # Every (state, symbols) key of the index of the machine becomes an entry of the flat table
+        decoded = []
+        for (state, read_symbols), action in index.items():
+            if not self._multitape:
+                read_symbols = (read_symbols,)
+                rule_index, next_state, write, move = action
+                writes, moves = (write,), (move,)
+            else:
+                rule_index, next_state, writes, moves = action
+            read_ids = [self._intern_symbol(symbol) for symbol in read_symbols]
+            write_ids = [-1 if symbol is None and self._multitape else self._intern_symbol(symbol) for symbol in writes]
+
+            # The single tape loops write at every step, so a wildcard write on a single tape writes back the symbol read
+            if self._number_of_tapes == 1 and write_ids[0] == -1:
+                write_ids[0] = read_ids[0]
+            decoded.append((self._intern_state(state), read_ids, rule_index, self._intern_state(next_state), write_ids,
+                            list(moves)))
+
+        number_of_symbols = len(self._symbol_names)
+        self._table = array('i', [-1]) * self._table_size()
+
+        # Machines with several tapes also get the rows of keys of the block loop, see _run_packed
+        if self._number_of_tapes > 1 and number_of_symbols < TapeBlock.GUARD:
+            self._packed_rows = [{} for state in self._state_names]
+
+        # Place each action in its slot. Equal actions share the same id
+        actions = {}
+        for state, read_symbols, rule_index, next_state, writes, moves in decoded:
+            action = (rule_index, next_state, tuple(writes), tuple(moves))
+            if action not in actions:
+                actions[action] = len(actions)
+                self._rule_indexes.append(rule_index)
+                self._next_states.append(next_state)
+                self._writes.append(array('i', writes))
+                self._moves.append(array('i', moves))
+            self._table[self._slot(state, read_symbols)] = actions[action]
+            if self._packed_rows is not None:
+                self._packed_rows[state][bytes(read_symbols)] = actions[action]
+
+        # The single tape loop uses flat arrays instead of one array per action
+        self._single_writes = array('i', [writes[0] for writes in self._writes])
+        self._single_moves = array('i', [moves[0] for moves in self._moves])
+
+        # States are carried already multiplied by the stride of the table, so each step is one addition
+        self._next_bases = array('i', [next_state * self._stride for next_state in self._next_states])
+
+        # What reaching each action's next state means: 0 keep going, 1 accepted, 2 rejected
+        accept = self._state_ids[machine._accept_state]
+        reject = self._state_ids[machine._reject_state]
+        self._halts = bytearray(1 if next_state == accept else 2 if next_state == reject else 0
+                                for next_state in self._next_states)
+
+        self._find_sweeps(decoded)
+        self._tapes = [Tape(0, compact=True) for tape_index in range(self._number_of_tapes)]
+
+    """ Sets the stride of the table for the states and symbols interned so far and returns its number of
+        entries. Raises ValueError if there are more than MAX_TABLE_SIZE """
+    def _table_size(self):
+        self._stride = len(self._symbol_names) ** self._number_of_tapes
+        table_size = len(self._state_names) * self._stride
+        if table_size > self.MAX_TABLE_SIZE:
+            raise ValueError(f"The transition table of {self._machine._name} needs {table_size} entries, "
+                             f"more than the {self.MAX_TABLE_SIZE} allowed")
+        return table_size
+
+    """ Builds what the block loop needs for each action from the compiled tables: the (tape, symbol) pairs it
+        writes, without the wildcards, and the row of its next state, None if the machine halts there """
+    def _pack(self):
+        self._packed_writes = []
+        self._next_rows = []
+        if self._packed_rows is None:
+            return
+        for writes, next_state, halt in zip(self._writes, self._next_states, self._halts):
+            self._packed_writes.append(tuple((tape_index, symbol) for tape_index, symbol in enumerate(writes)
+                                             if symbol >= 0))
+            self._next_rows.append(None if halt else self._packed_rows[next_state])
+        self._block = TapeBlock(self._number_of_tapes)
+
+    """ Builds the tables that translate the bytes of an input into symbol ids, if every input character is a
+        single ASCII byte: the bytes of the input alphabet and the symbol id of each byte """
+    def _byte_tables(self):
+        self._input_bytes = None
+        self._byte_ids = None
+        if all(len(character) == 1 and ord(character) < 128 for character in self._input_ids):
+            self._input_bytes = bytes(ord(character) for character in self._input_ids)
+            byte_ids = bytearray(256)
+            for character, symbol in self._input_ids.items():
+                byte_ids[ord(character)] = symbol
+            self._byte_ids = bytes(byte_ids)
+
+    """ Finds the groups of rules that can run as macro-steps, see the implementation remarks """
+    def _find_sweeps(self, decoded):
+        self._sweep_slots = bytearray(len(self._table))
+        self._sweeps = {}
+        halting = (self._state_ids[self._machine._accept_state], self._state_ids[self._machine._reject_state])
+        tape_indexes = range(self._number_of_tapes)
+
+        # Group the rules that loop on a state by their moves and by what the tapes that stay read
+        groups = {}
+        for state, read_symbols, rule_index, next_state, writes, moves in decoded:
+            if next_state != state or state in halting or not any(moves):
+                continue
+
+            # A tape that stays must keep its symbol, otherwise the next step would read something else
+            if any(moves[tape_index] == 0 and writes[tape_index] not in (-1, read_symbols[tape_index])
+                   for tape_index in tape_indexes):
+                continue
+            stationary = tuple(read_symbols[tape_index] if moves[tape_index] == 0 else None for tape_index in tape_indexes)
+            groups.setdefault((state, tuple(moves), stationary), []).append((read_symbols, writes))
+
+        for (state, moves, stationary), members in groups.items():
+            moving = [tape_index for tape_index in tape_indexes if moves[tape_index] != 0]
+
+            # The symbols each moving tape can read. Every combination of them must have a rule of the group
+            symbols = {tape_index: set(read_symbols[tape_index] for read_symbols, writes in members)
+                       for tape_index in moving}
+            combinations = 1
+            for tape_index in moving:
+                combinations *= len(symbols[tape_index])
+            if combinations != len(members):
+                continue
+
+            # What each moving tape writes must depend on the symbol read on a single (source) tape
+            sweep = []
+            for tape_index in moving:
+                found = None
+                for source in [tape_index] + [other for other in moving if other != tape_index]:
+                    mapping = {}
+                    for read_symbols, writes in members:
+                        written = read_symbols[tape_index] if writes[tape_index] == -1 else writes[tape_index]
+                        if mapping.setdefault(read_symbols[source], written) != written:
+                            break
+                    else:
+                        found = (source, mapping)
+                        break
+                if found is None:
+                    break
+                source, mapping = found
+
+                # The writes are a translation table of the source symbols, None when nothing changes
+                if source == tape_index and all(read == written for read, written in mapping.items()):
+                    translation = None
+                else:
+                    translation = bytearray(range(256))
+                    for read, written in mapping.items():
+                        translation[read] = written
+                    translation = bytes(translation)
+                sweep.append((tape_index, moves[tape_index], bytes(sorted(symbols[tape_index])), source,
+                              moves[source], translation))
+            else:
+                for read_symbols, writes in members:
+                    slot = self._slot(state, read_symbols)
+                    self._sweep_slots[slot] = 1
+                    self._sweeps[slot] = tuple(sweep)
+
+    """ Position of a (state, symbols) key in the flat transition table """
+    def _slot(self, state, read_symbols):
+        number_of_symbols = len(self._symbol_names)
+        slot = 0
+        for symbol in reversed(read_symbols):
+            slot = slot * number_of_symbols + symbol
+        return state * self._stride + slot
+
+    """ Returns the id of a state, giving it a new one if needed """
+    def _intern_state(self, state):
+        if state not in self._state_ids:
+            self._state_ids[state] = len(self._state_names)
+            self._state_names.append(state)
+        return self._state_ids[state]
+
+    """ Returns the id of a symbol, giving it a new one if needed """
+    def _intern_symbol(self, symbol):
+        if symbol not in self._symbol_ids:
+            if len(self._symbol_names) > 255:
+                raise ValueError("A compiled machine can not have more than 256 tape symbols")
+            self._symbol_ids[symbol] = len(self._symbol_names)
+            self._symbol_names.append(symbol)
+        return self._symbol_ids[symbol]
+
+    """ Encodes an input string as symbol ids. Returns the ids, or the first invalid character """
+    def _encode_input(self, initial_string):
+        # The bytes of a mapped string are checked and translated at once, the strings with an invalid
+        # character are decoded to find it
+        if isinstance(initial_string, bytes):
+            if self._byte_ids is not None and not initial_string.translate(None, self._input_bytes):
+                return bytearray(initial_string.translate(self._byte_ids)), None
+            initial_string = initial_string.decode()
+
+        input_ids = self._input_ids
+        try:
+            return bytearray([input_ids[character] for character in initial_string]), None
+        except KeyError:
+            # Find the first character that is not in the alphabet
+            for character in initial_string:
+                if character not in input_ids:
+                    return None, character
+
+    """ Runs a single input string. Returns the final state and the number of steps taken, or None and the
+        first invalid character of the string """
+    def run_string(self, initial_string, quiet=True):
+        encoded, character = self._encode_input(initial_string)
+        if encoded is None:
+            return None, character
+
+        # The input does not fit in max_length
+        if len(encoded) > self._max_length:
+            return self.FinalState.OUTSIDE, 0
+
+        # The quiet runs of several tapes use the block, the tapes are not used
+        if quiet and not self._accelerate and self._packed_rows is not None:
+            return self._run_packed(encoded)
+
+        # Every tape holds symbol ids, the input goes on the first one
+        for tape in self._tapes:
+            tape.reset()
+        self._tapes[0].load(encoded)
+
+        # The loops write on the cells directly, so the tapes are told what to blank on the next reset, even
+        # when the run is interrupted (see verdict_server.py)
+        try:
+            if self._number_of_tapes == 1 and quiet and self._accelerate:
+                return self._run_single_accelerated(self._tapes[0])
+            elif self._number_of_tapes == 1 and quiet:
+                return self._run_single(self._tapes[0])
+            else:
+                return self._run_multiple(self._tapes, quiet, self._accelerate and quiet)
+        finally:
+            for tape in self._tapes:
+                tape.touch_nonblank()
+
+    """ Run loop for a single tape, the common and fastest case """
+    def _run_single(self, tape):
+        table = self._table
+        writes = self._single_writes
+        moves = self._single_moves
+
+        next_bases = self._next_bases
+        halts = self._halts
+        max_steps = self._max_steps
+        base = self._state_ids[self._machine._initial_state] * self._stride
+
+        # The head is kept as an index in the cells of the tape, limit is the index of max_length
+        cells = tape._cells
+        capacity = len(cells)
+        index = tape._origin
+        limit = tape._origin + self._max_length
+
+        # The step budget is the loop itself, the last step allowed is max_steps
+        for step in range(max(max_steps, 0) + 1):
+            action = table[base + cells[index]]
+
+            # No rule was found from this state to another, reject
+            if action < 0:
+                return self.FinalState.REJECTED, step
+
+            base = next_bases[action]
+            cells[index] = writes[action]
+            index += moves[action]
+
+            # Same checks, in the same order, as _verify
+            if halts[action]:
+                return (self.FinalState.ACCEPTED if halts[action] == 1 else self.FinalState.REJECTED), step + 1
+            if index == limit:
+                return self.FinalState.UNDECIDABLE, step + 1
+
+            # The head left the allocated cells, grow the tape and move the indexes with its origin
+            if index < 0 or index >= capacity:
+                origin = tape._origin
+                tape.reserve(index - origin, index - origin)
+                cells = tape._cells
+                capacity = len(cells)
+                index += tape._origin - origin
+                limit += tape._origin - origin
+        return self.FinalState.REJECTED, max(max_steps, 0) + 1
+
+    """ Run loop for several tapes kept in a block, quiet and not accelerated. The symbols under the heads
+        are looked up as a single key, see section 1 """
+    def _run_packed(self, encoded):
+        block = self._block
+        heads = block.load(encoded)
+        cells = block.cells
+        read = cells.__getitem__
+        limit = heads[0] + self._max_length # Index of max_length on the first tape
+
+        all_writes = self._packed_writes
+        all_moves = self._moves
+        next_rows = self._next_rows
+        halts = self._halts
+        budget = max(self._max_steps, 0) + 1 # Steps allowed, the last one is max_steps
+
+        row = self._packed_rows[self._state_ids[self._machine._initial_state]]
+        step = 0
+        while step < budget:
+            key = bytes(map(read, heads))
+            action = row.get(key)
+            if action is None:
+                # A head on a guard cell left the cells of its tape: grow them and look the key up again
+                if TapeBlock.GUARD in key:
+                    heads = block.grow(heads)
+                    cells = block.cells
+                    read = cells.__getitem__
+                    limit = block.index(0, self._max_length)
+                    continue
+
+                # No rule was found from this state to another, reject
+                return self.FinalState.REJECTED, step
+
+            for tape_index, symbol in all_writes[action]:
+                cells[heads[tape_index]] = symbol
+            heads = list(map(add, heads, all_moves[action]))
+            row = next_rows[action]
+
+            # Same checks, in the same order, as _verify
+            if row is None:
+                return (self.FinalState.ACCEPTED if halts[action] == 1 else self.FinalState.REJECTED), step + 1
+            if heads[0] == limit:
+                return self.FinalState.UNDECIDABLE, step + 1
+            step += 1
+        return self.FinalState.REJECTED, budget
+
+    """ Run loop for a single tape that runs the sweeps as macro-steps """
+    def _run_single_accelerated(self, tape):
+        table = self._table
+        writes = self._single_writes
+        moves = self._single_moves
+        next_bases = self._next_bases
+        halts = self._halts
+        sweep_slots = self._sweep_slots
+        sweeps = self._sweeps
+        window = self.SWEEP_WINDOW
+        budget = max(self._max_steps, 0) + 1 # Steps allowed, the last one is max_steps
+        base = self._state_ids[self._machine._initial_state] * self._stride
+
+        # The head is kept as an index in the cells of the tape, limit is the index of max_length
+        cells = tape._cells
+        index = tape._origin
+        limit = tape._origin + self._max_length
+
+        step = 0
+        while step < budget:
+            slot = base + cells[index]
+            action = table[slot]
+
+            # No rule was found from this state to another, reject
+            if action < 0:
+                return self.FinalState.REJECTED, step
+
+            # Run a whole sweep at once, the state does not change. On a single tape the source of the
+            # writes is the tape itself, so they are translated in place
+            if sweep_slots[slot]:
+                tape_index, move, symbols, source, source_move, translation = sweeps[slot][0]
+                if move > 0:
+                    region = cells[index:index + window]
+                    length = len(region) - len(region.lstrip(symbols))
+                else:
+                    region = cells[max(0, index - window + 1):index + 1]
+                    length = len(region) - len(region.rstrip(symbols))
+
+                # Long sweeps are measured in windows that double
+                if length == len(region):
+                    length = self._run_length(cells, index, move, symbols, budget - step)
+                length = min(length, budget - step)
+                if move > 0:
+                    length = min(length, limit - index - 1)
+
+                if length > 1:
+                    if translation is not None:
+                        if move > 0:
+                            cells[index:index + length] = cells[index:index + length].translate(translation)
+                        else:
+                            cells[index - length + 1:index + 1] = cells[index - length + 1:index + 1].translate(translation)
+                    index += move * length
+                    step += length
+                    if index < 0 or index >= len(cells):
+                        origin = tape._origin
+                        tape.reserve(index - origin, index - origin)
+                        cells = tape._cells
+                        index += tape._origin - origin
+                        limit += tape._origin - origin
+                    continue
+
+            base = next_bases[action]
+            cells[index] = writes[action]
+            index += moves[action]
+
+            # Same checks, in the same order, as _verify
+            if halts[action]:
+                return (self.FinalState.ACCEPTED if halts[action] == 1 else self.FinalState.REJECTED), step + 1
+            if index == limit:
+                return self.FinalState.UNDECIDABLE, step + 1
+
+            # The head left the allocated cells, grow the tape and move the indexes with its origin
+            if index < 0 or index >= len(cells):
+                origin = tape._origin
+                tape.reserve(index - origin, index - origin)
+                cells = tape._cells
+                index += tape._origin - origin
+                limit += tape._origin - origin
+            step += 1
+        return self.FinalState.REJECTED, budget
+
+    """ Run loop for any number of tapes. It can also print each step or run the sweeps as macro-steps """
+    def _run_multiple(self, tapes, quiet, accelerate=False):
+        table = self._table
+        next_states = self._next_states
+        all_writes = self._writes
+        all_moves = self._moves
+        stride = self._stride
+        number_of_symbols = len(self._symbol_names)
+        accept = self._state_ids[self._machine._accept_state]
+        reject = self._state_ids[self._machine._reject_state]
+        sweep_slots = self._sweep_slots
+        budget = max(self._max_steps, 0) + 1 # Steps allowed, the last one is max_steps
+        tape_indexes = range(self._number_of_tapes)
+
+        # The heads are kept as indexes in the cells of each tape, limit is the index of max_length on the first
+        cells = [tape._cells for tape in tapes]
+        indexes = [tape._origin for tape in tapes]
+        limit = tapes[0]._origin + self._max_length
+
+        tracer = self._machine._tracer
+        state_names = self._state_names
+
+        state = self._state_ids[self._machine._initial_state]
+        step = 0
+        while step < budget:
+            slot = 0
+            for tape_index in reversed(tape_indexes):
+                slot = slot * number_of_symbols + cells[tape_index][indexes[tape_index]]
+            slot += state * stride
+            action = table[slot]
+
+            # No rule was found from this state to another, reject
+            if action < 0:
+                return self.FinalState.REJECTED, step
+
+            # Run a whole sweep at once, the state does not change
+            if accelerate and sweep_slots[slot]:
+                swept = self._sweep(self._sweeps[slot], cells, indexes, limit, budget - step)
+                if swept > 0:
+                    step += swept
+                    limit = self._grow(tapes, cells, indexes, limit)
+                    continue
+
+            state = next_states[action]
+            writes = all_writes[action]
+            moves = all_moves[action]
+            for tape_index in tape_indexes:
+                if writes[tape_index] >= 0:
+                    cells[tape_index][indexes[tape_index]] = writes[tape_index]
+                    if not quiet:
+                        tapes[tape_index].touch(indexes[tape_index] - tapes[tape_index]._origin,
+                                                indexes[tape_index] - tapes[tape_index]._origin)
+                indexes[tape_index] += moves[tape_index]
+            limit = self._grow(tapes, cells, indexes, limit)
+
+            if not quiet and tracer.wants(step + 1, state_names[state]):
+                self._trace_step(tracer, state, [index - tape._origin for index, tape in zip(indexes, tapes)], tapes)
+
+            # Same checks, in the same order, as _verify
+            if state == accept:
+                return self.FinalState.ACCEPTED, step + 1
+            if state == reject:
+                return self.FinalState.REJECTED, step + 1
+            if indexes[0] == limit:
+                return self.FinalState.UNDECIDABLE, step + 1
+            step += 1
+        return self.FinalState.REJECTED, budget
+
+    """ Grows the tapes whose head left the allocated cells. Returns the index of max_length on the first """
+    def _grow(self, tapes, cells, indexes, limit):
+        for tape_index, tape in enumerate(tapes):
+            if indexes[tape_index] < 0 or indexes[tape_index] >= len(cells[tape_index]):
+                origin = tape._origin
+                tape.reserve(indexes[tape_index] - origin, indexes[tape_index] - origin)
+                cells[tape_index] = tape._cells
+                indexes[tape_index] += tape._origin - origin
+                if tape_index == 0:
+                    limit += tape._origin - origin
+        return limit
+
+    """ Runs a sweep as a macro-step of at most steps_left steps. Returns the number of steps it took, 0 if it
+        is not worth it """
+    def _sweep(self, sweep, cells, indexes, limit, steps_left):
+        # The sweep lasts while every moving tape reads one of its symbols
+        length = steps_left
+        for tape_index, move, symbols, source, source_move, translation in sweep:
+            length = min(length, self._run_length(cells[tape_index], indexes[tape_index], move, symbols, length))
+
+        # The first head must stop before max_length, the last step there is done by the normal loop
+        if sweep[0][0] == 0 and sweep[0][1] > 0:
+            length = min(length, limit - indexes[0] - 1)
+        if length <= 1:
+            return 0
+
+        # Read everything the sweep writes before writing, in the order of the steps
+        written = []
+        for tape_index, move, symbols, source, source_move, translation in sweep:
+            if translation is not None:
+                index = indexes[source]
+                if source_move > 0:
+                    segment = cells[source][index:index + length]
+                else:
+                    segment = cells[source][index - length + 1:index + 1][::-1]
+                written.append((tape_index, move, segment.translate(translation)))
+
+        for tape_index, move, segment in written:
+            index = indexes[tape_index]
+            if move > 0:
+                cells[tape_index][index:index + length] = segment
+            else:
+                cells[tape_index][index - length + 1:index + 1] = segment[::-1]
+
+        for tape_index, move, symbols, source, source_move, translation in sweep:
+            indexes[tape_index] += move * length
+        return length
+
+    """ Number of consecutive cells (at most limit) from index in the direction of move whose symbol is one of
+        symbols. The cells are looked at in windows that double, so short runs are cheap """
+    def _run_length(self, cells, index, move, symbols, limit):
+        window = self.SWEEP_WINDOW
+        length = 0
+        while length < limit:
+            if move > 0:
+                region = cells[index + length:index + length + window]
+                run = len(region) - len(region.lstrip(symbols))
+            else:
+                end = index - length + 1
+                region = cells[max(0, end - window):end]
+                run = len(region) - len(region.rstrip(symbols))
+            length += run
+            if run < len(region) or len(region) == 0:
+                break
+            window *= 2
+        return min(length, limit)
+
+    """ Writes the tapes with the tracer of the machine, decoding the written window of each one """
+    def _trace_step(self, tracer, state, heads, tapes):
+        symbol_names = self._symbol_names
+        windows = []
+        for tape in tapes:
+            leftmost, rightmost = tape.span()
+            first = min(leftmost, 0)
+            windows.append((first, [symbol_names[symbol] for symbol in tape.window(first, rightmost)]))
+
+        if self._multitape:
+            tracer.multitape(self._state_names[state], heads, windows, self._max_length)
+        else:
+            tracer.single_tape(self._state_names[state], heads[0], *windows[0])
+
+    """ Runs all the strings loaded on the machine, printing the verdict of each one """
+    def run(self, quiet=False):
+        # Quiet runs take the verdicts already known from the cache of the machine, if there is one
+        cache = self._machine._result_cache if quiet else None
+        if cache is not None:
+            fingerprint = cache.fingerprint(self._machine)
+
+        for initial_string in self._machine.pending_strings():
+            if cache is not None:
+                verdict, steps = cache.decide(fingerprint, initial_string, self.decide)
+            else:
+                verdict, steps = self.decide(initial_string, quiet)
+            print(verdict)
+
+    """ Runs a single string. Returns the verdict that run prints for it and the steps taken """
+    def decide(self, initial_string, quiet=True):
+        reason, steps = self.run_string(initial_string, quiet)
+
+        # Write the steps left in the buffer before the verdict
+        if not quiet:
+            self._machine._tracer.flush()
+
+        # Detects that a invalid character was entered and returns an error message
+        if reason is None:
+            return "Caracter inválido: \'" + steps + "\'", 0
+        return self.VERDICTS[reason], steps
@@ -0,0 +1,114 @@
+########################################################################################################
+#
+#	cycle_detector.py -- Detects when a Turing Machine repeats a configuration
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Detection of cycles
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Detection of cycles
+#
+#   A configuration [p.168] is the current state, the positions of the heads and the contents of the
+#   tapes. The machines are deterministic, so once a configuration repeats the machine goes through the
+#   same configurations forever and never halts.
+#
+#   The configurations are compared by a Zobrist hash: a random 64 bit key for the state, for each head
+#   position and for each (position, symbol) written on a tape, all xor-ed together. A step only changes
+#   the state, the heads and one cell per tape, so the hash is updated in O(1).
+#
+#   Brent's algorithm keeps one saved configuration and compares every new one with it. The saved one is
+#   replaced at steps 1, 2, 4, 8, ..., so a cycle of length λ that starts at step μ is found after at most
+#   about 2 * max(μ, λ) + λ steps, without storing the configurations in between.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Blank cells have no key, so a cell that was never written and a cell where a blank was written
+#       hash (and compare) the same.
+#   b. Equal hashes are confirmed comparing the whole saved configuration, so a hash collision never
+#       stops a machine that is not looping.
+#
+
+import random # Random keys of the Zobrist hash
+
+########################################################################################################
+# CycleDetector class. Follows the configurations of a machine and tells when one repeats.
+#
+class CycleDetector:
+    """ Brent cycle detection over the Zobrist hash of the configurations of a machine """
+
+    # Constructor method. The blank is the symbol that is not hashed
+    def __init__(self, blank):
+        self._blank = blank
+        self._keys = {} # (kind, ...) -> random key
+        self._random = random.Random(0)
+
+        self._hash = 0 # Hash of the current configuration
+        self._saved_hash = 0 # Hash of the configuration saved by Brent's algorithm
+        self._saved_configuration = None
+        self._power = 1 # Steps until the saved configuration is replaced
+        self._length = 0 # Steps since the saved configuration was replaced
+
+    """ Random key of an element of the configuration, the same one every time """
+    def _key(self, element):
+        key = self._keys.get(element)
+        if key is None:
+            key = self._keys[element] = self._random.getrandbits(64)
+        return key
+
+    """ Hash of a cell, 0 for blanks """
+    def _cell(self, tape_index, position, symbol):
+        if symbol == self._blank:
+            return 0
+        return self._key(('cell', tape_index, position, symbol))
+
+    """ Full configuration: state, heads and contents of the tapes without blanks at their ends """
+    def _configuration(self, state, heads, tapes):
+        return state, tuple(heads), tuple(tape.contents() for tape in tapes)
+
+    """ Starts following a machine from its initial configuration """
+    def start(self, state, heads, tapes):
+        self._hash = self._key(('state', state))
+        for tape_index, tape in enumerate(tapes):
+            self._hash ^= self._key(('head', tape_index, heads[tape_index]))
+            first, symbols = tape.contents()
+            for offset, symbol in enumerate(symbols):
+                self._hash ^= self._cell(tape_index, first + offset, symbol)
+
+        self._saved_hash = self._hash
+        self._saved_configuration = self._configuration(state, heads, tapes)
+        self._power = 1
+        self._length = 0
+
+    """ Updates the hash after a step and tells if the new configuration was already seen. It receives the
+        state, heads and symbols under the heads before the step, and the state, heads and tapes after it """
+    def step(self, old_state, state, old_heads, heads, old_symbols, tapes):
+        if state != old_state:
+            self._hash ^= self._key(('state', old_state)) ^ self._key(('state', state))
+        for tape_index, tape in enumerate(tapes):
+            position = old_heads[tape_index]
+            symbol = tape[position]
+            if symbol != old_symbols[tape_index]:
+                self._hash ^= self._cell(tape_index, position, old_symbols[tape_index]) \
+                              ^ self._cell(tape_index, position, symbol)
+            if heads[tape_index] != position:
+                self._hash ^= self._key(('head', tape_index, position)) ^ self._key(('head', tape_index, heads[tape_index]))
+
+        # Compare with the saved configuration, the hash first and then the whole configuration
+        if self._hash == self._saved_hash \
+                and self._configuration(state, heads, tapes) == self._saved_configuration:
+            return True
+
+        # Brent's algorithm: save the current configuration when the power of two is reached
+        self._length += 1
+        if self._length == self._power:
+            self._saved_hash = self._hash
+            self._saved_configuration = self._configuration(state, heads, tapes)
+            self._power *= 2
+            self._length = 0
+        return False
@@ -0,0 +1,168 @@
+########################################################################################################
+#
+#	definition_cache.py -- Saves loaded (and compiled) machine definitions in a private cache directory
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Precompiled definitions
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Precompiled definitions
+#
+#   Loading a machine parses its configuration file and builds the index of its transitions, and the
+#   compiled engine also builds the integer tables. All of that only depends on the contents of the file,
+#   so it is saved (pickled) in the cache directory of the user, named by the SHA-256 of the contents:
+#
+#       $XDG_CACHE_HOME/turing_machine/<sha256>.tmc      (~/.cache/turing_machine when it is not set)
+#
+#   The next loads of a file with the same contents read the saved definition and tables instead. When
+#   the configuration file changes its hash changes too, and it is saved again in a new file.
+#
+#   Optimized machines (see optimizer.py) are saved apart, in <sha256>.opt.tmc, with the report of what the
+#   optimizer removed.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The saved file also holds the type of machine and the version of its format, a file saved by a
+#       different type of machine (or version) is not used.
+#   b. The cache directory is created only readable by the user, and it is not used if it belongs to
+#       someone else or others can write in it, so nobody else can place a file that would be loaded.
+#   c. The saved files only hold data: lists, dicts, tuples, strings, numbers, bytes and arrays of
+#       integers. They are read with an unpickler that refuses any other class or function, and the
+#       source of the generated engine is never saved, it is generated again from the tables.
+#   d. The saved file is written to a temporary file and then renamed, so processes that load it at the
+#       same time never read half of it. If it cannot be written, or it cannot be read back (a file of an
+#       older version or a corrupted one), the machine is used as loaded.
+#
+
+import array # Arrays of the compiled tables, the only class the saved files can have
+import hashlib # Hash of the contents of the configuration files
+import io # Reads the saved files with the restricted unpickler
+import os # Cache directory and atomic replacement of the saved files
+import pickle # Format of the saved files
+
+# Extension of the saved definitions
+SUFFIX = '.tmc'
+
+# Version of the saved files, saved files of other versions are ignored
+VERSION = 4
+
+# Classes and functions a saved file can name, the ones that rebuild the arrays of integers
+SAFE_GLOBALS = {('array', 'array'): array.array,
+                ('array', '_array_reconstructor'): array._array_reconstructor}
+
+""" Directory of the saved definitions of the user, created if needed. None if it cannot be used safely """
+def cache_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    directory = os.path.join(base, 'turing_machine')
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        status = os.stat(directory)
+    except OSError:
+        return None
+
+    # Only a directory of the user where nobody else can write is trusted
+    if hasattr(os, 'getuid') and (status.st_uid != os.getuid() or status.st_mode & 0o022):
+        return None
+    return directory
+
+########################################################################################################
+# SafeUnpickler class. Unpickler that only rebuilds data, see remark c.
+#
+class SafeUnpickler(pickle.Unpickler):
+    """ Unpickler that refuses every class and function but the arrays of integers """
+
+    """ Only the arrays of integers can be named by a saved file """
+    def find_class(self, module, name):
+        if (module, name) not in SAFE_GLOBALS:
+            raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a saved definition")
+        return SAFE_GLOBALS[(module, name)]
+
+########################################################################################################
+# DefinitionCache class. Loads and compiles the machine of a configuration file, reusing the saved ones.
+#
+class DefinitionCache:
+    """ Saved definition and compiled tables of a configuration file """
+
+    # Constructor method. Reads the configuration file and its saved definition, if it is up to date
+    def __init__(self, filename, optimize=False):
+        self._filename = filename
+        with open(filename, 'rb') as f:
+            self._hash = hashlib.sha256(f.read()).hexdigest()
+        directory = cache_directory()
+        self._saved_filename = None if directory is None else \
+            os.path.join(directory, self._hash + ('.opt' if optimize else '') + SUFFIX)
+        self._optimize = optimize
+
+        self._saved = {}
+        if self._saved_filename is not None:
+            try:
+                with open(self._saved_filename, 'rb') as f:
+                    saved = SafeUnpickler(io.BytesIO(f.read())).load()
+                if isinstance(saved, dict) and saved.get('version') == VERSION and saved.get('hash') == self._hash:
+                    self._saved = saved
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError, ImportError, ValueError,
+                    KeyError, IndexError):
+                pass
+        self.report = self._saved.get('report') # What the optimizer removed, if the machine is optimized
+
+    """ Loads the definition into the machine, from the saved one if its type of machine matches. Optimized
+        machines are optimized before saving them """
+    def load(self, machine):
+        if self._saved.get('type') == type(machine).__name__:
+            try:
+                machine.restore_definition(self._saved['definition'])
+                return
+            except (KeyError, TypeError):
+                # A saved file without every field, parse the configuration instead
+                self._saved = {}
+
+        machine.load_machine_definition(self._filename)
+        self.report = machine.optimize() if self._optimize else None
+        self._saved = {'version': VERSION,
+                       'hash': self._hash,
+                       'type': type(machine).__name__,
+                       'definition': {field: getattr(machine, field) for field in machine.DEFINITION_FIELDS},
+                       'report': self.report}
+        self._save()
+
+    """ Compiles the machine (already loaded by load), with the saved tables if there are. Generated machines
+        generate the source of their run function from the tables """
+    def compile(self, machine, accelerate=False, generate=False):
+        if generate:
+            from generated_machine import GeneratedMachine
+            engine = GeneratedMachine
+        else:
+            from compiled_machine import CompiledMachine
+            engine = CompiledMachine
+
+        tables = self._saved.get('compiled')
+        if tables is not None:
+            try:
+                return engine(machine, accelerate, tables)
+            except (KeyError, TypeError, ValueError, IndexError):
+                pass # Saved tables without every field, compile them again
+
+        compiled = engine(machine, accelerate)
+        if self._saved.get('type') == type(machine).__name__:
+            self._saved['compiled'] = compiled.tables()
+            self._save()
+        return compiled
+
+    """ Writes the saved definition in the cache directory """
+    def _save(self):
+        if self._saved_filename is None:
+            return
+        temporary = f"{self._saved_filename}.{os.getpid()}"
+        try:
+            with open(temporary, 'wb') as f:
+                pickle.dump(self._saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._saved_filename)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
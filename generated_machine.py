@@ -0,0 +1,189 @@
+########################################################################################################
+#
+#	generated_machine.py -- Runs a Turing Machine specialized into Python source
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Generated run loop
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Generated run loop
+#
+#   The integer tables of CompiledMachine are turned into the source of a single function with one loop,
+#   where δ is written as branches instead of being looked up:
+#
+#       while step < budget:
+#           key = c0[h0] + c1[h1] * |Γ| + ...          symbols under the heads
+#           step += 1
+#           if state < 4:                              binary search of the state
+#               if state == 2:
+#                   if key in {3, 7, 11}:              the keys of each action of the state
+#                       c0[h0] = 1                     its writes, moves and next state
+#                       h0 += 1
+#                       state = 3
+#                       ...
+#
+#   The writes and moves that do nothing are left out, the checks of _verify are only written where they
+#   can be true (a head only reaches max_length moving right, only halting states return) and the tape
+#   only grows on the side its head moves to.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The source is compiled with compile() once, and the functions are kept by source so machines with
+#       the same tables share them. The source is never saved with the definition (see definition_cache.py),
+#       only the tables it is generated from.
+#   b. Only the quiet runs use the generated loop, the ones that print their steps run the loop of
+#       CompiledMachine, which gives the same verdicts and steps.
+#
+
+from compiled_machine import CompiledMachine # Integer encoding of the machine and the run loop that prints
+
+# Generated functions by their source, so each source is compiled only once
+_functions = {}
+
+""" Grows a tape whose head index left its cells. Returns the new cells and how much the indexes shift """
+def _grow(tape, index):
+    origin = tape._origin
+    tape.reserve(index - origin, index - origin)
+    return tape._cells, tape._origin - origin
+
+########################################################################################################
+# GeneratedMachine class. A compiled machine whose quiet run loop is generated for its rules.
+#
+class GeneratedMachine(CompiledMachine):
+    """ Compiled machine that runs a function generated from its transition table """
+
+    # Constructor method. Compiles the machine (or takes its tables) and generates its run function
+    def __init__(self, machine, accelerate=False, tables=None):
+        CompiledMachine.__init__(self, machine, accelerate, tables)
+        self._source = self._generate()
+        function = _functions.get(self._source)
+        if function is None:
+            namespace = {}
+            exec(compile(self._source, f"<generated {machine._name}>", 'exec'), namespace)
+            function = _functions[self._source] = namespace['run']
+        self._function = function
+
+    """ Writes the source of the run function """
+    def _generate(self):
+        tape_indexes = range(self._number_of_tapes)
+        number_of_symbols = len(self._symbol_names)
+        accept = self._state_ids[self._machine._accept_state]
+        reject = self._state_ids[self._machine._reject_state]
+
+        # Keys of each action, by state, in the order the actions first appear
+        keys = [{} for state in self._state_names]
+        for slot, action in enumerate(self._table):
+            if action >= 0:
+                keys[slot // self._stride].setdefault(action, []).append(slot % self._stride)
+
+        tapes = ', '.join(f"t{tape_index}" for tape_index in tape_indexes)
+        lines = [f"def run({tapes}, budget, ACCEPTED, REJECTED, UNDECIDABLE, grow):"]
+        for tape_index in tape_indexes:
+            lines.append(f"    c{tape_index} = t{tape_index}._cells")
+            lines.append(f"    h{tape_index} = t{tape_index}._origin")
+            lines.append(f"    n{tape_index} = len(c{tape_index})")
+        lines.append(f"    limit = t0._origin + {self._max_length}")
+        lines.append(f"    state = {self._state_ids[self._machine._initial_state]}")
+        lines.append("    step = 0")
+        lines.append("    while step < budget:")
+        lines.append("        key = " + " + ".join(f"c{tape_index}[h{tape_index}]" +
+                                                   (f" * {number_of_symbols ** tape_index}" if tape_index else "")
+                                                   for tape_index in tape_indexes))
+        lines.append("        step += 1")
+
+        """ Writes the branches of the states from low to high (not included), as a binary search """
+        def states(low, high, indent):
+            if high - low == 1:
+                actions(low, indent)
+                return
+            middle = (low + high) // 2
+            lines.append(f"{indent}if state < {middle}:")
+            states(low, middle, indent + "    ")
+            lines.append(f"{indent}else:")
+            states(middle, high, indent + "    ")
+
+        """ Writes the branch of each action of a state, and the rejection when no rule matches """
+        def actions(state, indent):
+            for action, action_keys in keys[state].items():
+                if len(action_keys) == 1:
+                    lines.append(f"{indent}if key == {action_keys[0]}:")
+                else:
+                    lines.append(f"{indent}if key in {{{', '.join(map(str, action_keys))}}}:")
+                body(action, indent + "    ")
+
+            # No rule was found from this state to another, reject
+            lines.append(f"{indent}return REJECTED, step - 1")
+
+        """ Writes the writes, moves and checks of an action """
+        def body(action, indent):
+            next_state = self._next_states[action]
+            writes = self._writes[action]
+            moves = self._moves[action]
+            for tape_index in tape_indexes:
+                if writes[tape_index] >= 0:
+                    lines.append(f"{indent}c{tape_index}[h{tape_index}] = {writes[tape_index]}")
+
+            # Same checks, in the same order, as _verify
+            if next_state == accept:
+                lines.append(f"{indent}return ACCEPTED, step")
+                return
+            if next_state == reject:
+                lines.append(f"{indent}return REJECTED, step")
+                return
+            for tape_index in tape_indexes:
+                if moves[tape_index] != 0:
+                    lines.append(f"{indent}h{tape_index} += {moves[tape_index]}")
+            # The head of the first tape only reaches max_length moving right onto it, unless it starts there
+            # (or past it, moving left onto it) when max_length is not positive
+            if moves[0] == 1 or self._max_length <= 0:
+                lines.append(f"{indent}if h0 == limit:")
+                lines.append(f"{indent}    return UNDECIDABLE, step")
+
+            # The head left the allocated cells, grow the tape and move the indexes with its origin
+            for tape_index in tape_indexes:
+                if moves[tape_index] != 0:
+                    outside = f"h{tape_index} >= n{tape_index}" if moves[tape_index] > 0 else f"h{tape_index} < 0"
+                    lines.append(f"{indent}if {outside}:")
+                    lines.append(f"{indent}    c{tape_index}, shift = grow(t{tape_index}, h{tape_index})")
+                    lines.append(f"{indent}    n{tape_index} = len(c{tape_index})")
+                    lines.append(f"{indent}    h{tape_index} += shift")
+                    if tape_index == 0:
+                        lines.append(f"{indent}    limit += shift")
+            lines.append(f"{indent}state = {next_state}")
+            lines.append(f"{indent}continue")
+
+        states(0, len(self._state_names), "        ")
+        lines.append("    return REJECTED, budget")
+        return "\n".join(lines) + "\n"
+
+    """ Runs a single input string, see CompiledMachine.run_string. The quiet runs use the generated loop """
+    def run_string(self, initial_string, quiet=True):
+        if not quiet:
+            return CompiledMachine.run_string(self, initial_string, quiet)
+
+        encoded, character = self._encode_input(initial_string)
+        if encoded is None:
+            return None, character
+
+        # The input does not fit in max_length
+        if len(encoded) > self._max_length:
+            return self.FinalState.OUTSIDE, 0
+
+        for tape in self._tapes:
+            tape.reset()
+        self._tapes[0].load(encoded)
+
+        # The loop writes on the cells directly, so the tapes are told what to blank on the next reset, even
+        # when the run is interrupted (see verdict_server.py)
+        try:
+            return self._function(*self._tapes, max(self._max_steps, 0) + 1, self.FinalState.ACCEPTED,
+                                  self.FinalState.REJECTED, self.FinalState.UNDECIDABLE, _grow)
+        finally:
+            for tape in self._tapes:
+                tape.touch_nonblank()
@@ -0,0 +1,32 @@
+########################################################################################################
+#
+#	input_strings.py -- Reads the initial strings given to the Turing Machines
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   The strings files have one input string per line. Blank lines are skipped and the spaces around each
+#   string are removed. The strings are read lazily, one line at a time, so a file of any size can be
+#   run with constant memory.
+#
+
+import sys # Standard input, used when the strings file is '-'
+
+# Name of the strings file that stands for the standard input
+STDIN = '-'
+
+""" Yields the strings of a strings file (or of the standard input for '-'), one at a time """
+def read_strings(filename):
+    if filename == STDIN:
+        yield from _strings_of(sys.stdin)
+    else:
+        with open(filename) as f:
+            yield from _strings_of(f)
+
+""" Yields the non empty, stripped lines of an open file """
+def _strings_of(f):
+    for line in f:
+        stripped_string = line.strip()
+        if(len(stripped_string) > 0):
+            yield stripped_string
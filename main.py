@@ -1,8 +1,8 @@
 #!/bin/python3
 
-from turing_machine import TuringMachine
-from turing_machine_multitape import MultitapeTuringMachine
-from sys import argv
+# Only argparse is imported here, each module is imported when the options ask for it so short runs
+# start fast
+import sys
 from sys import exit
 import argparse
 
@@ -16,36 +16,305 @@ def main():
     parser.add_argument('strings',
                         metavar='strings_file',
                         type=str,
-                        help="The initial strings file for the Turing Machine")
+                        help="The initial strings file for the Turing Machine, '-' reads them from the standard input")
 
     parser.add_argument('-q',
                         '--quiet',
                         action='store_true',
                         help='Disable step by step printing')
 
+    parser.add_argument('-s',
+                        '--stream',
+                        action='store_true',
+                        help='Read and run the strings one at a time instead of loading them all first')
+
+    parser.add_argument('-M',
+                        '--mmap',
+                        action='store_true',
+                        help='Read the strings through a memory map of the file and an index of them saved in '
+                             '<initial_strings_file>.idx, with -j each process reads its own strings')
+
     parser.add_argument('-t',
                         '--type',
                         action='store',
                         type=str,
                         help='Type of Turing Machine')
+
+    parser.add_argument('-e',
+                        '--engine',
+                        action='store',
+                        type=str,
+                        choices=['interpreted', 'compiled', 'generated', 'vectorized', 'nondeterministic'],
+                        default='interpreted',
+                        help='Run the machine as loaded, compiled into integer tables, generated as Python code '
+                             'specialized for its rules, for single tape machines many strings at once with NumPy, '
+                             'or following every rule that matches instead of the first one')
+
+    parser.add_argument('--deepening',
+                        action='store_true',
+                        help='With the nondeterministic engine, search by iterative deepening instead of breadth first')
+
+    parser.add_argument('-a',
+                        '--accelerate',
+                        action='store_true',
+                        help='With the compiled engine, run the sweeps over runs of cells as single macro-steps')
+
+    parser.add_argument('-j',
+                        '--jobs',
+                        action='store',
+                        type=int,
+                        help='Run the strings on this many processes, quietly and keeping their order')
+
+    parser.add_argument('-c',
+                        '--detect-cycles',
+                        action='store_true',
+                        help='Stop a string as soon as the machine repeats a configuration, with the verdict Ciclo')
+
+    parser.add_argument('--trace-every',
+                        action='store',
+                        type=int,
+                        default=1,
+                        help='Print only every Nth step')
+
+    parser.add_argument('--trace-states',
+                        action='store',
+                        type=str,
+                        help='Print only the steps that end in these states, separated by commas')
+
+    parser.add_argument('--full-tapes',
+                        action='store_true',
+                        help='Print every tape of the multitape steps up to max_length, not only up to its last '
+                             'written cell or its head')
+
+    parser.add_argument('-r',
+                        '--record',
+                        action='store',
+                        type=str,
+                        help='Record the steps in this binary trace file, to be read with replay_trace.py')
+
+    parser.add_argument('-C',
+                        '--cache',
+                        action='store',
+                        nargs='?',
+                        const='.tm_cache',
+                        type=str,
+                        help='Keep the verdicts of the quiet runs in this directory (.tm_cache by default) and '
+                             'reuse them for the strings already run on the same machine')
+
+    parser.add_argument('-p',
+                        '--profile',
+                        action='store_true',
+                        help='Count the steps of each rule and state, the head ranges and the time of each string, '
+                             'and print them after the verdicts')
+
+    parser.add_argument('--profile-json',
+                        action='store',
+                        type=str,
+                        help='Save the counts of --profile in this JSON file')
+
+    parser.add_argument('-k',
+                        '--checkpoint',
+                        action='store',
+                        type=str,
+                        help='Save the configuration of the running string in this file every --checkpoint-every steps')
+
+    parser.add_argument('--checkpoint-every',
+                        action='store',
+                        type=int,
+                        default=1000000,
+                        help='Steps between checkpoints')
+
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='Continue the run saved in the --checkpoint file, skipping the strings it had finished')
+
+    parser.add_argument('-i',
+                        '--interleave',
+                        action='store_true',
+                        help='Run many strings at once, a quantum of steps each in turn, and print each verdict '
+                             'after the position of its string as soon as it finishes')
+
+    parser.add_argument('--quantum',
+                        action='store',
+                        type=int,
+                        default=1000,
+                        help='With --interleave, steps each string runs in its turn')
+
+    parser.add_argument('--live',
+                        action='store',
+                        type=int,
+                        default=64,
+                        help='With --interleave, strings running at the same time')
+
+    parser.add_argument('--ordered',
+                        action='store_true',
+                        help='With --interleave, print the verdicts in the order of the strings')
+
+    parser.add_argument('-P',
+                        '--share-prefixes',
+                        action='store_true',
+                        help='Run the strings that start the same only once along their common prefix, and fork '
+                             'the run where they differ')
+
+    parser.add_argument('--no-precompiled',
+                        action='store_true',
+                        help='Always parse (and compile) the configuration file, without reading or writing '
+                             'the precompiled definition saved in the cache directory')
+
+    parser.add_argument('-O',
+                        '--optimize',
+                        action='store_true',
+                        help='Remove the rules and states that are never used and merge the equivalent states '
+                             'before running, and print what was removed')
     args = parser.parse_args()
     
     # Initialize the TM
-    if(args.type == 'mtd'):
+    if(args.type == 'mtd' or args.type == None):
+        from turing_machine import TuringMachine
         tm = TuringMachine()
     elif(args.type == 'mtkc'):
+        from turing_machine_multitape import MultitapeTuringMachine
         tm = MultitapeTuringMachine()
-    elif(args.type == None):
-        tm = TuringMachine()
     else:
         print("Unknown type of Turing machine, refer to the README.md")
         exit(0)
 
-    tm.load_machine_definition(args.config)
-    tm.load_initial_strings(args.strings)
+    if(args.engine == 'vectorized' and args.type == 'mtkc'):
+        print("The vectorized engine only runs single tape machines, refer to the README.md")
+        exit(0)
+
+    if(args.detect_cycles and args.engine != 'interpreted'):
+        print("Cycles are only detected by the interpreted engine, refer to the README.md")
+        exit(0)
+
+    if(args.record and (args.engine != 'interpreted' or args.jobs)):
+        print("The steps are only recorded by the interpreted engine in a single process, refer to the README.md")
+        exit(0)
+
+    if((args.profile or args.profile_json) and (args.engine != 'interpreted' or args.jobs)):
+        print("Only the interpreted engine in a single process is profiled, refer to the README.md")
+        exit(0)
+
+    if(args.checkpoint and (args.engine != 'interpreted' or args.jobs or args.record or args.profile
+                            or args.profile_json)):
+        print("Checkpoints are only saved by the interpreted engine in a single process, without recording "
+              "or profiling the steps, refer to the README.md")
+        exit(0)
+
+    if(args.resume and not args.checkpoint):
+        print("--resume needs the --checkpoint file to resume from, refer to the README.md")
+        exit(0)
+
+    if(args.interleave and (args.engine != 'interpreted' or args.jobs or args.detect_cycles or args.record
+                            or args.profile or args.profile_json or args.checkpoint or args.cache)):
+        print("The strings are only interleaved by the interpreted engine in a single process, without "
+              "cycles, recording, profiling, checkpoints or cache, refer to the README.md")
+        exit(0)
+
+    if(args.share_prefixes and (args.engine != 'interpreted' or args.jobs or args.detect_cycles or args.record
+                                or args.profile or args.profile_json or args.checkpoint or args.cache
+                                or args.interleave)):
+        print("The prefixes are only shared by the interpreted engine in a single process, without cycles, "
+              "recording, profiling, checkpoints, cache or interleaving, refer to the README.md")
+        exit(0)
+
+    if(args.cache and (args.jobs or args.engine == 'nondeterministic')):
+        print("The verdicts are only cached in a single process, by the deterministic engines, refer to the README.md")
+        exit(0)
+
+    if(args.mmap and args.strings == '-'):
+        print("The standard input can not be mapped, refer to the README.md")
+        exit(0)
+
+    if(args.optimize and (args.detect_cycles or args.engine == 'nondeterministic')):
+        print("Machines are only optimized without cycles, for the deterministic engines, refer to the README.md")
+        exit(0)
+
+    # The definition is read from the precompiled file when it is up to date
+    try:
+        if(args.no_precompiled):
+            tm.load_machine_definition(args.config)
+            report = tm.optimize() if args.optimize else None
+        else:
+            from definition_cache import DefinitionCache
+            definitions = DefinitionCache(args.config, args.optimize)
+            definitions.load(tm)
+            report = definitions.report
+    except ValueError as error:
+        print(f"{error}, refer to the README.md")
+        exit(0)
+    mapped = None
+    if(args.mmap):
+        # The compiled engines take the bytes of the strings, the others decode them
+        mapped = tm.map_initial_strings(args.strings, args.engine not in ('compiled', 'generated', 'vectorized'))
+    elif(args.stream or args.strings == '-'):
+        tm.stream_initial_strings(args.strings)
+    else:
+        tm.load_initial_strings(args.strings)
+    tm.detect_cycles(args.detect_cycles)
+    tm.trace(args.trace_every, args.trace_states.split(',') if args.trace_states else None,
+             full_tapes=args.full_tapes)
+    if(args.record):
+        recorder = tm.record(args.record)
+    if(args.profile or args.profile_json):
+        profiler = tm.profile()
+    if(args.cache):
+        from result_cache import ResultCache
+        cache = ResultCache(args.cache)
+        tm.cache_results(cache)
+    if(args.checkpoint):
+        try:
+            tm.checkpoint(args.checkpoint, args.checkpoint_every, args.resume)
+        except ValueError as error:
+            print(f"{error}, refer to the README.md")
+            exit(0)
     print(tm)
+    if(report):
+        import optimizer
+        print(optimizer.summary(report))
     # Start computing
-    tm.run(args.quiet)
+    if(args.jobs):
+        from batch_runner import run_parallel
+        sys.stdout.flush()
+        run_parallel(tm.pending_strings(), args.config, args.type or 'mtd', args.engine, args.jobs, args.accelerate,
+                     args.detect_cycles, not args.no_precompiled, args.optimize, args.deepening, mapped)
+    elif(args.engine == 'compiled'):
+        from compiled_machine import CompiledMachine
+        compiled = CompiledMachine(tm, args.accelerate) if args.no_precompiled else definitions.compile(tm, args.accelerate)
+        compiled.run(args.quiet)
+    elif(args.engine == 'generated'):
+        from generated_machine import GeneratedMachine
+        generated = GeneratedMachine(tm) if args.no_precompiled else definitions.compile(tm, generate=True)
+        generated.run(args.quiet)
+    elif(args.engine == 'vectorized'):
+        # NumPy is only needed, and imported, for this engine
+        from vectorized_machine import VectorizedMachine
+        VectorizedMachine(tm, None if args.no_precompiled else definitions.compile(tm)).run()
+    elif(args.engine == 'nondeterministic'):
+        from nondeterministic_machine import NondeterministicMachine
+        NondeterministicMachine(tm, args.deepening).run(args.quiet)
+    elif(args.share_prefixes):
+        import prefix_batch
+        prefix_batch.run(tm)
+    elif(args.interleave):
+        from scheduler import Scheduler
+        Scheduler(tm, args.quantum, args.live).run(args.ordered)
+    else:
+        # A checkpoint of other strings is only found when the run reaches them
+        try:
+            tm.run(args.quiet)
+        except ValueError as error:
+            print(f"{error}, refer to the README.md")
+            exit(0)
+
+    if(args.record):
+        recorder.close()
+    if(args.cache):
+        cache.close()
+    if(args.profile):
+        print(profiler.table())
+    if(args.profile_json):
+        profiler.save_json(args.profile_json)
 
 if __name__=="__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,187 @@
+#!/bin/python3
+
+########################################################################################################
+#
+#	manifest_runner.py -- Runs the strings files of many machines in a single process or pool
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Manifest and results
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Manifest and results
+#
+#   The manifest lists the runs, one per line: a configuration file, a strings file and, optionally, the
+#   type of machine (mtd by default, or mtkc), separated by spaces. Blank lines and lines starting with #
+#   are skipped, and relative paths are relative to the directory of the manifest:
+#
+#       # machine                   strings                           type
+#       datos_prueba/mttarea2.txt   datos_prueba/mttarea2-prueba.txt
+#       datos_prueba/mtkcintas-palin.txt datos_prueba/mtkcintas-palin-strings.txt mtkc
+#
+#   Each string gives a JSON line with the configuration file of its machine, the string, its verdict (the
+#   one main.py prints), its steps and the wall time it took in seconds:
+#
+#       {"machine": "datos_prueba/mttarea2.txt", "input": "0011", "verdict": "Aceptado", "steps": 12, "seconds": 4.1e-05}
+#
+#   The results are written in the order of the manifest and of the strings in each file.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Each process parses (and compiles) a configuration file only once, the first time one of its
+#       strings runs there, however many lines of the manifest use it.
+#   b. The strings are sent to the processes in chunks of CHUNK_SIZE, and the results of a chunk are
+#       written at once, not a print for each string.
+#   c. Only a bounded number of chunks is in flight at any time, as in batch_runner.py, so the strings
+#       files are streamed.
+#
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import build_machine
+from input_strings import read_strings
+
+# Strings sent to a process at a time
+CHUNK_SIZE = 1000
+
+# Size of the buffer of the results file
+OUTPUT_BUFFER = 1 << 20
+
+# Engine and machines of each process, the machines are loaded the first time they are used
+_engine = 'interpreted'
+_precompiled = True
+_machines = {}
+
+""" Reads the (config, strings, type) runs of a manifest file """
+def read_manifest(filename):
+    directory = os.path.dirname(filename)
+    runs = []
+    with open(filename) as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            if len(fields) not in (2, 3) or (len(fields) == 3 and fields[2] not in ('mtd', 'mtkc')):
+                raise ValueError(f"Line {line_number} of {filename} is not: config strings [mtd|mtkc]")
+            runs.append((os.path.join(directory, fields[0]), os.path.join(directory, fields[1]),
+                         fields[2] if len(fields) == 3 else 'mtd'))
+    return runs
+
+""" Sets the engine of a process, it is called once when the process starts """
+def _init_worker(engine, precompiled):
+    global _engine, _precompiled
+    _engine, _precompiled = engine, precompiled
+
+""" Runs a chunk of strings on the machine of a configuration file. Returns the string, verdict, steps and
+    seconds of each one """
+def _run_chunk(config, machine_type, chunk):
+    key = (config, machine_type)
+    if key not in _machines:
+        _machines[key] = build_machine(config, machine_type, _engine, precompiled=_precompiled)
+    machine = _machines[key]
+
+    results = []
+    for initial_string in chunk:
+        start = time.perf_counter()
+        verdict, steps = machine.decide(initial_string)
+        results.append((initial_string, verdict, steps, time.perf_counter() - start))
+    return results
+
+""" Yields the config, type and chunks of strings of every run """
+def _chunks(runs):
+    for config, strings, machine_type in runs:
+        strings = read_strings(strings)
+        while True:
+            chunk = list(itertools.islice(strings, CHUNK_SIZE))
+            if not chunk:
+                break
+            yield config, machine_type, chunk
+
+""" Writes the results of a chunk as JSON lines """
+def _write(output, config, results):
+    output.write(''.join(json.dumps({'machine': config, 'input': initial_string, 'verdict': verdict, 'steps': steps,
+                                     'seconds': round(seconds, 6)}, ensure_ascii=False) + '\n'
+                         for initial_string, verdict, steps, seconds in results))
+
+""" Runs every string of the runs, in this process or on a pool of jobs processes, and writes the results """
+def run_manifest(runs, engine='interpreted', jobs=None, precompiled=True, output=sys.stdout):
+    if not jobs or jobs == 1:
+        _init_worker(engine, precompiled)
+        for config, machine_type, chunk in _chunks(runs):
+            _write(output, config, _run_chunk(config, machine_type, chunk))
+        output.flush()
+        return
+
+    chunks = _chunks(runs)
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(engine, precompiled)) as pool:
+        while True:
+            # Keep every process busy, with some chunks waiting so they never starve
+            for config, machine_type, chunk in itertools.islice(chunks, 4 * jobs - len(in_flight)):
+                in_flight.append((config, pool.submit(_run_chunk, config, machine_type, chunk)))
+            if not in_flight:
+                break
+
+            # The oldest chunk goes first, so the results keep the order of the manifest
+            config, future = in_flight.popleft()
+            _write(output, config, future.result())
+    output.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the strings files of many Turing machines.")
+    parser.add_argument('manifest',
+                        metavar='manifest_file',
+                        type=str,
+                        help="File with a configuration file, a strings file and optionally a type on each line")
+
+    parser.add_argument('-e',
+                        '--engine',
+                        action='store',
+                        type=str,
+                        choices=['interpreted', 'compiled', 'generated'],
+                        default='interpreted',
+                        help='Engine the machines run with')
+
+    parser.add_argument('-j',
+                        '--jobs',
+                        action='store',
+                        type=int,
+                        help='Run the strings on this many processes, all in this one by default')
+
+    parser.add_argument('-o',
+                        '--output',
+                        action='store',
+                        type=str,
+                        help='Write the JSON lines to this file instead of the standard output')
+
+    parser.add_argument('--no-precompiled',
+                        action='store_true',
+                        help='Always parse (and compile) the configuration files, without the precompiled definitions')
+    args = parser.parse_args()
+
+    try:
+        runs = read_manifest(args.manifest)
+    except ValueError as error:
+        print(f"{error}, refer to the README.md")
+        sys.exit(0)
+
+    if(args.output):
+        with open(args.output, 'w', buffering=OUTPUT_BUFFER, encoding='utf-8') as output:
+            run_manifest(runs, args.engine, args.jobs, not args.no_precompiled, output)
+    else:
+        run_manifest(runs, args.engine, args.jobs, not args.no_precompiled)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,158 @@
+########################################################################################################
+#
+#	mapped_strings.py -- Reads large strings files through a memory map and an index of their strings
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Mapped strings files
+#   2. Index of the strings
+#   3. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Mapped strings files
+#
+#   The strings file is mapped in memory instead of read line by line. Each string is found with a single
+#   regular expression over the map (from the first non space character of a line to its last one, so
+#   blank lines are skipped and the spaces around each string are removed, as read_strings does), and is
+#   given to the machines as the bytes of the string, without building a list of its characters.
+#
+#   The compiled engines translate those bytes into symbol ids at once, see _encode_input in
+#   compiled_machine.py, and the other engines decode them into text.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Index of the strings
+#
+#   The index holds the number of strings of the file and the byte offset of one string out of every
+#   STRIDE. It is built once and saved next to the strings file, in <strings_file>.idx, together with the
+#   size and modification time of the file, and used again while they do not change:
+#
+#       header  : MAGIC, VERSION, size, modification time (ns) and number of strings
+#       offsets : offset of the strings 0, STRIDE, 2 * STRIDE, ... as 8 byte integers
+#
+#   Any string of the file is found from its nearest offset, so the strings can be split in ranges that
+#   the worker processes read from the file by themselves: the main process only sends the offset where
+#   a range starts, how many strings to skip from there and how many to run (see batch_runner.py).
+#
+#-------------------------------------------------------------------------------------------------------
+#   3. Implementation remarks
+#   a. Each process maps a file only once, and the map is kept open for the rest of the process.
+#   b. The index has an offset every STRIDE strings only, so it stays small for files of billions of
+#       strings. Skipping fewer than STRIDE strings from an offset costs less than running them.
+#   c. The index file is written to a temporary file and then renamed, and if it cannot be written the
+#       index is built again the next time.
+#   d. Empty files cannot be mapped, they are read as empty bytes.
+#
+
+import array # Offsets of the index
+import itertools # Takes a range of the strings
+import mmap # Memory map of the strings files
+import os # Size and modification time of the files, atomic replacement of the index files
+import re # Finds the strings in the map
+import struct # Header of the index files
+
+# A string, from the first non space character of a line to its last one
+STRING = re.compile(rb'\S(?:[^\n]*\S)?')
+
+# Strings between two offsets of the index
+STRIDE = 4096
+
+# Extension added to the strings file to name its index
+INDEX_SUFFIX = '.idx'
+
+# Start of the index files and version of their format, files of other versions are ignored
+MAGIC = b'TMIX'
+VERSION = 1
+
+# Header of the index files: magic, version, size and modification time of the strings file, strings
+HEADER = struct.Struct('<4sBqqq')
+
+# Maps of the files mapped by this process
+_maps = {}
+
+""" Memory map of a file, mapped once in each process """
+def _map(filename):
+    if filename not in _maps:
+        with open(filename, 'rb') as f:
+            try:
+                _maps[filename] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # An empty file
+                _maps[filename] = b''
+    return _maps[filename]
+
+""" Bytes of count strings of a file, skipping skip strings from the byte offset """
+def strings_at(filename, offset, skip, count):
+    matches = STRING.finditer(_map(filename), offset)
+    return [match.group() for match in itertools.islice(matches, skip, skip + count)]
+
+########################################################################################################
+# MappedStrings class. Strings of a mapped file, with the index of their offsets.
+#
+class MappedStrings:
+    """ Strings of a strings file, read through a memory map """
+
+    # Constructor method. Maps the file and reads its index, or builds it if it is missing or out of date
+    def __init__(self, filename):
+        self.filename = filename
+        self._map = _map(filename)
+        stat = os.stat(filename)
+        self._stamp = (stat.st_size, stat.st_mtime_ns)
+        self._offsets = array.array('q') # Offset of the strings 0, STRIDE, 2 * STRIDE, ...
+        self._count = 0
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
+
+    """ Number of strings of the file """
+    def __len__(self):
+        return self._count
+
+    """ Yields the bytes of every string, in the order of the file """
+    def __iter__(self):
+        for match in STRING.finditer(self._map):
+            yield match.group()
+
+    """ Offset to start reading from and strings to skip from there to reach the string at a position """
+    def locate(self, position):
+        return self._offsets[position // STRIDE], position % STRIDE
+
+    """ Finds the strings and keeps the offset of one out of every STRIDE """
+    def _build_index(self):
+        self._offsets = array.array('q')
+        count = 0
+        for match in STRING.finditer(self._map):
+            if count % STRIDE == 0:
+                self._offsets.append(match.start())
+            count += 1
+        self._count = count
+
+    """ Reads the saved index. Returns False if there is none or the strings file changed since it was saved """
+    def _load_index(self):
+        try:
+            with open(self.filename + INDEX_SUFFIX, 'rb') as f:
+                magic, version, size, modified, count = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or version != VERSION or (size, modified) != self._stamp:
+                    return False
+                offsets = array.array('q')
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return False
+        if len(offsets) != (count + STRIDE - 1) // STRIDE:
+            return False
+        self._offsets, self._count = offsets, count
+        return True
+
+    """ Writes the index next to the strings file """
+    def _save_index(self):
+        temporary = f"{self.filename}{INDEX_SUFFIX}.{os.getpid()}"
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, *self._stamp, self._count))
+                f.write(self._offsets.tobytes())
+            os.replace(temporary, self.filename + INDEX_SUFFIX)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
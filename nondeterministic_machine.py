@@ -0,0 +1,314 @@
+########################################################################################################
+#
+#	nondeterministic_machine.py -- Runs a Turing Machine following every rule that matches
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Nondeterministic runs
+#   2. Configurations
+#   3. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Nondeterministic runs
+#
+#   A nondeterministic Turing machine [p.178] can have several rules for the same state and symbols. The
+#   deterministic machines only apply the first one. This engine follows all of them: the run is a tree
+#   of configurations, searched breadth first (or, optionally, by iterative deepening), and the string is:
+#
+#       Aceptado    : as soon as any branch reaches q_accept
+#       Indecidible : if no branch accepts and some branch took its head past max_length
+#       Rechazado   : otherwise, every branch reached q_reject, found no rule or ran out of steps
+#
+#   Each branch stops as the deterministic run does, so a machine without several rules for the same
+#   state and symbols gets the same verdicts as the interpreted engine.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Configurations
+#
+#   A configuration is (state, head positions, tape ids). The tapes are hash-consed: each tape is cut in
+#   segments of SEGMENT cells, each distinct segment is stored once and a tape is the tuple of the ids
+#   of its segments, also stored once. A step copies only the segment it writes, and the tapes it does
+#   not change are shared by id with the configuration it came from.
+#
+#   Since equal tapes have equal ids, equal configurations are equal tuples, and the configurations
+#   already reached are dropped with a visited set.
+#
+#-------------------------------------------------------------------------------------------------------
+#   3. Implementation remarks
+#   a. Dropping a configuration that was already reached does not change the verdict: everything it
+#       leads to was reached (with more steps left) from its first visit.
+#   b. The blank segments at both ends of a tape are removed, so the tapes that only differ in the
+#       blanks around them have the same id.
+#   c. The iterative deepening search goes depth first with a limit of steps that doubles until no branch
+#       reaches it. It keeps a stack instead of a whole level of configurations.
+#   d. The stores of segments and tapes are emptied before each string.
+#
+
+import resource # Peak memory of the searches
+import sys # Standard output
+
+# Cells of each segment of the tapes, a power of two
+SEGMENT_BITS = 4
+SEGMENT = 1 << SEGMENT_BITS
+
+########################################################################################################
+# NondeterministicMachine class. Searches every branch of the run of a loaded Turing machine.
+#
+class NondeterministicMachine:
+    """ Breadth first (or iterative deepening) search over the configurations of a loaded machine """
+
+    # Constructor method. Collects every rule of the given (already loaded) machine
+    def __init__(self, machine, deepening=False):
+        self._machine = machine # The machine whose rules are followed, it also holds the strings to run
+        self._deepening = deepening
+        self.FinalState = type(machine).FinalState
+        self.VERDICTS = type(machine).VERDICTS
+
+        # The single tape machine starts with empty (None) cells, the multitape one with blanks
+        self._multitape = hasattr(machine, '_number_of_tapes')
+        self._number_of_tapes = machine._number_of_tapes if self._multitape else 1
+        self._blank = '_' if self._multitape else None
+        self._max_length = machine._max_length
+        self._max_steps = machine._max_steps
+        self._accept_state = machine._accept_state
+        self._reject_state = machine._reject_state
+
+        # (state, symbols) -> rules without wildcards that match them, and state -> rules with wildcards (the
+        # None symbols), each rule as (rule index, next state, writes, moves)
+        self._exact_rules = {}
+        self._wildcard_rules = {}
+        for (state, read_symbols), action in machine._decoded_rules():
+            if self._multitape:
+                rule_index, next_state, writes, moves = action
+            else:
+                rule_index, next_state, write, move = action
+                read_symbols, writes, moves = (read_symbols,), (write,), (move,)
+            if None in read_symbols:
+                self._wildcard_rules.setdefault(state, []).append((read_symbols, (rule_index, next_state, writes, moves)))
+            else:
+                self._exact_rules.setdefault((state, tuple(read_symbols)), []).append((rule_index, next_state, writes, moves))
+        self._rules = {} # (state, symbols) -> every distinct (next state, writes, moves), found by _actions
+
+        self._segments = [] # Id -> cells of a segment
+        self._segment_ids = {} # Cells -> id
+        self._tapes = [] # Id -> (first segment, ids of the segments)
+        self._tape_ids = {} # (first segment, ids of the segments) -> id
+        self.stats = {} # Size of the last search
+
+    """ Empties the stores of segments and tapes. The segment 0 is blank and the tape 0 is empty """
+    def _reset(self):
+        self._segments.clear()
+        self._segment_ids.clear()
+        self._tapes.clear()
+        self._tape_ids.clear()
+        self._intern_segment((self._blank,) * SEGMENT)
+        self._intern_tape(0, ())
+
+    """ Id of a segment, stored the first time it is seen """
+    def _intern_segment(self, cells):
+        segment = self._segment_ids.get(cells)
+        if segment is None:
+            segment = self._segment_ids[cells] = len(self._segments)
+            self._segments.append(cells)
+        return segment
+
+    """ Id of a tape, stored the first time it is seen, without the blank segments at its ends """
+    def _intern_tape(self, first, segments):
+        start, end = 0, len(segments)
+        while start < end and segments[start] == 0:
+            start += 1
+        while end > start and segments[end - 1] == 0:
+            end -= 1
+        key = (first + start, segments[start:end]) if start < end else (0, ())
+        tape = self._tape_ids.get(key)
+        if tape is None:
+            tape = self._tape_ids[key] = len(self._tapes)
+            self._tapes.append(key)
+        return tape
+
+    """ Symbol at a position of a tape """
+    def _read(self, tape, position):
+        first, segments = self._tapes[tape]
+        index = (position >> SEGMENT_BITS) - first
+        if 0 <= index < len(segments):
+            return self._segments[segments[index]][position & (SEGMENT - 1)]
+        return self._blank
+
+    """ Id of the tape with a symbol written at a position, the same tape if the symbol was already there """
+    def _write(self, tape, position, symbol):
+        first, segments = self._tapes[tape]
+        index = (position >> SEGMENT_BITS) - first
+        cells = self._segments[segments[index] if 0 <= index < len(segments) else 0]
+        offset = position & (SEGMENT - 1)
+        if cells[offset] == symbol:
+            return tape
+        segment = self._intern_segment(cells[:offset] + (symbol,) + cells[offset + 1:])
+
+        # Segments that did not exist are blank, the tape grows to the side of the new one
+        if not segments:
+            return self._intern_tape(position >> SEGMENT_BITS, (segment,))
+        if index < 0:
+            return self._intern_tape(first + index, (segment,) + (0,) * (-index - 1) + segments)
+        if index >= len(segments):
+            return self._intern_tape(first, segments + (0,) * (index - len(segments)) + (segment,))
+        return self._intern_tape(first, segments[:index] + (segment,) + segments[index + 1:])
+
+    """ Configuration of a string just loaded on the machine """
+    def _initial_configuration(self):
+        tapes = self._machine._tapes if self._multitape else [self._machine._tape]
+        tape_ids = []
+        for tape in tapes:
+            tape_id = 0
+            first, symbols = tape.contents()
+            for offset, symbol in enumerate(symbols):
+                tape_id = self._write(tape_id, first + offset, symbol)
+            tape_ids.append(tape_id)
+        return (self._machine._initial_state, (0,) * self._number_of_tapes, tuple(tape_ids))
+
+    """ Every distinct (next state, writes, moves) of the rules that match a (state, symbols) key, in the order of
+        the file. They are found once for each key """
+    def _actions(self, key):
+        actions = self._rules.get(key)
+        if actions is None:
+            rules = list(self._exact_rules.get(key, ()))
+            rules.extend(rule for read_symbols, rule in self._wildcard_rules.get(key[0], ())
+                         if all(read is None or read == symbol for read, symbol in zip(read_symbols, key[1])))
+            actions = self._rules[key] = []
+            for rule_index, next_state, writes, moves in sorted(rules, key=lambda rule: rule[0]):
+                if (next_state, writes, moves) not in actions:
+                    actions.append((next_state, writes, moves))
+        return actions
+
+    """ Yields the outcome of each branch of a configuration after its step number step: a FinalState when
+        the branch stops, or the configuration it reaches """
+    def _successors(self, configuration, step):
+        state, heads, tapes = configuration
+        actions = self._actions((state, tuple(self._read(tape, head) for tape, head in zip(tapes, heads))))
+
+        # No rule was found from this state to another, reject
+        if not actions:
+            yield None
+            return
+        for next_state, writes, moves in actions:
+            # A None write is a wildcard that keeps the symbol
+            next_tapes = tuple(tape if write is None else self._write(tape, head, write)
+                               for tape, head, write in zip(tapes, heads, writes))
+            next_heads = tuple(head + move for head, move in zip(heads, moves))
+
+            # The same checks as _verify of the deterministic machines
+            if next_state == self._accept_state:
+                yield self.FinalState.ACCEPTED
+            elif next_state == self._reject_state:
+                yield self.FinalState.REJECTED
+            elif next_heads[0] == self._max_length:
+                yield self.FinalState.UNDECIDABLE
+            elif step >= self._max_steps:
+                yield self.FinalState.REJECTED
+            else:
+                yield (next_state, next_heads, next_tapes)
+
+    """ Breadth first search. Returns the final state and the steps: the first accepting step, or the last
+        step of any branch """
+    def _breadth_first(self, initial):
+        frontier = [initial]
+        visited = {initial}
+        steps = 0 # Steps taken by the configurations of the frontier
+        last = 0 # Last step of the branches that ended
+        undecidable = False
+        peak = 1
+        while frontier:
+            next_frontier = []
+            for configuration in frontier:
+                for outcome in self._successors(configuration, steps):
+                    # A branch that found no rule did not take the step, the others did
+                    if outcome is None:
+                        last = max(last, steps)
+                        continue
+                    last = max(last, steps + 1)
+                    if outcome is self.FinalState.ACCEPTED:
+                        self._count(visited, max(peak, len(next_frontier)))
+                        return outcome, steps + 1
+                    elif outcome is self.FinalState.UNDECIDABLE:
+                        undecidable = True
+                    elif outcome is not self.FinalState.REJECTED and outcome not in visited:
+                        visited.add(outcome)
+                        next_frontier.append(outcome)
+            peak = max(peak, len(next_frontier))
+            frontier = next_frontier
+            steps += 1
+        self._count(visited, peak)
+        return (self.FinalState.UNDECIDABLE if undecidable else self.FinalState.REJECTED), last
+
+    """ Iterative deepening search, with the limit of steps doubled until no branch reaches it """
+    def _iterative_deepening(self, initial):
+        limit = 1
+        peak = 1
+        while True:
+            visited = {initial: 0} # Configuration -> fewest steps it was reached with in this round
+            stack = [(initial, 0)]
+            cut = False
+            undecidable = False
+            last = 0 # Last step of the branches that ended
+            while stack:
+                configuration, depth = stack.pop()
+                if depth == limit:
+                    cut = True
+                    continue
+                for outcome in self._successors(configuration, depth):
+                    # A branch that found no rule did not take the step, the others did
+                    if outcome is None:
+                        last = max(last, depth)
+                        continue
+                    last = max(last, depth + 1)
+                    if outcome is self.FinalState.ACCEPTED:
+                        self._count(visited, peak)
+                        return outcome, depth + 1
+                    elif outcome is self.FinalState.UNDECIDABLE:
+                        undecidable = True
+                    elif outcome is not self.FinalState.REJECTED and visited.get(outcome, limit + 1) > depth + 1:
+                        visited[outcome] = depth + 1
+                        stack.append((outcome, depth + 1))
+                peak = max(peak, len(stack))
+            if not cut:
+                self._count(visited, peak)
+                return (self.FinalState.UNDECIDABLE if undecidable else self.FinalState.REJECTED), last
+            limit *= 2
+
+    """ Keeps the size of the search that ended """
+    def _count(self, visited, peak):
+        self.stats = {'configurations': len(visited),
+                      'frontier': peak,
+                      'segments': len(self._segments),
+                      'tapes': len(self._tapes),
+                      'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+    """Runs a single string. Returns the verdict that run prints for it and the steps of the search"""
+    def decide(self, initial_string, quiet=True):
+        self.stats = {}
+
+        # Strings that cannot be run are decided without any step
+        result = self._machine._start(initial_string)
+        if result is not None:
+            return result
+
+        self._reset()
+        initial = self._initial_configuration()
+        if self._deepening:
+            reason, steps = self._iterative_deepening(initial)
+        else:
+            reason, steps = self._breadth_first(initial)
+        return self.VERDICTS[reason], steps
+
+    """Runs every string of the machine and prints its verdict, and the size of its search when not quiet"""
+    def run(self, quiet=False, output=sys.stdout):
+        for initial_string in self._machine.pending_strings():
+            verdict, steps = self.decide(initial_string)
+            print(verdict, file=output)
+            if not quiet and self.stats:
+                print(f"  steps: {steps}, configurations: {self.stats['configurations']}, "
+                      f"frontier: {self.stats['frontier']}, segments: {self.stats['segments']}, "
+                      f"tapes: {self.stats['tapes']}, peak memory: {self.stats['peak_memory_kb']} KB", file=output)
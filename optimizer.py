@@ -0,0 +1,212 @@
+########################################################################################################
+#
+#	optimizer.py -- Removes the rules and states a loaded Turing Machine can never use
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Optimizations
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Optimizations
+#
+#   The pass works on the index of the transitions of a loaded machine, (state, symbols) -> action, on
+#   the rules with wildcards of each state (multitape machines) and on Q:
+#
+#       overlapping rules  : rules that match the same state and symbols as an earlier rule, which make the
+#                            machine nondeterministic. Only the first one is ever applied, the rules that
+#                            never are are reported as shadowed
+#       unreachable states : states no rule leads to from q_0, their rules are removed
+#       halting states     : the rules of q_accept and q_reject are removed, the machine stops as soon as
+#                            it enters them (unless one of them is q_0)
+#       equivalent states  : states that, for every symbols, have the same rule (or no rule) writing and
+#                            moving the same way to equivalent states are merged into the first of them.
+#                            They are found by partition refinement, as in the minimization of a DFA
+#
+#   The optimized machine does the same steps as the original one, so it gives the same verdicts (and
+#   steps). Its index and Q are smaller, and so are the tables of the compiled engines built from them.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The rules in δ (the lines of the file) are kept as they are, the index still points to them by
+#       their position, so the steps recorded or profiled name the rules of the file.
+#   b. The steps printed by an optimized machine show the state each merged state was merged into.
+#   c. q_accept and q_reject are never merged with other states, entering them stops the machine.
+#   d. The wildcard rules are not expanded. They are compared by their symbols, in the order of the file,
+#       so two states with the same wildcard rules in another order are not merged. A wildcard rule is
+#       reported as never applied when a single earlier rule matches everything it matches.
+#
+
+########################################################################################################
+# Functions. optimize() changes the machine in place and returns what it removed, summary() describes it.
+#
+
+""" Rules with wildcards of each state, only the multitape machines have them """
+def _wildcard_rules(machine):
+    return getattr(machine, '_wildcard_rules', {})
+
+""" Number of rules of the index and rules with wildcards """
+def _count_rules(machine):
+    return len(machine._transition_index) + sum(len(rules) for rules in _wildcard_rules(machine).values())
+
+""" States of Q and states of the rules, in the order they first appear """
+def _all_states(machine):
+    states = dict.fromkeys(machine._states)
+    rules = list(machine._transition_index.items())
+    rules.extend(((state, read_symbols), action) for state, wildcard_rules in _wildcard_rules(machine).items()
+                 for read_symbols, action in wildcard_rules)
+    for (state, read_symbols), action in rules:
+        states.setdefault(state)
+        states.setdefault(action[1])
+    return list(states)
+
+""" Whether the symbols read by two rules, with None for the wildcards, can match the same symbols """
+def _intersect(symbols, other):
+    return all(symbol is None or other_symbol is None or symbol == other_symbol
+               for symbol, other_symbol in zip(symbols, other))
+
+""" Whether the symbols read by a rule match everything the symbols read by another rule match """
+def _covers(symbols, other):
+    return all(symbol is None or symbol == other_symbol for symbol, other_symbol in zip(symbols, other))
+
+""" Pairs (earlier rule, later rule) that match the same state and symbols, and the rules never applied """
+def _overlapping_rules(machine):
+    earlier_rules = {} # State -> (symbols, rule index) of its wildcard rules and the first rule of each key
+    first_rule = {} # Key -> index of the first rule that matches it
+    overlapping = set()
+    covered = set() # Wildcard rules that an earlier rule matches everything of
+    for (state, read_symbols), action in machine._decoded_rules():
+        symbols = read_symbols if isinstance(read_symbols, tuple) else (read_symbols,)
+        earlier = first_rule.get((state, read_symbols))
+        if earlier is not None:
+            overlapping.add((earlier, action[0]))
+            continue
+        for other, other_index in earlier_rules.get(state, ()):
+            if None in other or None in symbols:
+                if _intersect(other, symbols):
+                    overlapping.add((other_index, action[0]))
+                if None in symbols and _covers(other, symbols):
+                    covered.add(action[0])
+        if None not in symbols:
+            first_rule[(state, read_symbols)] = action[0]
+        earlier_rules.setdefault(state, []).append((symbols, action[0]))
+
+    applied = {action[0] for action in machine._transition_index.values()}
+    applied.update(action[0] for rules in _wildcard_rules(machine).values() for read_symbols, action in rules
+                   if action[0] not in covered)
+    shadowed = sorted({later for earlier, later in overlapping if later not in applied})
+    return sorted(overlapping), shadowed
+
+""" States reached from q_0. The halting states are reached but their rules are never followed """
+def _reachable_states(machine, rules_of):
+    halting = {machine._accept_state, machine._reject_state}
+    reachable = {machine._initial_state}
+    pending = [machine._initial_state]
+    while pending:
+        state = pending.pop()
+        if state in halting and state != machine._initial_state:
+            continue
+        for read_symbols, action in rules_of.get(state, ()):
+            if action[1] not in reachable:
+                reachable.add(action[1])
+                pending.append(action[1])
+    return reachable
+
+""" Class of each running state after partition refinement: states with the same class do the same steps. The
+    wildcard rules of a state are also compared in their order, see remark d """
+def _equivalence_classes(machine, rules_of, running, wildcards_of):
+    halting = {machine._accept_state: 'accept', machine._reject_state: 'reject'}
+
+    # Start with a single class and split it until the signatures stop splitting any class
+    classes = {state: 0 for state in running}
+    while True:
+        signatures = {}
+        refined = {}
+        for state in running:
+            signature = (classes[state], frozenset((read_symbols, action[2:], halting.get(action[1], classes.get(action[1])))
+                                                   for read_symbols, action in rules_of.get(state, ())),
+                         tuple(read_symbols for read_symbols, action in wildcards_of.get(state, ())))
+            refined[state] = signatures.setdefault(signature, len(signatures))
+        if len(signatures) == len(set(classes.values())):
+            return refined
+        classes = refined
+
+""" Optimizes the index and Q of a loaded machine in place. Returns a report of what was removed """
+def optimize(machine):
+    states = _all_states(machine)
+    index = machine._transition_index
+    report = {'states_before': len(states), 'rules_before': _count_rules(machine)}
+    report['overlapping'], report['shadowed'] = _overlapping_rules(machine)
+
+    # Wildcard rules of each state that can be applied, in the order of the file
+    shadowed = set(report['shadowed'])
+    wildcards_of = {state: [(read_symbols, action) for read_symbols, action in rules if action[0] not in shadowed]
+                    for state, rules in _wildcard_rules(machine).items()}
+
+    # Rules of each state, in the order of the index and then the wildcard rules
+    rules_of = {}
+    for (state, read_symbols), action in index.items():
+        rules_of.setdefault(state, []).append((read_symbols, action))
+    for state, rules in wildcards_of.items():
+        rules_of.setdefault(state, []).extend(rules)
+
+    halting = {machine._accept_state, machine._reject_state}
+    reachable = _reachable_states(machine, rules_of)
+    report['unreachable'] = [state for state in states if state not in reachable]
+    report['halting_rules'] = sum(len(rules_of.get(state, ())) for state in halting
+                                  if state in reachable and state != machine._initial_state)
+
+    # Only the states whose rules can be followed are merged, each into the first state of its class (q_0
+    # first, so it keeps its name)
+    running = [state for state in states
+               if state in reachable and (state not in halting or state == machine._initial_state)]
+    running.sort(key=lambda state: state != machine._initial_state)
+    classes = _equivalence_classes(machine, rules_of, running, wildcards_of)
+    if machine._initial_state in halting:
+        classes[machine._initial_state] = -1 # Never merged, it is also a halting state
+    representatives = {}
+    for state in running:
+        representatives.setdefault(classes[state], state)
+    merged_into = {state: representatives[classes[state]] for state in running}
+    report['merged'] = {}
+    for state, representative in merged_into.items():
+        if state != representative:
+            report['merged'].setdefault(representative, []).append(state)
+
+    # The new index only has the rules of the representatives, leading to representatives
+    machine._transition_index = {}
+    for (state, read_symbols), action in index.items():
+        if merged_into.get(state) == state:
+            machine._transition_index[(state, read_symbols)] = \
+                (action[0], merged_into.get(action[1], action[1])) + action[2:]
+    if hasattr(machine, '_wildcard_rules'):
+        machine._wildcard_rules = {state: [(read_symbols, (action[0], merged_into.get(action[1], action[1])) + action[2:])
+                                           for read_symbols, action in rules]
+                                   for state, rules in wildcards_of.items() if merged_into.get(state) == state and rules}
+        machine._wildcard_matches = {}
+    machine._states = [state for state in machine._states if merged_into.get(state) == state or state in halting]
+
+    report['states_after'] = len(_all_states(machine))
+    report['rules_after'] = _count_rules(machine)
+    return report
+
+""" Text that describes a report of optimize() """
+def summary(report):
+    lines = [f"Optimized: {report['states_before']} -> {report['states_after']} states, "
+             f"{report['rules_before']} -> {report['rules_after']} rules"]
+    if report['unreachable']:
+        lines.append(f"  Unreachable states removed: {', '.join(report['unreachable'])}")
+    if report['halting_rules']:
+        lines.append(f"  Rules of q_accept and q_reject removed: {report['halting_rules']}")
+    for representative, states in report['merged'].items():
+        lines.append(f"  Merged into {representative}: {', '.join(states)}")
+    if report['overlapping']:
+        lines.append("  Rules of δ (from 1) that match the same state and symbols, only the first one is applied: " +
+                     ', '.join(f"{earlier + 1} and {later + 1}" for earlier, later in report['overlapping']))
+    if report['shadowed']:
+        lines.append(f"  Rules of δ never applied: {', '.join(str(rule + 1) for rule in report['shadowed'])}")
+    return '\n'.join(lines)
@@ -0,0 +1,121 @@
+########################################################################################################
+#
+#	prefix_batch.py -- Runs the strings that share a prefix only once along that prefix
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Prefix sharing
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Prefix sharing
+#
+#   While the head of the input tape has only read the first n cells of the input, the machine does the
+#   same steps for every string that starts with those n symbols. The strings are put in a trie and the
+#   machine runs once for each node, with the prefix of the node on the tape:
+#
+#       - if it stops before its head reaches the cell after the prefix, every string under the node gets
+#         that verdict and those steps;
+#       - if the head is about to read the cell after the prefix, the configuration is saved (see
+#         snapshot() in turing_machine.py) and each child of the node continues from it with its symbol
+#         written in that cell. The strings that end at the node continue with the cell blank, until the
+#         machine stops.
+#
+#   The verdicts are the ones run() prints for each string, in the order of the strings.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The strings with an invalid character, or that do not fit in max_length, are decided as decide()
+#       does, without running.
+#   b. The trie is not built node by node: the strings are sorted, so the strings under a node are a range
+#       of them and the prefix they share is the smallest common prefix of the neighbours in the range.
+#       Only the nodes where the strings differ are visited, the symbols between them are written on the
+#       tape at once. A range of a single string runs to the end.
+#   c. The nodes are visited depth first with a stack of their own, so long strings do not reach the
+#       recursion limit. Only the configurations of the forks still pending are kept.
+#   d. The strings are all loaded before running, the trie needs them all. The steps are never printed.
+#
+
+import sys # Standard output
+
+""" Length of the common prefix of two strings """
+def _common_prefix(first, second):
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+""" Runs the strings on the machine sharing their prefixes. Returns the verdict and the steps of each one,
+    as decide() does, and the steps simulated in total """
+def decide_all(machine, strings):
+    results = []
+    texts = []
+    for initial_string in strings:
+        results.append(machine._start(initial_string))
+        texts.append(''.join(initial_string))
+
+    # The sorted strings that run, the ones under a node of the trie are a range of them. common[i] is the
+    # prefix keys[i] and keys[i + 1] share
+    order = sorted((position for position, result in enumerate(results) if result is None),
+                   key=texts.__getitem__)
+    keys = [texts[position] for position in order]
+    common = [_common_prefix(keys[index], keys[index + 1]) for index in range(len(keys) - 1)]
+
+    """ Length of the prefix the strings of a range share, None if there is a single string (or copies of it) """
+    def frontier(low, high):
+        if high - low == 1:
+            return None
+        shared = min(common[low:high - 1])
+        return None if shared == len(keys[high - 1]) else shared
+
+    # Each entry continues a range of strings from a configuration (None to go on from the current one),
+    # writing their symbols from a position of the input, until the head reaches the frontier (None to run
+    # to the end)
+    simulated = 0
+    machine._start('')
+    pending = [(0, len(keys), None, 0, frontier(0, len(keys)))] if keys else []
+    while pending:
+        low, high, snapshot, position, end = pending.pop()
+        if snapshot is not None:
+            machine.restore(snapshot)
+        for offset, symbol in enumerate(keys[low][position:end]):
+            machine._write_input(position + offset, symbol)
+        start_step = machine._current_step
+        reason = machine._advance_to(end)
+        simulated += machine._current_step - start_step
+
+        # The machine stopped, every string of the range has the same verdict
+        if reason is not None:
+            result = machine.VERDICTS[reason], machine._current_step
+            for index in range(low, high):
+                results[order[index]] = result
+            continue
+
+        # The head is about to read the cell after the prefix: the strings that end there (first, as they
+        # sort before the longer ones) continue with the cell blank, and the rest by their symbol in the cell
+        snapshot = machine.snapshot()
+        while low < high:
+            split = low + 1
+            if len(keys[low]) == end:
+                while split < high and len(keys[split]) == end:
+                    split += 1
+            else:
+                symbol = keys[low][end]
+                while split < high and keys[split][end] == symbol:
+                    split += 1
+            pending.append((low, split, snapshot, end, frontier(low, split)))
+            low = split
+    return results, simulated
+
+""" Runs the strings of the machine sharing their prefixes and prints their verdicts in order """
+def run(machine, output=sys.stdout):
+    results, simulated = decide_all(machine, list(machine.pending_strings()))
+    output.write(''.join(verdict + '\n' for verdict, steps in results))
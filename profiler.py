@@ -0,0 +1,98 @@
+########################################################################################################
+#
+#	profiler.py -- Counts where the steps of a Turing Machine go
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. What is measured
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. What is measured
+#
+#   For every input string run with a profiler the machines count:
+#
+#       rules  : how many steps applied each rule of δ
+#       states : how many steps started in each state
+#       heads  : the leftmost and rightmost position reached by each head
+#       cells  : how many cells of each tape were written (the written span)
+#       time   : how long the string took, in seconds
+#
+#   The profiler adds them up over all the strings and reports them as JSON or as text tables, the rules
+#   and states sorted by their steps and the strings by their time.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The machines run a separate loop when they have a profiler, so the runs without one do not pay
+#       anything for it.
+#   b. The counts of each string are kept in dictionaries by the loop and given to the profiler when the
+#       string ends.
+#   c. The separate loop records the steps (--record) and detects the cycles (-c) as the other loop does,
+#       so profiling a run does not change its verdicts or its trace.
+#
+
+import json # Report as JSON
+from collections import Counter # Steps of each rule and state
+
+########################################################################################################
+# Profiler class. Adds up the counts of the strings run by a machine and reports them.
+#
+class Profiler:
+    """ Steps per rule and per state, head ranges, written cells and time of each string """
+
+    # Constructor method. The transitions are the rules of the machine, to name them in the reports
+    def __init__(self, transitions):
+        self._transitions = transitions
+        self._rules = Counter() # Rule index -> steps
+        self._states = Counter() # State -> steps
+        self._inputs = [] # Counts of each string
+
+    """ Adds the counts of a string """
+    def add(self, initial_string, verdict, steps, seconds, rules, states, head_ranges, cells):
+        self._rules.update(rules)
+        self._states.update(states)
+        self._inputs.append({'input': ''.join(initial_string),
+                             'verdict': verdict,
+                             'steps': steps,
+                             'seconds': seconds,
+                             'head_ranges': [list(head_range) for head_range in head_ranges],
+                             'cells': cells})
+
+    """ Everything that was counted, as a dictionary that can be written as JSON """
+    def report(self):
+        return {'steps': sum(self._rules.values()),
+                'seconds': sum(counts['seconds'] for counts in self._inputs),
+                'rules': [{'index': index, 'rule': ','.join(self._transitions[index]), 'steps': steps}
+                          for index, steps in self._rules.most_common()],
+                'states': [{'state': state, 'steps': steps} for state, steps in self._states.most_common()],
+                'inputs': sorted(self._inputs, key=lambda counts: counts['seconds'], reverse=True)}
+
+    """ Writes the report as JSON """
+    def save_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+    """ The report as text tables. Only the first limit strings, the slowest ones, are listed """
+    def table(self, limit=20):
+        report = self.report()
+        total = max(report['steps'], 1)
+        lines = [f"Steps: {report['steps']}, seconds: {report['seconds']:.6f}", "",
+                 f"{'Rule':<40}{'Steps':>12}{'%':>8}"]
+        for rule in report['rules']:
+            lines.append(f"{rule['rule']:<40}{rule['steps']:>12}{100 * rule['steps'] / total:>7.1f}%")
+
+        lines += ["", f"{'State':<40}{'Steps':>12}{'%':>8}"]
+        for state in report['states']:
+            lines.append(f"{state['state']:<40}{state['steps']:>12}{100 * state['steps'] / total:>7.1f}%")
+
+        lines += ["", f"{'Input':<30}{'Verdict':<14}{'Steps':>10}{'Seconds':>12}  Heads / cells"]
+        for counts in report['inputs'][:limit]:
+            heads = ' '.join(f"[{left},{right}]/{cells}"
+                             for (left, right), cells in zip(counts['head_ranges'], counts['cells']))
+            name = counts['input'] if len(counts['input']) <= 28 else counts['input'][:25] + '...'
+            lines.append(f"{name:<30}{counts['verdict']:<14}{counts['steps']:>10}{counts['seconds']:>12.6f}  {heads}")
+        return '\n'.join(lines)
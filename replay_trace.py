@@ -0,0 +1,63 @@
+#!/bin/python3
+
+from trace_recorder import TraceReader
+from step_tracer import StepTracer
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuilds the configurations recorded in a Turing machine trace file.")
+    parser.add_argument('trace',
+                        metavar='trace_file',
+                        type=str,
+                        help="The trace file written by main.py --record")
+
+    parser.add_argument('run',
+                        nargs='?',
+                        type=int,
+                        help="Number of the string, starting at 0. Without it the recorded strings are listed")
+
+    parser.add_argument('step',
+                        nargs='?',
+                        type=int,
+                        help="Number of steps after which the configuration is shown, the last one by default")
+
+    parser.add_argument('-n',
+                        '--count',
+                        action='store',
+                        type=int,
+                        default=1,
+                        help='Show this many consecutive steps')
+
+    parser.add_argument('--full-tapes',
+                        action='store_true',
+                        help='Show every tape of the multitape steps up to max_length, as main.py --full-tapes')
+    args = parser.parse_args()
+
+    reader = TraceReader(args.trace)
+
+    # List the strings recorded in the file
+    if(args.run == None):
+        for run, (initial_string, verdict, steps) in enumerate(reader.runs):
+            print(f"{run}: {initial_string} -- {verdict}, {steps} steps")
+        return
+
+    initial_string, verdict, steps = reader.runs[args.run]
+    first_step = steps if args.step == None else args.step
+    tracer = StepTracer(full_tapes=args.full_tapes)
+    for step in range(first_step, min(first_step + args.count, steps + 1)):
+        state, heads, tapes = reader.configuration(args.run, step)
+        windows = []
+        for tape in tapes:
+            leftmost, rightmost = tape.span()
+            windows.append((min(leftmost, 0), tape.window(min(leftmost, 0), rightmost)))
+
+        # Same format as the steps printed while running the machine
+        print(f"Step {step}:")
+        if(reader.multitape):
+            tracer.multitape(state, heads, windows, reader.max_length)
+        else:
+            tracer.single_tape(state, heads[0], *windows[0])
+        tracer.flush()
+
+if __name__=="__main__":
+    main()
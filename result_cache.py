@@ -0,0 +1,162 @@
+########################################################################################################
+#
+#	result_cache.py -- Keeps the verdicts of the strings already run on a machine
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Keys and tiers of the cache
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Keys and tiers of the cache
+#
+#   The verdict and the steps of a string only depend on the definition of the machine and the string, so
+#   they are kept under the key (fingerprint of the machine, string). The fingerprint is a SHA-256 of the
+#   parsed definition: type of machine, number of tapes, max_length, max_steps, Q, Σ, Γ, q_0, q_accept,
+#   q_reject, δ, and whether cycles are detected, since that changes some verdicts.
+#
+#   The cache has two tiers:
+#
+#       memory : the MEMORY_ENTRIES results used last, in an LRU ordered dictionary
+#       disk   : a SQLite database in a local directory, with up to DISK_ENTRIES results. When it is
+#                full, the ones used longest ago are deleted
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The writes to the database (new results and the last use of the ones found) are kept in memory
+#       and done together in a single transaction every WRITE_BATCH results and when the cache is closed.
+#   b. The machine name is not part of the fingerprint, so a renamed copy of a machine shares its results.
+#   c. Only quiet runs use the cache, the runs that print their steps have to simulate them.
+#
+
+import hashlib # Fingerprint of the machines
+import os # Directory of the database
+import sqlite3 # Disk tier
+import time # Time of the last use of each result
+from collections import OrderedDict # Memory tier, in order of use
+
+# Directory used for the database when none is given
+DEFAULT_DIRECTORY = '.tm_cache'
+
+# Attributes of the machines that define what they do, the ones each kind of machine has are hashed
+DEFINITION_FIELDS = ('_number_of_tapes', '_max_length', '_max_steps', '_states', '_input_alphabet', '_tape_alphabet',
+                     '_tapes_alphabet', '_initial_state', '_accept_state', '_reject_state', '_transitions')
+
+""" SHA-256 of the parsed definition of a loaded machine """
+def machine_fingerprint(machine):
+    definition = [type(machine).__name__]
+    for field in DEFINITION_FIELDS:
+        if hasattr(machine, field):
+            definition.append((field, getattr(machine, field)))
+    definition.append(('detect_cycles', machine._cycle_detector is not None))
+    return hashlib.sha256(repr(definition).encode('utf-8')).hexdigest()
+
+########################################################################################################
+# ResultCache class. Two tier cache of (verdict, steps) by machine fingerprint and input string.
+#
+class ResultCache:
+    """ LRU memory tier in front of a size bounded SQLite tier """
+
+    # Results kept in memory
+    MEMORY_ENTRIES = 1 << 16
+
+    # Results kept on disk, the oldest tenth is deleted when there are more
+    DISK_ENTRIES = 1 << 22
+
+    # Results written to the database in each transaction
+    WRITE_BATCH = 1000
+
+    # Constructor method. Opens (or creates) the database in the directory
+    def __init__(self, directory=DEFAULT_DIRECTORY, memory_entries=None, disk_entries=None):
+        self._memory_entries = memory_entries or self.MEMORY_ENTRIES
+        self._disk_entries = disk_entries or self.DISK_ENTRIES
+        self._memory = OrderedDict() # (fingerprint, string) -> (verdict, steps)
+
+        os.makedirs(directory, exist_ok=True)
+        self._database = sqlite3.connect(os.path.join(directory, 'results.sqlite3'))
+        self._database.execute("CREATE TABLE IF NOT EXISTS results (machine TEXT, input TEXT, verdict TEXT, "
+                               "steps INTEGER, used REAL, PRIMARY KEY (machine, input)) WITHOUT ROWID")
+        self._database.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self._stored = self._database.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+        self._new_results = [] # (machine, input, verdict, steps, used) not written yet
+        self._used = [] # (used, machine, input) of the results found on disk, not written yet
+
+    """ Fingerprint of a loaded machine, the first part of the keys of its results """
+    def fingerprint(self, machine):
+        return machine_fingerprint(machine)
+
+    """ Text of a string, the second part of the keys of its results. The strings come as lists of characters,
+        as text or, from a mapped file, as bytes """
+    def key(self, initial_string):
+        if isinstance(initial_string, bytes):
+            return initial_string.decode()
+        return ''.join(initial_string)
+
+    """ Result of a string on the machine with the given fingerprint, None if it is not in the cache """
+    def get(self, fingerprint, initial_string):
+        key = (fingerprint, initial_string)
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            return result
+
+        row = self._database.execute("SELECT verdict, steps FROM results WHERE machine = ? AND input = ?",
+                                     key).fetchone()
+        if row is None:
+            return None
+        self._used.append((time.time(), fingerprint, initial_string))
+        self._remember(key, row)
+        if len(self._used) >= self.WRITE_BATCH:
+            self.flush()
+        return row
+
+    """ Keeps the result of a string on the machine with the given fingerprint """
+    def put(self, fingerprint, initial_string, verdict, steps):
+        self._remember((fingerprint, initial_string), (verdict, steps))
+        self._new_results.append((fingerprint, initial_string, verdict, steps, time.time()))
+        if len(self._new_results) >= self.WRITE_BATCH:
+            self.flush()
+
+    """ Returns the cached result of a string, deciding it with decide and keeping it when it is not there """
+    def decide(self, fingerprint, initial_string, decide):
+        key = self.key(initial_string)
+        result = self.get(fingerprint, key)
+        if result is None:
+            result = decide(initial_string)
+            self.put(fingerprint, key, *result)
+        return result
+
+    """ Adds a result to the memory tier, dropping the one used longest ago if it is full """
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    """ Writes the pending results and uses to the database, deleting the oldest results if it is full """
+    def flush(self):
+        with self._database:
+            if self._used:
+                self._database.executemany("UPDATE results SET used = ? WHERE machine = ? AND input = ?", self._used)
+                self._used = []
+            if self._new_results:
+                self._database.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", self._new_results)
+                self._stored += len(self._new_results)
+                self._new_results = []
+
+            # Delete the tenth used longest ago, and recount since some results could have been replaced
+            if self._stored > self._disk_entries:
+                self._database.execute("DELETE FROM results WHERE (machine, input) IN (SELECT machine, input "
+                                       "FROM results ORDER BY used LIMIT ?)",
+                                       (self._stored - self._disk_entries * 9 // 10,))
+                self._stored = self._database.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    """ Writes what is pending and closes the database """
+    def close(self):
+        self.flush()
+        self._database.close()
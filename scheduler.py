@@ -0,0 +1,99 @@
+########################################################################################################
+#
+#	scheduler.py -- Interleaves the runs of many strings so the short ones finish first
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Scheduling
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Scheduling
+#
+#   run() runs the strings one after the other, so a string that takes max_steps delays every string
+#   behind it. The scheduler keeps up to live strings running at once and gives each one quantum steps in
+#   turn (round robin), so a string that needs s steps finishes within about s * live steps, however long
+#   the strings before it are.
+#
+#   Each verdict is printed as soon as its string finishes, after the position of the string (from 0).
+#   In order, the verdicts are printed as run() prints them, each one as soon as the strings before it
+#   have finished.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Each string runs in a stepper of the machine (see stepper() in turing_machine.py), a generator
+#       that keeps the configuration of the string between its quanta. Switching strings only swaps the
+#       references to that configuration, the tapes are never copied.
+#   b. In order, the verdicts waiting for an earlier string are kept in memory, so no new string is
+#       started more than WINDOW * live strings after the first one still running.
+#   c. The steps are never printed, the steps of the interleaved strings would be mixed.
+#
+
+import sys # Standard output
+from collections import deque # Strings running, in the order of their turns
+
+# Steps each string runs in its turn
+QUANTUM = 1000
+
+# Strings running at the same time
+LIVE = 64
+
+# In order, how many times live strings can start after the first one still running
+WINDOW = 16
+
+########################################################################################################
+# Scheduler class. Runs the strings of a machine interleaved, a quantum of steps at a time.
+#
+class Scheduler:
+    """ Round robin of the steppers of a machine """
+
+    # Constructor method. The machine must be loaded
+    def __init__(self, machine, quantum=None, live=None):
+        self._machine = machine
+        self._quantum = quantum or QUANTUM
+        self._live = live or LIVE
+
+    """ Yields the position, the verdict and the steps of each string as soon as it finishes """
+    def finished(self, strings, ordered=False):
+        strings = enumerate(strings)
+        running = deque() # (position, stepper)
+        waiting = {} # In order, position -> (verdict, steps) of the strings that finished too soon
+        next_position = 0 # In order, position of the next verdict to yield
+        last_started = -1
+
+        while True:
+            # Start strings until there are live of them, and in order not too far ahead of the next verdict
+            while len(running) < self._live and (not ordered or last_started + 1 < next_position + WINDOW * self._live):
+                started = next(strings, None)
+                if started is None:
+                    break
+                last_started, initial_string = started
+                running.append((last_started, self._machine.stepper(initial_string, self._quantum)))
+
+            if not running:
+                return
+
+            # The string in turn runs a quantum, and goes back to the end of the queue if it did not finish
+            position, stepper = running.popleft()
+            result = next(stepper)
+            if result is None:
+                running.append((position, stepper))
+            elif not ordered:
+                yield position, *result
+            else:
+                waiting[position] = result
+                while next_position in waiting:
+                    yield next_position, *waiting.pop(next_position)
+                    next_position += 1
+
+    """ Runs the strings of the machine interleaved and prints their verdicts """
+    def run(self, ordered=False, output=sys.stdout):
+        for position, verdict, steps in self.finished(self._machine.pending_strings(), ordered):
+            if ordered:
+                print(verdict, file=output)
+            else:
+                print(f"{position}: {verdict}", file=output)
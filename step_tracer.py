@@ -0,0 +1,107 @@
+########################################################################################################
+#
+#	step_tracer.py -- Writes the steps of a Turing Machine run
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Format of the steps
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Format of the steps
+#
+#   Each step is written as the symbols of the tape, from the leftmost written cell (or position 0) on,
+#   with the current state right before the symbol under the head:
+#
+#       0  1  q1  1  _
+#
+#   The single tape stops at its first empty cell. The multitape machines write "----STEP----" and then,
+#   for each tape, "Tape: i" and its written symbols, followed by the blanks up to the head when the head
+#   is past them. Full tapes (--full-tapes) are written up to max_length instead, the format of the first
+#   versions of the multitape machine, for the tools that compare the steps with theirs byte by byte.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Only the written window of each tape is formatted, so a step costs the written cells and not
+#       max_length. The blanks of full tapes, up to max_length, are added as a single repeated string.
+#   b. The lines are kept in a buffer and written together when it is full or the string finishes, so the
+#       runs do not call print once per step.
+#   c. A tracer can write only every Nth step, or only the steps that end in some states.
+#
+
+import sys # Standard output
+
+########################################################################################################
+# StepTracer class. Formats the steps of the machines and writes them in blocks.
+#
+class StepTracer:
+    """ Buffered writer of the steps of a run, with filters on the step number and the state """
+
+    # Characters kept in the buffer before writing them
+    BUFFER_SIZE = 1 << 16
+
+    # Constructor method. Writes to output (the standard output when None) every step that is a multiple
+    # of every and, if states is given, ends in one of them. Full tapes are written up to max_length
+    def __init__(self, output=None, every=1, states=None, full_tapes=False):
+        self._output = output
+        self._every = max(every, 1)
+        self._states = set(states) if states is not None else None
+        self._full_tapes = full_tapes
+        self._lines = [] # Lines not written yet
+        self._size = 0 # Characters in _lines
+
+    """ Tells if the step with the given number (starting at 1), which ended in state, is traced """
+    def wants(self, step, state):
+        return step % self._every == 0 and (self._states is None or state in self._states)
+
+    """ Formats the symbols of a tape from position first on, with the state before the one at head """
+    def _format(self, state, head, first, symbols):
+        tokens = [str(symbol) for symbol in symbols]
+        if 0 <= head - first < len(tokens):
+            tokens.insert(head - first, state)
+        return " " + "  ".join(tokens) + " " if tokens else ""
+
+    """ Adds a step of a single tape machine. The symbols start at position first and end at the first None """
+    def single_tape(self, state, head, first, symbols):
+        if None in symbols:
+            symbols = symbols[:symbols.index(None)]
+        self._add(self._format(state, head, first, symbols) + "\n")
+
+    """ Adds a step of a multitape machine. Each window is the first position and the written symbols of a
+        tape, which are followed by blanks up to the head, or up to max_length for full tapes """
+    def multitape(self, state, heads, windows, max_length, blank='_'):
+        lines = ["----STEP----\n"]
+        for tape_index, (first, symbols) in enumerate(windows):
+            lines.append(f"Tape: {tape_index}\n")
+            line = self._format(state, heads[tape_index], first, symbols)
+
+            # The blanks after the window, the head can be among them
+            end = first + len(symbols)
+            if end < max_length:
+                head = heads[tape_index]
+                last = max_length if self._full_tapes else head + 1 # Position after the last blank written
+                if end <= head < max_length:
+                    line += f" {blank} " * (head - end) + f" {state} " + f" {blank} " * (last - head)
+                elif self._full_tapes:
+                    line += f" {blank} " * (max_length - end)
+            lines.append(line + "\n")
+        self._add("".join(lines))
+
+    """ Adds text to the buffer, writing it if it is full """
+    def _add(self, text):
+        self._lines.append(text)
+        self._size += len(text)
+        if self._size >= self.BUFFER_SIZE:
+            self.flush()
+
+    """ Writes the buffered steps """
+    def flush(self):
+        if self._lines:
+            output = self._output or sys.stdout
+            output.write("".join(self._lines))
+            self._lines = []
+            self._size = 0
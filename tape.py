@@ -0,0 +1,236 @@
+########################################################################################################
+#
+#	tape.py -- Provides the tape used by the Turing Machines
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Tape used in this implementation
+#   2. Blocks of tapes
+#   3. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Tape used in this implementation
+#
+#   The tape is infinite in both directions [p.177]: every position that was never written holds the
+#   blank symbol. Positions are integers, 0 is where the input starts and negative positions are to its
+#   left.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Blocks of tapes
+#
+#   The compiled multitape machines can keep all their tapes in a TapeBlock instead: a single bytearray of
+#   symbol ids with a row of the same width for each tape, one after another. A head is the index of its
+#   cell in the whole block, so reading the symbols under every head is one pass over a list of indexes:
+#
+#       index of position p of tape t = t * width + origin + p
+#
+#   The first and last cells of each row are guard cells holding GUARD, which no symbol id uses. A head
+#   that reaches a guard cell left the cells of its row, and the block grows.
+#
+#-------------------------------------------------------------------------------------------------------
+#   3. Implementation remarks
+#   a. The cells are stored in a list (or a bytearray for compact tapes) that grows on demand, doubling
+#       its size towards the side that ran out of space. _origin is the index in the list of position 0.
+#   b. The tape remembers the leftmost and rightmost positions written since the last reset, so resetting
+#       it only blanks that span instead of rebuilding the whole tape. An empty span is (0, -1), so once
+#       something is written the span always includes position 0, where the input starts.
+#   c. A snapshot only holds the written span and its symbols without the blanks at its ends, so its size
+#       does not depend on how much the tape grew.
+#   d. A block is allocated again for each input, already blank (the symbol 0), instead of blanking what
+#       the last one wrote. It grows by its width on both sides of every row at once, so the heads keep
+#       the same distance to each other and are moved by the same offset in each row.
+#
+
+########################################################################################################
+# Tape class. Two-way infinite tape that grows on demand and tracks the span of written cells.
+#
+class Tape:
+    """ Two-way infinite tape of a Turing machine """
+
+    # Number of cells allocated when the tape is created
+    INITIAL_CAPACITY = 64
+
+    # Constructor method. The blank is what the never written cells hold
+    def __init__(self, blank, compact=False):
+        self._blank = blank
+        self._compact = compact # Compact tapes hold small integers on a bytearray
+        self._cells = self._new_cells(self.INITIAL_CAPACITY)
+        self._origin = 0 # Index in _cells of position 0
+        self._leftmost = 0 # Leftmost position written since the last reset
+        self._rightmost = -1 # Rightmost position written since the last reset, empty if < _leftmost
+
+    """ Creates a block of blank cells """
+    def _new_cells(self, size):
+        if self._compact:
+            return bytearray([self._blank]) * size
+        return [self._blank] * size
+
+    """ Reads the symbol at a position, blank if it was never written """
+    def __getitem__(self, position):
+        index = position + self._origin
+        if index >= 0:
+            try:
+                return self._cells[index]
+            except IndexError:
+                pass
+        return self._blank
+
+    """ Writes a symbol at a position, growing the tape if needed """
+    def __setitem__(self, position, symbol):
+        index = position + self._origin
+        if index < 0 or index >= len(self._cells):
+            self.reserve(position, position)
+            index = position + self._origin
+        self._cells[index] = symbol
+
+        # Track the span that was written, it always starts around position 0
+        if position < self._leftmost:
+            self._leftmost = position
+        if position > self._rightmost:
+            self._rightmost = position
+
+    """ Makes sure the positions from left to right have cells, doubling the tape as needed """
+    def reserve(self, left, right):
+        # Grow to the left, moving the origin
+        if left + self._origin < 0:
+            missing = -(left + self._origin)
+            extra = max(missing, len(self._cells))
+            self._cells[0:0] = self._new_cells(extra)
+            self._origin += extra
+
+        # Grow to the right
+        if right + self._origin >= len(self._cells):
+            missing = right + self._origin - len(self._cells) + 1
+            self._cells.extend(self._new_cells(max(missing, len(self._cells))))
+
+    """ Blanks the written span and leaves the tape empty """
+    def reset(self):
+        if self._leftmost <= self._rightmost:
+            start = self._leftmost + self._origin
+            end = self._rightmost + self._origin + 1
+            self._cells[start:end] = self._new_cells(end - start)
+        self._leftmost = 0
+        self._rightmost = -1
+
+    """ Resets the tape and writes the symbols from position 0 on """
+    def load(self, symbols):
+        self.reset()
+        if len(symbols) > 0:
+            self.reserve(0, len(symbols) - 1)
+            self._cells[self._origin:self._origin + len(symbols)] = symbols
+            self._leftmost = 0
+            self._rightmost = len(symbols) - 1
+
+    """ Marks the positions from left to right as written, for code that writes on the cells directly """
+    def touch(self, left, right):
+        self._leftmost = min(self._leftmost, left)
+        self._rightmost = max(self._rightmost, right)
+
+    """ Marks the span of the non blank cells as written, for code that writes on the cells directly """
+    def touch_nonblank(self):
+        if self._compact:
+            # Strip the blank bytes from both ends to find the first and last non blank cells
+            blank = bytes([self._blank])
+            right = len(self._cells.rstrip(blank)) - 1
+            if right >= 0:
+                left = len(self._cells) - len(self._cells.lstrip(blank))
+                self.touch(left - self._origin, right - self._origin)
+        else:
+            written = [index for index, symbol in enumerate(self._cells) if symbol != self._blank]
+            if written:
+                self.touch(written[0] - self._origin, written[-1] - self._origin)
+
+    """ Leftmost and rightmost written positions, the right one is smaller if nothing was written """
+    def span(self):
+        return self._leftmost, self._rightmost
+
+    """ First position and symbols of the written span, without the blanks at its ends """
+    def contents(self):
+        start = self._leftmost + self._origin
+        end = self._rightmost + self._origin + 1
+        while start < end and self._cells[start] == self._blank:
+            start += 1
+        while end > start and self._cells[end - 1] == self._blank:
+            end -= 1
+        if start == end:
+            return 0, ()
+        return start - self._origin, tuple(self._cells[start:end])
+
+    """ Symbols from position left to position right, both included """
+    def window(self, left, right):
+        start, end = left + self._origin, right + self._origin + 1
+        if start >= 0 and end <= len(self._cells):
+            return list(self._cells[start:end])
+        return [self[position] for position in range(left, right + 1)]
+
+    """ Written span of the tape and its symbols, to be set back by restore """
+    def snapshot(self):
+        return (self._leftmost, self._rightmost) + self.contents()
+
+    """ Sets back the cells and the written span of a snapshot, every other cell is blank """
+    def restore(self, snapshot):
+        leftmost, rightmost, first, symbols = snapshot
+        self.reset()
+        if leftmost <= rightmost:
+            self.reserve(leftmost, rightmost)
+        if len(symbols) > 0:
+            self.reserve(first, first + len(symbols) - 1)
+            self._cells[first + self._origin:first + self._origin + len(symbols)] = symbols
+        self._leftmost = leftmost
+        self._rightmost = rightmost
+
+########################################################################################################
+# TapeBlock class. Tapes of symbol ids in rows of a single bytearray, see section 2.
+#
+class TapeBlock:
+    """ Two-way infinite tapes of symbol ids stored in one contiguous block """
+
+    # Symbol id of the guard cells at both ends of each row
+    GUARD = 255
+
+    # Width of the rows when the block is created
+    INITIAL_WIDTH = 64
+
+    # Constructor method. The symbol 0 is the blank
+    def __init__(self, number_of_tapes):
+        self._number_of_tapes = number_of_tapes
+        self.cells = bytearray() # Every row, one after another
+        self.width = 0 # Cells of each row, with its two guard cells
+        self.origin = 0 # Index in each row of position 0
+
+    """ Places the guard cells at both ends of each row """
+    def _guard(self):
+        for tape_index in range(self._number_of_tapes):
+            self.cells[tape_index * self.width] = self.GUARD
+            self.cells[(tape_index + 1) * self.width - 1] = self.GUARD
+
+    """ Blanks every tape and writes the symbols on the first one from position 0. Returns the index of
+        position 0 of each tape, where the heads start """
+    def load(self, symbols):
+        self.width = max(self.INITIAL_WIDTH, 2 * len(symbols) + 4)
+        self.origin = self.width // 4
+        self.cells = bytearray(self._number_of_tapes * self.width)
+        self._guard()
+        self.cells[self.origin:self.origin + len(symbols)] = symbols
+        return [self.index(tape_index, 0) for tape_index in range(self._number_of_tapes)]
+
+    """ Index in the block of a position of a tape """
+    def index(self, tape_index, position):
+        return tape_index * self.width + self.origin + position
+
+    """ Grows every row by its width on both sides. Returns the indexes of the heads in the new block """
+    def grow(self, heads):
+        width = 3 * self.width
+        cells = bytearray(self._number_of_tapes * width)
+        for tape_index in range(self._number_of_tapes):
+            start = tape_index * self.width
+            cells[tape_index * width + self.width + 1:tape_index * width + 2 * self.width - 1] = \
+                self.cells[start + 1:start + self.width - 1]
+        heads = [head + tape_index * (width - self.width) + self.width for tape_index, head in enumerate(heads)]
+        self.cells, self.width, self.origin = cells, width, self.origin + self.width
+        self._guard()
+        return heads
@@ -0,0 +1,47 @@
+########################################################################################################
+#
+#	conftest.py -- Shared fixtures of the tests
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   The tests import the modules from the root of the repository and run main.py as the users do. Each
+#   test gets its own directory for the files the runs write (precompiled definitions, indexes of mapped
+#   strings, caches), so nothing is written next to the sample configurations.
+#
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sample configurations of datos_prueba: configuration, strings and type of machine
+SAMPLES = [('mttarea2.txt', 'mttarea2-prueba.txt', 'mtd'),
+           ('mttarea2.txt', 'mttarea2-acepta.txt', 'mtd'),
+           ('mttarea2.txt', 'mttarea2-rechaza.txt', 'mtd'),
+           ('increment.txt', 'increment_vals.txt', 'mtd'),
+           ('mtkcintas-palin.txt', 'mtkcintas-palin-strings.txt', 'mtkc')]
+
+""" Copy of a file of datos_prueba in a directory, so the files written next to it stay there """
+def sample_copy(directory, name):
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        shutil.copy(os.path.join(ROOT, 'datos_prueba', name), path)
+    return path
+
+""" Runs main.py with some arguments and returns the lines it prints """
+@pytest.fixture
+def run_main(tmp_path):
+    def run(*arguments):
+        environment = dict(os.environ, XDG_CACHE_HOME=str(tmp_path / 'cache'))
+        result = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), *map(str, arguments)],
+                                capture_output=True, text=True, env=environment, cwd=tmp_path)
+        assert result.returncode == 0, result.stderr
+        return result.stdout.splitlines()
+    return run
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+import workloads
+from benchmark import measure, regressions
+from conftest import ROOT
+
+""" Measures of a pair, as benchmark.py saves them """
+def result(relative_speed, verdicts='v', workload='w'):
+    return {'relative_speed': relative_speed, 'verdicts': verdicts, 'workload': workload}
+
+def test_relative_speeds_are_compared():
+    baseline = {'scale': 1, 'results': {'a/compiled': result(8), 'a/generated': result(8)}}
+    found, skipped = regressions({'a/compiled': result(6), 'a/generated': result(5)}, baseline, 1.5)
+    assert found == ["a/generated: 5 times the interpreted engine, the baseline is 8 times"]
+    assert skipped == []
+
+def test_changed_verdicts_are_regressions():
+    baseline = {'scale': 1, 'results': {'a/interpreted': result(1)}}
+    found, skipped = regressions({'a/interpreted': result(1, verdicts='x')}, baseline, 1.5)
+    assert found == ["a/interpreted: the verdicts changed"]
+
+def test_changed_workloads_are_not_compared():
+    baseline = {'scale': 1, 'results': {'a/compiled': result(8)}}
+    found, skipped = regressions({'a/compiled': result(1, verdicts='x', workload='y')}, baseline, 1.5)
+    assert found == []
+    assert skipped == ["a/compiled: the workload changed since the baseline"]
+
+def test_measures_match_the_baseline_workloads(tmp_path):
+    with open(os.path.join(ROOT, 'benchmark_baseline.json')) as f:
+        baseline = json.load(f)
+    suite = {workload.name: workload for workload in workloads.suite(str(tmp_path), baseline['scale'])}
+    measured = measure(suite['increment-64'], 'compiled', repeats=1)
+    expected = baseline['results']['increment-64/compiled']
+    assert (measured['workload'], measured['verdicts']) == (expected['workload'], expected['verdicts'])
+    assert measured['relative_speed'] > 0
+
+def test_baselines_of_another_scale_are_not_compared(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'scale': 1, 'results': {'increment-64/compiled': result(1000)}}))
+    output = subprocess.run([sys.executable, os.path.join(ROOT, 'benchmark.py'), '-w', 'increment-64',
+                             '-e', 'compiled', '--scale', '0.01', '-b', str(baseline)],
+                            capture_output=True, text=True, cwd=tmp_path)
+    assert output.returncode == 0, output.stdout
+    assert output.stdout.splitlines()[-1] == f"{baseline} was measured at scale 1, not 0.01, it is not compared"
@@ -0,0 +1,116 @@
+import array
+import os
+import pickle
+import zlib
+
+import pytest
+
+from batch_runner import build_machine
+from checkpoint import MAGIC, VERSION, Checkpointer
+from result_cache import machine_fingerprint
+from conftest import sample_copy
+
+CONFIG, STRINGS = 'mttarea2.txt', 'mttarea2-prueba.txt'
+
+""" Machine of the sample with its strings loaded """
+def loaded_machine(directory):
+    machine = build_machine(sample_copy(directory, CONFIG))
+    machine.load_initial_strings(sample_copy(directory, STRINGS))
+    return machine
+
+@pytest.fixture
+def interrupted(tmp_path, monkeypatch, capsys):
+    """ Checkpoint file of a run stopped after its third checkpoint, and the verdicts of the whole run """
+    loaded_machine(tmp_path).run(quiet=True)
+    verdicts = capsys.readouterr().out.splitlines()
+
+    save = Checkpointer.save
+    saves = []
+    def save_and_stop(self, machine, initial_string):
+        save(self, machine, initial_string)
+        saves.append(self._index)
+        if len(saves) == 3:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(Checkpointer, 'save', save_and_stop)
+    machine = loaded_machine(tmp_path)
+    machine.checkpoint(str(tmp_path / 'run.ckpt'), 5)
+    with pytest.raises(KeyboardInterrupt):
+        machine.run(quiet=True)
+    capsys.readouterr()
+    monkeypatch.setattr(Checkpointer, 'save', save)
+    return str(tmp_path / 'run.ckpt'), verdicts, saves[-1]
+
+def test_resumed_run_gives_the_same_verdicts(tmp_path, interrupted, capsys):
+    filename, verdicts, index = interrupted
+    machine = loaded_machine(tmp_path)
+    machine.checkpoint(filename, 5, resume=True)
+    machine.run(quiet=True)
+    assert capsys.readouterr().out.splitlines() == verdicts[index:]
+    assert not os.path.exists(filename)
+
+@pytest.mark.parametrize('contents', [b'', MAGIC, MAGIC + bytes([VERSION]), MAGIC + bytes([VERSION]) + b'x\x9c\x00',
+                                      b'TMCX\x01'])
+def test_damaged_checkpoints_are_refused(tmp_path, contents):
+    filename = tmp_path / 'run.ckpt'
+    filename.write_bytes(contents)
+    with pytest.raises(ValueError, match="is not a checkpoint file"):
+        loaded_machine(tmp_path).checkpoint(str(filename), resume=True)
+
+class Command:
+    """ Runs a shell command when it is unpickled """
+    def __init__(self, command):
+        self.command = command
+
+    def __reduce__(self):
+        return os.system, (self.command,)
+
+class BadArray:
+    """ Rebuilds an array from arguments it does not take """
+    def __reduce__(self):
+        return array._array_reconstructor, (1, 2)
+
+""" Checkpoint file of the sample machine holding the fields, as Checkpointer.save writes them """
+def tampered(directory, fields):
+    filename = directory / 'run.ckpt'
+    filename.write_bytes(MAGIC + bytes([VERSION]) + zlib.compress(pickle.dumps(fields)))
+    return str(filename)
+
+def test_checkpoints_cannot_run_code(tmp_path):
+    marker = tmp_path / 'marker'
+    fingerprint = machine_fingerprint(loaded_machine(tmp_path))
+    filename = tampered(tmp_path, {'fingerprint': fingerprint, 'index': 0, 'input': '', 'state': 'q0',
+                                   'step': 0, 'heads': [0], 'tapes': [Command(f"touch {marker}")]})
+    with pytest.raises(ValueError, match="is not a checkpoint file"):
+        loaded_machine(tmp_path).checkpoint(filename, resume=True)
+    assert not marker.exists()
+
+@pytest.mark.parametrize('fields', [{'index': 0}, {'index': 0, 'tapes': BadArray()}, [1, 2]])
+def test_tampered_checkpoints_are_refused(tmp_path, fields):
+    if isinstance(fields, dict):
+        fields['fingerprint'] = machine_fingerprint(loaded_machine(tmp_path))
+    filename = tampered(tmp_path, fields)
+    with pytest.raises(ValueError, match="is not a checkpoint file"):
+        loaded_machine(tmp_path).checkpoint(filename, resume=True)
+
+def test_truncated_checkpoint_is_refused(tmp_path, interrupted):
+    filename, verdicts, index = interrupted
+    with open(filename, 'r+b') as f:
+        f.truncate(os.path.getsize(filename) // 2)
+    with pytest.raises(ValueError, match="is not a checkpoint file"):
+        loaded_machine(tmp_path).checkpoint(filename, resume=True)
+
+@pytest.mark.parametrize('strings', ['mttarea2-acepta.txt', 'increment_vals.txt'])
+def test_checkpoint_of_other_strings_is_reported(tmp_path, interrupted, run_main, strings):
+    filename, verdicts, index = interrupted
+    output = run_main(sample_copy(tmp_path, CONFIG), sample_copy(tmp_path, strings), '-q', '-k', filename, '--resume')
+    assert output[-1].endswith("refer to the README.md")
+    assert os.path.exists(filename)
+
+def test_checkpoint_past_the_last_string_is_kept(tmp_path, interrupted, run_main):
+    filename, verdicts, index = interrupted
+    strings = tmp_path / 'short.txt'
+    with open(sample_copy(tmp_path, STRINGS)) as f:
+        strings.write_text(''.join(f.readlines()[:index]))
+    output = run_main(sample_copy(tmp_path, CONFIG), strings, '-q', '-k', filename, '--resume')
+    assert output[-1].startswith("There are fewer strings")
+    assert os.path.exists(filename)
@@ -0,0 +1,86 @@
+import os
+import pickle
+
+import pytest
+
+import definition_cache
+from batch_runner import build_machine
+from conftest import ROOT, SAMPLES
+from definition_cache import SUFFIX, DefinitionCache, cache_directory
+from input_strings import read_strings
+
+ENGINES = ['interpreted', 'compiled', 'generated']
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    return tmp_path / 'cache' / 'turing_machine'
+
+""" Verdicts of every string of a sample on a machine """
+def verdicts(machine, strings):
+    return [machine.decide(list(string)) for string in read_strings(os.path.join(ROOT, 'datos_prueba', strings))]
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+@pytest.mark.parametrize('engine', ENGINES)
+def test_saved_definitions_give_the_same_verdicts(config, strings, machine_type, engine):
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    parsed = verdicts(build_machine(config, machine_type, engine), strings)
+    saved = verdicts(build_machine(config, machine_type, engine, precompiled=True), strings)
+    loaded = verdicts(build_machine(config, machine_type, engine, precompiled=True), strings)
+    assert parsed == saved == loaded
+
+def test_nothing_is_written_next_to_the_configuration(cache_home):
+    config, _, machine_type = SAMPLES[0]
+    build_machine(os.path.join(ROOT, 'datos_prueba', config), machine_type, 'compiled', precompiled=True)
+    assert not any(name.endswith(SUFFIX) for name in os.listdir(os.path.join(ROOT, 'datos_prueba')))
+    assert [name for name in os.listdir(cache_home) if name.endswith(SUFFIX)]
+    assert os.stat(cache_home).st_mode & 0o777 == 0o700
+
+class Payload:
+    def __reduce__(self):
+        return (os.system, ('touch pwned',))
+
+def test_saved_files_with_code_are_refused(cache_home, tmp_path, monkeypatch):
+    config, strings, machine_type = SAMPLES[0]
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    cache = DefinitionCache(config)
+    with open(cache._saved_filename, 'wb') as f:
+        pickle.dump({'version': definition_cache.VERSION, 'hash': cache._hash, 'payload': Payload()}, f)
+    monkeypatch.chdir(tmp_path)
+    machine = build_machine(config, machine_type, precompiled=True)
+    assert not os.path.exists(tmp_path / 'pwned')
+    assert verdicts(machine, strings) == verdicts(build_machine(config, machine_type), strings)
+
+@pytest.mark.parametrize('contents', [b'', b'\x80\x05garbage', pickle.dumps({'version': definition_cache.VERSION})])
+def test_corrupted_saved_files_are_parsed_again(cache_home, contents):
+    config, strings, machine_type = SAMPLES[4]
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    build_machine(config, machine_type, 'compiled', precompiled=True)
+    for name in os.listdir(cache_home):
+        with open(cache_home / name, 'wb') as f:
+            f.write(contents)
+    machine = build_machine(config, machine_type, 'compiled', precompiled=True)
+    assert verdicts(machine, strings) == verdicts(build_machine(config, machine_type), strings)
+
+def test_saved_tables_without_every_field_are_compiled_again(cache_home):
+    config, strings, machine_type = SAMPLES[0]
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    build_machine(config, machine_type, 'compiled', precompiled=True)
+    [name] = os.listdir(cache_home)
+    with open(cache_home / name, 'rb') as f:
+        saved = pickle.load(f)
+    saved['compiled'].popitem()
+    with open(cache_home / name, 'wb') as f:
+        pickle.dump(saved, f)
+    machine = build_machine(config, machine_type, 'generated', precompiled=True)
+    assert verdicts(machine, strings) == verdicts(build_machine(config, machine_type), strings)
+
+def test_directories_others_can_write_in_are_not_used(cache_home):
+    assert cache_directory() == str(cache_home)
+    os.chmod(cache_home, 0o777)
+    assert cache_directory() is None
+    config, strings, machine_type = SAMPLES[0]
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    machine = build_machine(config, machine_type, 'compiled', precompiled=True)
+    assert os.listdir(cache_home) == []
+    assert verdicts(machine, strings) == verdicts(build_machine(config, machine_type), strings)
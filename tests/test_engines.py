@@ -0,0 +1,64 @@
+import pytest
+
+from batch_runner import build_machine
+from conftest import SAMPLES, sample_copy
+from input_strings import read_strings
+
+ENGINES = ['compiled', 'generated', 'vectorized', 'nondeterministic']
+
+""" Verdicts and steps of some strings on a machine """
+def verdicts(machine, strings):
+    if hasattr(machine, 'decide_batch'):
+        return list(machine.decide_batch([list(string) for string in strings]))
+    return [machine.decide(list(string)) for string in strings]
+
+""" Configuration of a machine that moves its first head once and then accepts, with the given max_length """
+def first_move(machine_type, max_length, move):
+    if machine_type == 'mtd':
+        move = {'r': 'R', 'l': 'L', 's': 'S'}[move]
+        return (f"primero,{max_length},20\nq0,q1\n0,1\n0,1\nq0\nq2,q3\n"
+                f"q0,0,q1,1,{move}\nq0,1,q1,0,{move}\nq0,_,q1,1,{move}\nq1,0,q2,0,S\nq1,1,q2,1,S\nq1,_,q2,_,S\n")
+    return (f"primero,2,{max_length},20\nq0,q1\n0,1\n0,1\n0,1\nq0\nq2,q3\n"
+            f"q0,0,_,q1,1,0,{move},r\nq0,1,_,q1,0,0,{move},r\nq0,_,_,q1,1,0,{move},r\nq1,*,*,q2,*,*,s,s\n")
+
+@pytest.mark.parametrize('machine_type', ['mtd', 'mtkc'])
+@pytest.mark.parametrize('max_length', [-1, 0, 1, 2])
+@pytest.mark.parametrize('move', ['r', 'l', 's'])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_max_length_is_checked_after_every_move(tmp_path, machine_type, max_length, move, engine):
+    if engine == 'vectorized' and machine_type == 'mtkc':
+        pytest.skip("the vectorized engine only runs single tape machines")
+    config = tmp_path / 'primero.txt'
+    config.write_text(first_move(machine_type, max_length, move))
+    strings = ['', '0', '1', '01']
+    expected = verdicts(build_machine(str(config), machine_type), strings)
+    assert verdicts(build_machine(str(config), machine_type, engine), strings) == expected
+
+# Options of main.py that run the strings in another way, every one prints the verdicts of the interpreted run
+OPTIONS = [['-e', 'compiled'], ['-e', 'compiled', '-a'], ['-e', 'generated'], ['-e', 'vectorized'],
+           ['-e', 'nondeterministic'], ['-e', 'nondeterministic', '--deepening'], ['-j', '2'],
+           ['-e', 'compiled', '-j', '2'], ['-s'], ['-M'], ['-c'], ['-i'], ['-i', '--ordered'], ['-P'], ['-O'],
+           ['-e', 'compiled', '-O'], ['-e', 'generated', '--no-precompiled']]
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+@pytest.mark.parametrize('options', OPTIONS, ids=' '.join)
+def test_samples_give_the_same_verdicts_on_every_engine(tmp_path, run_main, config, strings, machine_type, options):
+    if 'vectorized' in options and machine_type == 'mtkc':
+        pytest.skip("the vectorized engine only runs single tape machines")
+    arguments = [sample_copy(tmp_path, config), sample_copy(tmp_path, strings), '-q', '-t', machine_type]
+
+    # The verdicts are the last lines, the streamed and mapped runs do not list the strings before them
+    count = len(list(read_strings(sample_copy(tmp_path, strings))))
+    output = run_main(*arguments, *options)[-count:]
+
+    # Without --ordered the interleaved runs print "position: verdict" as each string finishes
+    if '-i' in options and '--ordered' not in options:
+        output = [verdict for position, verdict in sorted((int(line.split(': ', 1)[0]), line.split(': ', 1)[1])
+                                                          for line in output)]
+    assert output == run_main(*arguments)[-count:]
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+@pytest.mark.parametrize('engine', ['compiled', 'generated'])
+def test_samples_print_the_same_steps_on_every_engine(tmp_path, run_main, config, strings, machine_type, engine):
+    arguments = [sample_copy(tmp_path, config), sample_copy(tmp_path, strings), '-t', machine_type]
+    assert run_main(*arguments, '-e', engine) == run_main(*arguments)
@@ -0,0 +1,62 @@
+import pytest
+
+import mapped_strings
+from conftest import SAMPLES, sample_copy
+from input_strings import read_strings
+from mapped_strings import INDEX_SUFFIX, MappedStrings, strings_at
+
+LINES = ['0110', '', '  101 ', '\t', '1\r', '0_1', '2x', 'á1', '', '1' * 50, '0']
+
+@pytest.fixture
+def strings_file(tmp_path):
+    path = tmp_path / 'strings.txt'
+    path.write_bytes('\n'.join(LINES).encode() + b'\n')
+    return str(path)
+
+def test_same_strings_as_read_strings(strings_file):
+    assert [string.decode() for string in MappedStrings(strings_file)] == list(read_strings(strings_file))
+
+def test_index_is_saved_and_reused(strings_file, monkeypatch):
+    strings = MappedStrings(strings_file)
+    monkeypatch.setattr(MappedStrings, '_build_index', lambda self: pytest.fail("the saved index was not used"))
+    again = MappedStrings(strings_file)
+    assert len(again) == len(strings) == len(list(read_strings(strings_file)))
+
+def test_index_is_rebuilt_when_the_file_changes(strings_file):
+    MappedStrings(strings_file)
+    with open(strings_file, 'ab') as f:
+        f.write(b'1111\n')
+    mapped_strings._maps.pop(strings_file) # The map of this process has the old size
+    assert len(MappedStrings(strings_file)) == len(list(read_strings(strings_file)))
+
+def test_corrupted_index_is_rebuilt(strings_file):
+    MappedStrings(strings_file)
+    with open(strings_file + INDEX_SUFFIX, 'r+b') as f:
+        f.truncate(10)
+    assert len(MappedStrings(strings_file)) == len(list(read_strings(strings_file)))
+
+def test_every_position_is_located(strings_file, monkeypatch):
+    monkeypatch.setattr(mapped_strings, 'STRIDE', 3)
+    strings = MappedStrings(strings_file)
+    expected = [string.encode() for string in read_strings(strings_file)]
+    for position in range(len(expected)):
+        assert strings_at(strings_file, *strings.locate(position), 2) == expected[position:position + 2]
+
+ENGINES = ['interpreted', 'compiled', 'generated', 'vectorized', 'nondeterministic']
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('options', [[], ['-C', 'results'], ['-j', '2']])
+def test_mapped_runs_give_the_same_verdicts(run_main, tmp_path, config, strings, machine_type, engine, options):
+    if engine == 'vectorized' and machine_type == 'mtkc':
+        pytest.skip("the vectorized engine only runs single tape machines")
+    if engine == 'nondeterministic' and '-C' in options:
+        pytest.skip("the nondeterministic engine does not cache verdicts")
+    config, strings = sample_copy(tmp_path, config), sample_copy(tmp_path, strings)
+    arguments = [config, strings, '-t', machine_type, '-q', '-e', engine] + options
+
+    # Streamed runs print the same header, as the strings are not loaded first
+    expected = run_main(*arguments, '-s')
+    assert run_main(*arguments, '-M') == expected
+    if '-C' in options:
+        assert run_main(*arguments, '-M') == expected # Now from the cache
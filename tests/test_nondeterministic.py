@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import batch_runner
+from batch_runner import build_machine
+from conftest import ROOT, SAMPLES, sample_copy
+from input_strings import read_strings
+
+# Guesses where a 1 is followed by another 1: on a 1, q0 either skips it or guesses the next symbol is a 1.
+# The first rule of q0 for 1 only skips, so the deterministic machines never guess and reject every string
+GUESS = """adivina,30,300
+q0,q1,q2
+0,1
+0,1
+q0
+q3,q4
+q0,0,q0,0,R
+q0,1,q0,1,R
+q0,1,q1,1,R
+q1,1,q3,1,R
+"""
+
+@pytest.fixture
+def guess(tmp_path):
+    path = tmp_path / 'adivina.txt'
+    path.write_text(GUESS)
+    return str(path)
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+@pytest.mark.parametrize('deepening', [False, True])
+def test_same_verdicts_as_the_deterministic_machines(config, strings, machine_type, deepening):
+    config = os.path.join(ROOT, 'datos_prueba', config)
+    reference = build_machine(config, machine_type)
+    machine = build_machine(config, machine_type, 'nondeterministic', deepening=deepening)
+    for string in read_strings(os.path.join(ROOT, 'datos_prueba', strings)):
+        assert machine.decide(list(string)) == reference.decide(list(string))
+
+@pytest.mark.parametrize('deepening', [False, True])
+def test_every_branch_is_followed(guess, deepening):
+    machine = build_machine(guess, engine='nondeterministic', deepening=deepening)
+    deterministic = build_machine(guess)
+    assert machine.decide(list('0100110'))[0] == 'Aceptado'
+    assert machine.decide(list('0101010'))[0] == 'Rechazado'
+    assert deterministic.decide(list('0100110'))[0] == 'Rechazado'
+
+def test_workers_search_by_iterative_deepening(guess):
+    batch_runner._init_worker(guess, 'mtd', 'nondeterministic', False, False, False, False, True)
+    assert batch_runner._worker_machine._deepening
+    assert build_machine(guess, engine='nondeterministic', deepening=True)._deepening
+
+def test_parallel_runs_with_deepening(guess, tmp_path, run_main):
+    strings = tmp_path / 'strings.txt'
+    strings.write_text('\n'.join(['0100110', '0101010', '11', '1']) + '\n')
+    serial = run_main(guess, strings, '-q', '-e', 'nondeterministic', '--deepening')
+    parallel = run_main(guess, strings, '-q', '-e', 'nondeterministic', '--deepening', '-j', '2')
+    assert parallel == serial
+    assert serial[-4:] == ['Aceptado', 'Rechazado', 'Aceptado', 'Rechazado']
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from conftest import SAMPLES, sample_copy
+
+# Goes right and left over the same two cells until max_steps
+LOOP = """vaiven,10,100000
+q0,q1
+0
+0
+q0
+q2,q3
+q0,0,q1,0,R
+q1,_,q0,_,L
+"""
+
+# The same machine with a second tape that is never moved, it rejects 00 on its second step
+LOOP_MTKC = """vaiven,2,10,100000
+q0,q1
+0
+0
+0
+q0
+q2,q3
+q0,0,_,q1,0,_,r,s
+q1,_,_,q0,_,_,l,s
+"""
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+def test_profiled_runs_give_the_same_verdicts(tmp_path, run_main, config, strings, machine_type):
+    arguments = (sample_copy(tmp_path, config), sample_copy(tmp_path, strings), '-q', '-t', machine_type)
+    expected = run_main(*arguments)
+    output = run_main(*arguments, '--profile-json', tmp_path / 'profile.json')
+    assert output == expected
+
+    with open(tmp_path / 'profile.json') as f:
+        report = json.load(f)
+    assert report['steps'] == sum(counts['steps'] for counts in report['inputs'])
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+def test_profiled_runs_record_the_same_trace(tmp_path, run_main, config, strings, machine_type):
+    arguments = (sample_copy(tmp_path, config), sample_copy(tmp_path, strings), '-q', '-t', machine_type)
+    expected = run_main(*arguments, '-r', tmp_path / 'expected.trc')
+    assert run_main(*arguments, '-p', '-r', tmp_path / 'profiled.trc')[:len(expected)] == expected
+    assert (tmp_path / 'profiled.trc').read_bytes() == (tmp_path / 'expected.trc').read_bytes()
+
+@pytest.mark.parametrize('config, strings, machine_type', [(LOOP, "0_\n0_0\n", 'mtd'),
+                                                            (LOOP_MTKC, "0\n00\n", 'mtkc')])
+@pytest.mark.parametrize('profile', [('-p',), ('--profile-json', 'profile.json')])
+def test_profiled_runs_detect_cycles(tmp_path, run_main, config, strings, machine_type, profile):
+    (tmp_path / 'vaiven.txt').write_text(config)
+    (tmp_path / 'strings.txt').write_text(strings)
+    arguments = ('vaiven.txt', 'strings.txt', '-q', '-t', machine_type, '-c')
+    expected = run_main(*arguments)
+    assert 'Ciclo' in expected[-2:]
+    assert run_main(*arguments, *profile)[:len(expected)] == expected
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from batch_runner import build_machine
+from conftest import SAMPLES, sample_copy
+from result_cache import ResultCache
+
+""" Sample machine loaded from a copy of its configuration """
+def loaded_machine(directory, config='mttarea2.txt', machine_type='mtd', detect_cycles=False):
+    return build_machine(sample_copy(directory, config), machine_type, detect_cycles=detect_cycles)
+
+def test_fingerprint_is_the_same_for_the_same_definition(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.fingerprint(loaded_machine(tmp_path)) == cache.fingerprint(loaded_machine(tmp_path))
+    cache.close()
+
+def test_fingerprint_changes_with_the_definition(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    fingerprints = {cache.fingerprint(loaded_machine(tmp_path, config, machine_type))
+                    for config, strings, machine_type in SAMPLES}
+    assert len(fingerprints) == len({config for config, strings, machine_type in SAMPLES})
+
+    # A different max_steps is a different machine
+    with open(sample_copy(tmp_path, 'increment.txt')) as f:
+        lines = f.read().split('\n')
+    name, max_length, max_steps = lines[0].split(',')
+    lines[0] = f"{name},{max_length},{int(max_steps) + 1}"
+    with open(tmp_path / 'other.txt', 'w') as f:
+        f.write('\n'.join(lines))
+    assert cache.fingerprint(loaded_machine(tmp_path, 'other.txt')) not in fingerprints
+    cache.close()
+
+def test_fingerprint_changes_with_cycle_detection(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.fingerprint(loaded_machine(tmp_path)) != \
+        cache.fingerprint(loaded_machine(tmp_path, detect_cycles=True))
+    cache.close()
+
+def test_fingerprint_ignores_the_name(tmp_path):
+    with open(sample_copy(tmp_path, 'increment.txt')) as f:
+        lines = f.read().split('\n')
+    lines[0] = 'renamed,' + lines[0].split(',', 1)[1]
+    with open(tmp_path / 'renamed.txt', 'w') as f:
+        f.write('\n'.join(lines))
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.fingerprint(loaded_machine(tmp_path, 'renamed.txt')) == \
+        cache.fingerprint(loaded_machine(tmp_path, 'increment.txt'))
+    cache.close()
+
+@pytest.mark.parametrize('initial_string', [b'0110', ['0', '1', '1', '0'], '0110'])
+def test_key_is_the_text_of_the_string(tmp_path, initial_string):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    assert cache.key(initial_string) == '0110'
+    cache.close()
+
+def test_results_are_kept_on_disk(tmp_path):
+    directory = str(tmp_path / 'cache')
+    cache = ResultCache(directory)
+    cache.put('machine', '0110', 'Aceptado', 12)
+    cache.close()
+
+    decided = []
+    cache = ResultCache(directory)
+    assert cache.decide('machine', b'0110', decided.append) == ('Aceptado', 12)
+    assert cache.get('other machine', '0110') is None
+    assert decided == []
+    cache.close()
+
+def test_memory_tier_keeps_the_results_used_last(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), memory_entries=2)
+    for string in ('0', '1', '2'):
+        cache.put('machine', string, 'Aceptado', 1)
+    assert list(cache._memory) == [('machine', '1'), ('machine', '2')]
+    cache.flush()
+    assert cache.get('machine', '0') == ('Aceptado', 1) # Still on disk, and back in memory
+    assert list(cache._memory) == [('machine', '2'), ('machine', '0')]
+    cache.close()
+
+def test_disk_tier_deletes_the_results_used_longest_ago(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), disk_entries=10)
+    for string in range(20):
+        cache.put('machine', str(string), 'Aceptado', 1)
+    cache.flush()
+    assert cache._stored <= 10
+    assert cache._database.execute("SELECT COUNT(*) FROM results WHERE input = '19'").fetchone()[0] == 1
+    cache.close()
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+def test_cached_runs_give_the_same_verdicts(tmp_path, run_main, config, strings, machine_type):
+    arguments = (sample_copy(tmp_path, config), sample_copy(tmp_path, strings), '-q', '-t', machine_type)
+    expected = run_main(*arguments)
+    assert run_main(*arguments, '-C', tmp_path / 'results') == expected
+    assert os.path.exists(tmp_path / 'results' / 'results.sqlite3')
+    assert run_main(*arguments, '-C', tmp_path / 'results') == expected
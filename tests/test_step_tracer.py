@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from conftest import sample_copy
+from step_tracer import StepTracer
+
+""" Text written by a tracer for a step of a multitape machine """
+def step(windows, heads, max_length, full_tapes):
+    output = io.StringIO()
+    tracer = StepTracer(output, full_tapes=full_tapes)
+    tracer.multitape('q1', heads, windows, max_length)
+    tracer.flush()
+    return output.getvalue()
+
+def test_tapes_end_at_their_last_written_cell():
+    assert step([(0, ['0', '1']), (0, ['1'])], [1, 0], 8, False) == \
+        "----STEP----\nTape: 0\n 0  q1  1 \nTape: 1\n q1  1 \n"
+
+def test_tapes_end_at_the_head_past_their_last_written_cell():
+    assert step([(0, ['0']), (0, [])], [3, 2], 8, False) == \
+        "----STEP----\nTape: 0\n 0  _  _  q1  _ \nTape: 1\n _  _  q1  _ \n"
+
+def test_full_tapes_end_at_max_length():
+    assert step([(0, ['0', '1']), (0, [])], [1, 2], 5, True) == \
+        "----STEP----\nTape: 0\n 0  q1  1  _  _  _ \nTape: 1\n _  _  q1  _  _  _ \n"
+
+def test_steps_do_not_grow_with_max_length():
+    lines = [step([(0, ['0', '1'])], [head], max_length, False) for head in (1, 4)
+             for max_length in (10, 1000000)]
+    assert lines[0] == lines[1] and lines[2] == lines[3]
+
+@pytest.mark.parametrize('engine', ['compiled', 'generated'])
+@pytest.mark.parametrize('full_tapes', [(), ('--full-tapes',)])
+def test_every_engine_prints_the_same_tapes(tmp_path, run_main, engine, full_tapes):
+    arguments = (sample_copy(tmp_path, 'mtkcintas-palin.txt'), sample_copy(tmp_path, 'mtkcintas-palin-strings.txt'),
+                 '-t', 'mtkc', *full_tapes)
+    assert run_main(*arguments, '-e', engine) == run_main(*arguments)
+
+def test_full_tapes_are_printed_up_to_max_length(tmp_path, run_main):
+    arguments = (sample_copy(tmp_path, 'mtkcintas-palin.txt'), sample_copy(tmp_path, 'mtkcintas-palin-strings.txt'),
+                 '-t', 'mtkc')
+    full = run_main(*arguments, '--full-tapes')
+    windows = run_main(*arguments)
+    assert len(full) == len(windows)
+
+    # The sample has max_length 100, its tapes start at position 0 or -1
+    tapes = [line.split() for line in full if line.startswith(' ')]
+    assert tapes and all(len([cell for cell in cells if not cell.startswith('q')]) in (100, 101) for cells in tapes)
+    assert sum(map(len, windows)) < sum(map(len, full)) // 5
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from batch_runner import build_machine
+from conftest import ROOT, SAMPLES
+from input_strings import read_strings
+from trace_recorder import TraceReader
+
+# A multitape machine with a single tape: its cells start with the blank '_'
+ONE_TAPE = """una,1,20,100
+q0,q1
+0,1
+0,1
+q0
+q2,q3
+q0,0,q0,1,r
+q0,1,q0,0,r
+q0,_,q1,_,l
+q1,0,q1,0,l
+q1,1,q1,1,l
+q1,_,q2,_,s
+"""
+
+""" State, heads and cells of a machine after its run, with the blanks from position first to last """
+def final_configuration(machine, first, last):
+    if hasattr(machine, '_tapes'):
+        return machine._current_state, list(machine._head_positions), [tape.window(first, last) for tape in machine._tapes]
+    return machine._current_state, [machine._head_position], [machine._tape.window(first, last)]
+
+""" Records the runs of a configuration and checks the last configuration of each one """
+def check_replay(tmp_path, config, strings, machine_type):
+    machine = build_machine(config, machine_type)
+    recorder = machine.record(str(tmp_path / 'run.trc'), 4)
+    inputs = list(read_strings(strings))
+    results = []
+    for initial_string in inputs:
+        verdict, steps = machine.decide(list(initial_string), quiet=True)
+
+        # The strings that cannot be run are not recorded
+        if verdict != 'Fuera' and not verdict.startswith('Caracter'):
+            results.append((initial_string, verdict, steps, final_configuration(machine, -3, 25)))
+    recorder.close()
+
+    reader = TraceReader(str(tmp_path / 'run.trc'))
+    assert reader.multitape == (machine_type == 'mtkc')
+    assert len(reader.runs) == len(results)
+    for run, (initial_string, verdict, steps, expected) in enumerate(results):
+        assert reader.runs[run] == (initial_string, verdict, steps)
+        state, heads, tapes = reader.configuration(run, steps)
+        assert (state, heads, [tape.window(-3, 25) for tape in tapes]) == expected
+
+@pytest.mark.parametrize('config, strings, machine_type', SAMPLES)
+def test_replay_of_the_samples(tmp_path, config, strings, machine_type):
+    check_replay(tmp_path, os.path.join(ROOT, 'datos_prueba', config), os.path.join(ROOT, 'datos_prueba', strings),
+                 machine_type)
+
+def test_replay_of_a_multitape_machine_with_one_tape(tmp_path):
+    config = tmp_path / 'una.txt'
+    config.write_text(ONE_TAPE)
+    strings = tmp_path / 'strings.txt'
+    strings.write_text('0110\n1\n0001101\n')
+    check_replay(tmp_path, str(config), str(strings), 'mtkc')
+    state, heads, [tape] = TraceReader(str(tmp_path / 'run.trc')).configuration(0, 0)
+    assert tape.window(-1, 4) == list('_0110_')
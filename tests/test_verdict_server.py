@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import signal
+import time
+
+import pytest
+
+from batch_runner import build_machine
+from conftest import ROOT
+from verdict_server import VerdictServer, _expire
+
+# Stays on its first cell until max_steps, which takes minutes
+LOOP = """bucle,10,1000000000
+q0
+0
+0
+q0
+q1,q2
+q0,0,q0,0,S
+"""
+
+@pytest.fixture(params=['interpreted', 'compiled', 'generated'])
+def server(request, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    loop = tmp_path / 'bucle.txt'
+    loop.write_text(LOOP)
+    machines = {'bucle': (str(loop), 'mtd'),
+                'inc': (os.path.join(ROOT, 'datos_prueba', 'increment.txt'), 'mtd')}
+    server = VerdictServer(machines, request.param, jobs=1)
+    yield server
+    server.close()
+
+""" Answers of the server to some requests, each one a dict """
+def answers(server, *requests):
+    async def ask():
+        return await asyncio.gather(*(server._answer(json.dumps(request)) for request in requests))
+    return asyncio.run(ask())
+
+def test_timed_out_requests_free_their_worker(server):
+    [answer] = answers(server, {'id': 1, 'machine': 'bucle', 'input': '0', 'timeout': 0.5})
+    assert 'error' in answer
+
+    # The only worker is free again, or this request would wait for the loop to reach max_steps
+    start = time.perf_counter()
+    [answer] = answers(server, {'id': 2, 'machine': 'inc', 'input': '0100_', 'timeout': 10})
+    assert answer == {'id': 2, 'verdict': 'Aceptado'}
+    assert time.perf_counter() - start < 10
+
+def test_requests_queued_past_their_time_are_not_run(server):
+    timed_out = answers(server, *({'id': index, 'machine': 'bucle', 'input': '0', 'timeout': 0.3}
+                                  for index in range(4)))
+    assert all('error' in answer for answer in timed_out)
+    [answer] = answers(server, {'id': 5, 'machine': 'inc', 'inputs': ['00_', '01_'], 'timeout': 10})
+    assert answer == {'id': 5, 'verdicts': ['Aceptado', 'Rechazado']}
+
+@pytest.mark.parametrize('timeout', ['1', -1, 0, True, None, [1]])
+def test_timeouts_are_validated(server, timeout):
+    request = {'id': 1, 'machine': 'inc', 'input': '0100_', 'timeout': timeout}
+    [answer] = answers(server, request)
+    if timeout is None:
+        assert answer == {'id': 1, 'verdict': 'Aceptado'}
+    else:
+        assert answer == {'id': 1, 'error': "timeout must be a positive number of seconds"}
+
+# Accepts 0 when its second tape is blank, and loops on 1 after marking it, which takes minutes
+MARK = """marca,2,10,1000000000
+q0,q1,q2,q3
+0,1
+0,1
+x
+q0
+q2,q3
+q0,0,_,q2,0,_,s,s
+q0,0,x,q3,0,x,s,s
+q0,1,_,q1,1,x,s,s
+q1,1,x,q1,1,x,s,s
+"""
+
+@pytest.mark.parametrize('engine', ['interpreted', 'compiled', 'generated'])
+def test_timed_out_runs_do_not_change_the_next_verdicts(tmp_path, monkeypatch, engine):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    mark = tmp_path / 'marca.txt'
+    mark.write_text(MARK)
+    server = VerdictServer({'marca': (str(mark), 'mtkc')}, engine, jobs=1)
+    try:
+        [first] = answers(server, {'id': 1, 'machine': 'marca', 'input': '0'})
+        [timed_out] = answers(server, {'id': 2, 'machine': 'marca', 'input': '1', 'timeout': 0.5})
+        [after] = answers(server, {'id': 3, 'machine': 'marca', 'input': '0'})
+    finally:
+        server.close()
+    assert first == {'id': 1, 'verdict': 'Aceptado'}
+    assert 'error' in timed_out
+    assert after == {'id': 3, 'verdict': 'Aceptado'}
+
+@pytest.mark.parametrize('engine, accelerate', [('compiled', False), ('compiled', True), ('generated', False)])
+def test_interrupted_runs_leave_blank_tapes(tmp_path, engine, accelerate):
+    mark = tmp_path / 'marca.txt'
+    mark.write_text(MARK)
+    machine = build_machine(str(mark), 'mtkc', engine, accelerate)
+    handler = signal.signal(signal.SIGALRM, _expire)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.2)
+        with pytest.raises(TimeoutError):
+            machine.decide('1')
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
+    assert machine.decide('0')[0] == 'Aceptado'
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from batch_runner import build_machine
+from turing_machine_multitape import MultitapeTuringMachine
+
+# Goes over the input with a wildcard rule that leaves the second tape as it is. The rule for 1 placed before
+# it marks the 1s with a 0 on the second tape, and the rule for 0 placed after it is never applied
+COPY = """copia,2,30,200
+q0,q1
+0,1
+0,1
+0,1
+q0
+q1,q2
+q0,_,*,q1,_,*,s,s
+q0,1,_,q0,1,0,r,r
+q0,*,_,q0,*,*,r,r
+q0,0,_,q2,0,0,s,s
+"""
+
+STRINGS = ['', '0', '1', '01', '1100', '0101010', '2']
+
+ENGINES = ['interpreted', 'compiled', 'generated', 'nondeterministic']
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'copia.txt'
+    path.write_text(COPY)
+    return str(path)
+
+""" Verdict and tapes of a string on the interpreted machine """
+def run(machine, string):
+    verdict = machine.decide(list(string))
+    return verdict, [tape.window(0, 9) for tape in machine._tapes]
+
+def test_first_matching_rule_wins(config):
+    machine = build_machine(config, 'mtkc')
+    assert run(machine, '0101')[1] == [list('0101______'), list('_0_0______')]
+    assert run(machine, '0')[0][0] == 'Aceptado' # Not q2, the rule for 0 comes after the wildcard rule
+    assert (('q0', ('0', '_')) not in machine._transition_index)
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('optimize', [False, True])
+def test_engines_agree_on_wildcard_rules(config, engine, optimize):
+    if optimize and engine == 'nondeterministic':
+        pytest.skip("The nondeterministic engine is not optimized")
+    reference = build_machine(config, 'mtkc')
+    machine = build_machine(config, 'mtkc', engine, optimize=optimize)
+    for string in STRINGS:
+        assert machine.decide(list(string)) == reference.decide(list(string))
+
+def test_wildcards_are_not_expanded_when_loading(tmp_path):
+    # Four tapes of 200 symbols: every combination the wildcards stand for would be 200^4 keys
+    symbols = ','.join(f"s{symbol}" for symbol in range(200))
+    path = tmp_path / 'ancha.txt'
+    path.write_text(f"ancha,4,50,100\nq0,q1\n{symbols}\n" + f"{symbols}\n" * 4 + "q0\nq1,q2\n"
+                    "q0,_,*,*,*,q1,_,*,*,*,s,s,s,s\n"
+                    "q0,*,*,*,*,q0,*,*,*,*,r,s,s,s\n")
+    start = time.perf_counter()
+    machine = MultitapeTuringMachine()
+    machine.load_machine_definition(str(path))
+    assert time.perf_counter() - start < 1
+    assert machine._transition_index == {}
+    assert machine.decide(['s1', 's2', 's199']) == ('Aceptado', 4)
+    assert machine.decide(['s1'] * 60) == ('Fuera', 0)
+
+def test_wildcard_in_the_alphabets_is_refused(tmp_path, run_main):
+    path = tmp_path / 'estrella.txt'
+    path.write_text(COPY.replace('0,1\n0,1\n0,1\n', '0,1\n0,1,*\n0,1\n'))
+    with pytest.raises(ValueError):
+        MultitapeTuringMachine().load_machine_definition(str(path))
+    strings = tmp_path / 'strings.txt'
+    strings.write_text('01\n')
+    assert run_main(path, strings, '-t', 'mtkc')[-1].endswith("refer to the README.md")
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_wildcard_write_on_a_single_tape(tmp_path, engine):
+    path = tmp_path / 'una.txt'
+    path.write_text("una,1,20,100\nq0,q1\n0,1\n0,1\nq0\nq1,q2\nq0,_,q1,_,s\nq0,*,q0,*,r\n")
+    reference = build_machine(str(path), 'mtkc')
+    machine = build_machine(str(path), 'mtkc', engine)
+    for string in STRINGS:
+        assert machine.decide(list(string)) == reference.decide(list(string))
@@ -0,0 +1,339 @@
+########################################################################################################
+#
+#	trace_recorder.py -- Records the runs of a Turing Machine in a compact binary file
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Format of the trace files
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Format of the trace files
+#
+#   All the numbers are varints (7 bits per byte, the high bit set on every byte but the last), and the
+#   positions, which can be negative, are zigzag encoded first. States and symbols are numbered in the
+#   order they first appear, their names are in the index at the end of the file.
+#
+#       header   : b'TMTR', version, number of tapes, max_length and 1 for the multitape machines (whose
+#                  cells start with the blank '_') or 0 for the single tape ones (whose cells start empty)
+#       keyframe : b'K', step, state, and for each tape its head and written span (first position,
+#                  number of cells and their symbols)
+#       step     : b'D', rule index, next state, the symbol written on each tape (0 keeps the cell,
+#                  n is symbol n - 1) and the move of each head plus one
+#       index    : the names of the states and symbols, and for each string run its input, verdict,
+#                  steps and the (step, file offset) of its keyframes
+#       footer   : offset of the index (8 bytes, little endian) and b'TMTR'
+#
+#   Each string starts with a keyframe of its initial configuration, and a new keyframe is added every
+#   keyframe_interval steps. The configuration at any step is rebuilt from the last keyframe before it,
+#   applying at most keyframe_interval step records, without running the machine.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. A step record takes 3 + 2k bytes for k tapes with less than 128 rules, states and symbols.
+#   b. The recorder follows the heads and state from the step records, it only reads the tapes to
+#       write the keyframes.
+#   c. The file is read with mmap, so seeking to a keyframe does not read what comes before it.
+#   d. The files of version 1 did not have the type of machine, their blank is guessed from the number of
+#       tapes, so the multitape machines of a single tape replay with empty cells instead of blanks.
+#
+
+import mmap # Random access to the trace files
+import struct # Footer with the offset of the index
+from tape import Tape # Tapes of the rebuilt configurations
+
+# First bytes of the trace files, and last bytes of their footer
+MAGIC = b'TMTR'
+VERSION = 2
+
+# Record tags
+KEYFRAME = ord('K')
+STEP = ord('D')
+
+""" Appends a non negative integer as a varint """
+def _put(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+""" Appends a (possibly negative) integer as a zigzag encoded varint """
+def _put_signed(buffer, value):
+    _put(buffer, value * 2 if value >= 0 else -value * 2 - 1)
+
+""" Appends a text, or None, as its length plus one followed by its UTF-8 bytes (0 is None) """
+def _put_text(buffer, text):
+    if text is None:
+        _put(buffer, 0)
+    else:
+        encoded = text.encode('utf-8')
+        _put(buffer, len(encoded) + 1)
+        buffer += encoded
+
+""" Reads a varint at offset. Returns it and the offset after it """
+def _get(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+""" Reads a zigzag encoded varint at offset. Returns it and the offset after it """
+def _get_signed(data, offset):
+    value, offset = _get(data, offset)
+    return (value >> 1) ^ -(value & 1), offset
+
+""" Reads a text written by _put_text. Returns it and the offset after it """
+def _get_text(data, offset):
+    length, offset = _get(data, offset)
+    if length == 0:
+        return None, offset
+    return bytes(data[offset:offset + length - 1]).decode('utf-8'), offset + length - 1
+
+########################################################################################################
+# TraceRecorder class. Writes the steps of the runs of a machine to a trace file.
+#
+class TraceRecorder:
+    """ Writer of the binary trace of the runs of a machine """
+
+    # Steps between two keyframes
+    KEYFRAME_INTERVAL = 1024
+
+    # Bytes kept in memory before writing them to the file
+    BUFFER_SIZE = 1 << 16
+
+    # Constructor method. Creates the trace file for a machine with the given tapes and max_length, multitape
+    # or not
+    def __init__(self, filename, number_of_tapes, max_length, multitape, keyframe_interval=None):
+        self._file = open(filename, 'wb')
+        self._number_of_tapes = number_of_tapes
+        self._keyframe_interval = keyframe_interval or self.KEYFRAME_INTERVAL
+        self._written = 0 # Bytes already in the file
+        self._buffer = bytearray(MAGIC)
+        _put(self._buffer, VERSION)
+        _put(self._buffer, number_of_tapes)
+        _put_signed(self._buffer, max_length)
+        _put(self._buffer, 1 if multitape else 0)
+
+        self._state_ids = {} # Name -> number, in the order they appeared
+        self._symbol_ids = {}
+        self._runs = [] # (input, verdict, steps, keyframes) of each string already recorded
+
+        # The run being recorded
+        self._tapes = None
+        self._heads = None
+        self._state = None
+        self._steps = 0
+        self._keyframes = None
+
+    """ Number of a state, it is given one when it first appears """
+    def _state_id(self, state):
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = self._state_ids[state] = len(self._state_ids)
+        return state_id
+
+    """ Number of a symbol, it is given one when it first appears """
+    def _symbol_id(self, symbol):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self._symbol_ids)
+        return symbol_id
+
+    """ Starts the record of a string, from the initial configuration of the machine """
+    def begin(self, initial_string, state, heads, tapes):
+        self._input = ''.join(initial_string)
+        self._tapes = tapes
+        self._heads = list(heads)
+        self._state = state
+        self._steps = 0
+        self._keyframes = []
+        self._keyframe()
+
+    """ Adds the keyframe of the current configuration """
+    def _keyframe(self):
+        self._keyframes.append((self._steps, self._written + len(self._buffer)))
+        buffer = self._buffer
+        buffer.append(KEYFRAME)
+        _put(buffer, self._steps)
+        _put(buffer, self._state_id(self._state))
+        for head, tape in zip(self._heads, self._tapes):
+            leftmost, rightmost = tape.span()
+            _put_signed(buffer, head)
+            _put_signed(buffer, leftmost)
+            _put(buffer, rightmost - leftmost + 1)
+            for symbol in tape.window(leftmost, rightmost):
+                _put(buffer, self._symbol_id(symbol))
+
+    """ Adds a step: the rule applied, the next state, what was written on each tape (None keeps the cell)
+        and the offset added to each head """
+    def step(self, rule_index, state, writes, moves):
+        buffer = self._buffer
+        buffer.append(STEP)
+        _put(buffer, rule_index)
+        _put(buffer, self._state_id(state))
+        for symbol in writes:
+            _put(buffer, 0 if symbol is None else self._symbol_id(symbol) + 1)
+        for tape_index, move in enumerate(moves):
+            buffer.append(move + 1)
+            self._heads[tape_index] += move
+        self._state = state
+        self._steps += 1
+
+        if self._steps % self._keyframe_interval == 0:
+            self._keyframe()
+        if len(buffer) >= self.BUFFER_SIZE:
+            self._flush()
+
+    """ Ends the record of a string with its verdict """
+    def end(self, verdict):
+        self._runs.append((self._input, verdict, self._steps, self._keyframes))
+        self._tapes = None
+
+    """ Writes the buffered records to the file """
+    def _flush(self):
+        self._file.write(self._buffer)
+        self._written += len(self._buffer)
+        self._buffer = bytearray()
+
+    """ Writes the index and the footer, and closes the file """
+    def close(self):
+        index_offset = self._written + len(self._buffer)
+        buffer = self._buffer
+        for names in (self._state_ids, self._symbol_ids):
+            _put(buffer, len(names))
+            for name in names:
+                _put_text(buffer, name)
+
+        _put(buffer, len(self._runs))
+        for initial_string, verdict, steps, keyframes in self._runs:
+            _put_text(buffer, initial_string)
+            _put_text(buffer, verdict)
+            _put(buffer, steps)
+            _put(buffer, len(keyframes))
+            for step, offset in keyframes:
+                _put(buffer, step)
+                _put(buffer, offset)
+
+        buffer += struct.pack('<Q', index_offset) + MAGIC
+        self._flush()
+        self._file.close()
+
+########################################################################################################
+# TraceReader class. Rebuilds the configurations recorded in a trace file.
+#
+class TraceReader:
+    """ Random access reader of a binary trace file """
+
+    # Constructor method. Opens the file and reads its index
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._data
+        if data[:4] != MAGIC or data[-4:] != MAGIC:
+            raise ValueError(f"{filename} is not a trace file")
+
+        version, offset = _get(data, 4)
+        if version not in (1, VERSION):
+            raise ValueError(f"Unknown version {version} of the trace file {filename}")
+        self.number_of_tapes, offset = _get(data, offset)
+        if version == 1:
+            self.max_length, offset = _get(data, offset)
+            self.multitape = self.number_of_tapes > 1 # See remark d
+        else:
+            self.max_length, offset = _get_signed(data, offset)
+            multitape, offset = _get(data, offset)
+            self.multitape = multitape == 1
+        self.blank = '_' if self.multitape else None # What the cells hold before anything is written
+
+        # Index: names of the states and symbols, and the runs with their keyframes
+        offset = struct.unpack('<Q', data[-12:-4])[0]
+        self._state_names, offset = self._read_names(offset)
+        self._symbol_names, offset = self._read_names(offset)
+
+        self.runs = [] # (input, verdict, steps) of each string
+        self._keyframes = [] # [(step, offset)] of each string
+        number_of_runs, offset = _get(data, offset)
+        for run in range(number_of_runs):
+            initial_string, offset = _get_text(data, offset)
+            verdict, offset = _get_text(data, offset)
+            steps, offset = _get(data, offset)
+            number_of_keyframes, offset = _get(data, offset)
+            keyframes = []
+            for keyframe in range(number_of_keyframes):
+                step, offset = _get(data, offset)
+                keyframe_offset, offset = _get(data, offset)
+                keyframes.append((step, keyframe_offset))
+            self.runs.append((initial_string, verdict, steps))
+            self._keyframes.append(keyframes)
+
+    """ Reads a list of names of the index. Returns it and the offset after it """
+    def _read_names(self, offset):
+        count, offset = _get(self._data, offset)
+        names = []
+        for name in range(count):
+            name, offset = _get_text(self._data, offset)
+            names.append(name)
+        return names, offset
+
+    """ Rebuilds the configuration of a run after the given number of steps. Returns the state, the heads
+        and the tapes """
+    def configuration(self, run, step):
+        steps = self.runs[run][2]
+        if not 0 <= step <= steps:
+            raise ValueError(f"The run {run} has steps from 0 to {steps}")
+
+        # The last keyframe at or before the step
+        keyframes = self._keyframes[run]
+        low, high = 0, len(keyframes)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if keyframes[middle][0] <= step:
+                low = middle
+            else:
+                high = middle
+        current, offset = keyframes[low]
+
+        data = self._data
+        symbol_names = self._symbol_names
+        blank = self.blank
+
+        # Load the keyframe
+        offset += 1
+        current, offset = _get(data, offset)
+        state, offset = _get(data, offset)
+        heads = []
+        tapes = []
+        for tape_index in range(self.number_of_tapes):
+            head, offset = _get_signed(data, offset)
+            first, offset = _get_signed(data, offset)
+            length, offset = _get(data, offset)
+            tape = Tape(blank)
+            for position in range(first, first + length):
+                symbol, offset = _get(data, offset)
+                tape[position] = symbol_names[symbol]
+            tape.touch(first, first + length - 1)
+            heads.append(head)
+            tapes.append(tape)
+
+        # Apply the steps after it, the next keyframe is after the step asked for
+        while current < step:
+            rule_index, offset = _get(data, offset + 1)
+            state, offset = _get(data, offset)
+            for tape_index, tape in enumerate(tapes):
+                symbol, offset = _get(data, offset)
+                if symbol:
+                    tape[heads[tape_index]] = symbol_names[symbol - 1]
+            for tape_index in range(len(tapes)):
+                heads[tape_index] += data[offset] - 1
+                offset += 1
+            current += 1
+        return self._state_names[state], heads, tapes
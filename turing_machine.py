@@ -43,11 +43,16 @@
 #-------------------------------------------------------------------------------------------------------
 #   2. Implementation remarks
 #   a. Current version: There are two TMs: a single taped turing machine and a multitape one. Tapes are 
-#       implemented as as lists and displayed as strings.     
+#       two-way infinite, implemented as lists that grow on demand (see tape.py) and displayed as strings.     
 #
 
 import enum # Allows for the usage of enumerators, which have codes for the possible results after 
             # a turing machine runs through an input String
+from collections import deque # Queue of the strings to run, taken from the front in O(1)
+from tape import Tape # Two-way infinite tape that grows on demand
+from input_strings import read_strings # Reads the strings files lazily, one line at a time
+from step_tracer import StepTracer # Buffered writer of the steps
+import time # Time of the profiled runs
     
 ########################################################################################################
 # TuringMachine class. Contains all the methods in order to create a Turing machine based on a config
@@ -68,12 +73,27 @@ class TuringMachine:
         self._accept_state = "" # q_accept
         self._reject_state = "" # q_reject
         self._transitions = [] # δ
+        self._transition_index = {} # (state, symbol) -> (rule index, next state, write symbol, move)
 
         self._current_state = "" # q_current
         self._current_step = 0 # Index for checking what is the current step and if I have reached 'max_steps'
         self._head_position = 0 # Index for where the head of the MT-tape is currently positioned
-        self._tape = [] # Is the tape of the turing machine that will store all the symbols and write on them
-        self._initial_strings = [] # These are the strings that are given to be run on the TM.
+        self._tape = Tape(None) # Is the tape of the turing machine that will store all the symbols and write on them
+        self._initial_strings = deque() # These are the strings that are given to be run on the TM.
+        self._input_stream = None # Strings still to be read from a file, when they are streamed
+        self._cycle_detector = None # Stops the machine when a configuration repeats, if enabled
+        self._tracer = StepTracer() # Writes the steps of the runs that are not quiet
+        self._recorder = None # Records the steps in a binary trace file, if enabled
+        self._result_cache = None # Verdicts of the strings already run, if enabled
+        self._profiler = None # Counts the steps of each rule and state, if enabled
+        self._checkpointer = None # Saves the configuration every few steps, if enabled
+
+    # Movement codes of the head, already decoded as the offset added to the head position
+    MOVES = {'R': 1, 'L': -1}
+
+    # Attributes set by load_machine_definition, which restore_definition sets back
+    DEFINITION_FIELDS = ('_name', '_max_length', '_max_steps', '_states', '_input_alphabet', '_tape_alphabet',
+                         '_initial_state', '_accept_state', '_reject_state', '_transitions', '_transition_index')
 
     # Using enum class create enumerations
     class FinalState(enum.Enum):
@@ -81,6 +101,14 @@ class TuringMachine:
         REJECTED = 1 # If the machine reaches a reject state or there is no transition from certain state and symbol
         OUTSIDE = 2 # If the input string requires more space than the given max_length
         UNDECIDABLE = 3 # If the input string requires more steps than given max_steps to be decided
+        LOOPING = 4 # If the machine repeats a configuration, so it would never halt
+
+    # Text printed for each final state
+    VERDICTS = {FinalState.ACCEPTED: "Aceptado",
+                FinalState.REJECTED: "Rechazado",
+                FinalState.OUTSIDE: "Fuera",
+                FinalState.UNDECIDABLE: "Indecidible",
+                FinalState.LOOPING: "Ciclo"}
 
     """ Loads the definition of the machine with the format specified on the project instructions """
     def load_machine_definition(self, filename):
@@ -115,29 +143,131 @@ class TuringMachine:
             while(line):
                 self._transitions.append(line.strip().split(','))
                 line = f.readline()
+
+        # Build the index of the transitions so each step is a single lookup
+        self._build_transition_index()
                  
         # Set the start state       
         self._current_state = self._initial_state
 
         # Start the _tape in Null for each symbol
-        self._tape = [None for i in range(self._max_length)]
+        self._tape = Tape(None)
 
         # Always add the blank symbol to the input alphabet
         self._input_alphabet.append('_')
 
+    """ Sets a definition saved from the DEFINITION_FIELDS of a loaded machine, without parsing the file again """
+    def restore_definition(self, definition):
+        for field in self.DEFINITION_FIELDS:
+            setattr(self, field, definition[field])
+        self._current_state = self._initial_state
+        self._tape = Tape(None)
+
+    """ Builds the (state, symbol) index of the transitions with each rule already decoded """
+    def _build_transition_index(self):
+        self._transition_index = {}
+
+        # The first rule for a (state, symbol) pair wins, as it did with the linear search
+        for key, action in self._decoded_rules():
+            self._transition_index.setdefault(key, action)
+
+    """ Yields the (state, symbol) key and the decoded action of every rule, in the order of the file """
+    def _decoded_rules(self):
+        for rule_index, rule in enumerate(self._transitions):
+            # Skip blank or malformed lines, they can never match a configuration
+            if len(rule) < 5:
+                continue
+            yield (rule[0], rule[1]), (rule_index, rule[2], rule[3], self.MOVES.get(rule[-1], 0))
+
+    """ Enables (or disables) stopping the machine as soon as it repeats a configuration """
+    def detect_cycles(self, enabled=True):
+        if enabled:
+            from cycle_detector import CycleDetector # Only imported by the runs that detect cycles
+            self._cycle_detector = CycleDetector(None)
+        else:
+            self._cycle_detector = None
+
+    """ Writes only every Nth step and, if states is given, only the steps that end in one of them. Full tapes
+        are written up to max_length, see step_tracer.py """
+    def trace(self, every=1, states=None, output=None, full_tapes=False):
+        self._tracer = StepTracer(output, every, states, full_tapes)
+
+    """ Records the runs in a binary trace file, with a keyframe every keyframe_interval steps. Returns the
+        recorder, which must be closed after the runs """
+    def record(self, filename, keyframe_interval=None):
+        from trace_recorder import TraceRecorder # Only imported by the runs that record their steps
+        self._recorder = TraceRecorder(filename, 1, self._max_length, False, keyframe_interval)
+        return self._recorder
+
+    """ Takes the verdicts of the quiet runs from a ResultCache, and keeps the new ones in it """
+    def cache_results(self, cache):
+        self._result_cache = cache
+
+    """ Runs the strings with a loop that counts the steps of each rule and state, and returns the profiler
+        that adds them up """
+    def profile(self, enabled=True):
+        if enabled:
+            from profiler import Profiler # Only imported by the runs that are profiled
+            self._profiler = Profiler(self._transitions)
+        else:
+            self._profiler = None
+        return self._profiler
+
+    """ Removes the rules and states that can never be used and merges the equivalent states, see optimizer.py.
+        Returns the report of what was removed """
+    def optimize(self):
+        from optimizer import optimize # Only imported by the machines that are optimized
+        return optimize(self)
+
+    """ Saves the configuration of the runs in a checkpoint file every interval steps. With resume, the run
+        continues from the checkpoint left in the file, if there is one. Returns the checkpointer """
+    def checkpoint(self, filename, interval=None, resume=False):
+        from checkpoint import Checkpointer # Only imported by the runs that save checkpoints
+        self._checkpointer = Checkpointer(filename, self, interval, resume)
+        return self._checkpointer
+
+    """ The configuration of the running string: state, step, heads and the written span of each tape """
+    def snapshot(self):
+        return {'state': self._current_state,
+                'step': self._current_step,
+                'heads': [self._head_position],
+                'tapes': [self._tape.snapshot()]}
+
+    """ Sets back a configuration taken by snapshot """
+    def restore(self, snapshot):
+        self._current_state = snapshot['state']
+        self._current_step = snapshot['step']
+        self._head_position = snapshot['heads'][0]
+        self._tape.restore(snapshot['tapes'][0])
+
     """ Loads the initial strings from a file """
     def load_initial_strings(self, filename):
 
-        # Opens the file that has the strings of a language to see if it is recognized by the TM
-        with open(filename) as f:
-            line = f.readline()
+        # Reads the file that has the strings of a language to see if it is recognized by the TM
+        for stripped_string in read_strings(filename):
+            self._initial_strings.append(list(stripped_string))
 
-            # Read each of the transitions
-            while(line):
-                stripped_string = line.strip()
-                if(len(stripped_string) > 0 ):
-                    self._initial_strings.append(list(stripped_string))
-                line = f.readline()
+    """ Streams the initial strings from a file ('-' is the standard input), reading each one when it is run """
+    def stream_initial_strings(self, filename):
+        self._input_stream = read_strings(filename)
+
+    """ Streams the initial strings from a memory map of the file, see mapped_strings.py. The compiled engines
+        take the bytes of each string, without decode. Returns the mapped strings """
+    def map_initial_strings(self, filename, decode=True):
+        from mapped_strings import MappedStrings # Only imported by the runs that map their strings
+        strings = MappedStrings(filename)
+        self._input_stream = map(bytes.decode, strings) if decode else iter(strings)
+        return strings
+
+    """ Yields the strings to run, the loaded ones first and then the streamed ones """
+    def pending_strings(self):
+        while(len(self._initial_strings) > 0):
+            yield self._initial_strings.popleft()
+
+        # The streamed strings are read one by one, so they are never all in memory
+        if self._input_stream is not None:
+            yield from self._input_stream
+            self._input_stream = None
 
     """Cleans the TM current configuration"""
     def _clean(self):
@@ -145,55 +275,44 @@ class TuringMachine:
         # Make the machine be in the initial state again
         self._current_state = self._initial_state
 
-        # Reset the index and the head position of the tape
-        self._tape = [None for i in range(self._max_length)]
+        # Reset the index and the head position of the tape, only the written cells are blanked
+        self._tape.reset()
         self._current_step = 0
         self._head_position = 0
 
 
     """Fills the tape with the input string"""
-    def _init_tape(self):
-        self._tape = [None for i in range(self._max_length)]
-        initial_string = self._initial_strings.pop(0)
-        return_character = '\0'
-
-        # Checks all the characters in the string
-        for index, character in enumerate(initial_string):
-            # Checks if the character is not in the alphabet
-            if (character not in self._input_alphabet):
-                return character, True # Returns the character and an error
-
-            # The character was valid, add it to the list
-            self._tape[index] = character
-            return_character = character
-            
-        # No error was found, return the character and False
-        return return_character, False
+    def _init_tape(self, initial_string):
+        # Checks all the characters of the string at once, and finds the first one not in the alphabet
+        invalid = set(initial_string).difference(self._input_alphabet)
+        if invalid:
+            character = next(character for character in initial_string if character in invalid)
+            return character, True # Returns the character and an error
+
+        # Every character was valid, add them to the tape
+        self._tape.load(initial_string)
+
+        # No error was found, return the last character and False
+        return (initial_string[-1] if len(initial_string) > 0 else '\0'), False
             
 
     # Method that finds transitions from current state to others.
     def _decode(self):
-        current_values = list([self._current_state, self._tape[self._head_position]])
-        
-        # Search through all the transtitions to check if one is valid from current state and symbol
-        for rule  in self._transitions:
-            # Checks if the current symbol in the tape matches the one in the transition, to check if they match
-            if rule[0] == current_values[0] and rule[1] == current_values[1]:
-                return rule
-        return None
+        # Looks up the decoded rule for the current state and the symbol under the head
+        return self._transition_index.get((self._current_state, self._tape[self._head_position]))
 
 
     """"Applies the rule, moves the TMhead to the left or right"""
     def _execute(self, current_rule, quiet=False):
-        self._current_state = current_rule[2]
-        self._tape[self._head_position] = current_rule[3]
+        rule_index, self._current_state, symbol, move = current_rule
+        self._tape[self._head_position] = symbol
 
-        if(current_rule[-1] == 'R'): # Right
-            self._head_position += 1
-        elif(current_rule[-1] == 'L'): # Left
-            self._head_position -= 1
+        # The move is already the offset for the head: 1 right, -1 left, 0 stay
+        self._head_position += move
+        if self._recorder is not None:
+            self._recorder.step(rule_index, self._current_state, (symbol,), (move,))
         if not quiet:
-            self._print_step()
+            self._trace_step()
     
 
     """Checks whats the final state of the TM"""
@@ -212,62 +331,245 @@ class TuringMachine:
             return False,-1
 
 
-    """Prints the tape with its respective state"""
-    def _print_step(self):
-        output_string = ""
-        for idx, character in enumerate(self._tape):
-            if(character == None):
-                break
-            if(idx == self._head_position):
-                output_string += f" {self._current_state} "
-            output_string += f" {character} "
-        print(output_string)
+    """Writes the tape with its respective state, if the tracer wants this step"""
+    def _trace_step(self):
+        if self._tracer.wants(self._current_step + 1, self._current_state):
+            # Only the written window of the tape is formatted
+            leftmost, rightmost = self._tape.span()
+            first = min(leftmost, 0)
+            self._tracer.single_tape(self._current_state, self._head_position, first,
+                                     self._tape.window(first, rightmost))
 
 
     """Gets the next string, loads it into the TM tape and process it."""
     def run(self,quiet=False):
+        # Quiet runs take the verdicts already known from the cache, if there is one
+        cache = self._result_cache if quiet and self._recorder is None else None
+        if cache is not None:
+            fingerprint = cache.fingerprint(self)
+
+        # The strings saved by a checkpoint continue from their configuration
+        if self._checkpointer is not None:
+            strings = self._checkpointer.runs(self.pending_strings())
+        else:
+            strings = ((initial_string, None) for initial_string in self.pending_strings())
+
         # Loop while there are strings to read
-        while(len(self._initial_strings) > 0):
-            # Calls the method to restart the variables
-            self._clean()
-
-            # Starts the turing machine, and stores if any error was found
-            character, error = self._init_tape()
-
-            # Detects that a invalid character was entered and prints an error message
-            if(error):
-                print("Caracter inválido: \'" + character + "\'")
-            else: # If everything worked well initializing the TM
-                stop = False
-                reason = -1
-
-                # Loop as long as the machine is not accepted, rejected or reached max steps
-                while(not stop):
-                    # Calls the method to find a transition from the current state
-                    current_rule = self._decode()
-
-                    # No rule was found from this state to another, reject
-                    if(current_rule == None):
-                        reason = self.FinalState.REJECTED
-                        break
-                    self._execute(current_rule, quiet)
-
-                    # Calls the method to find transitions and check if the machine terminated (reason)
-                    stop, reason = self._verify()
-                    self._current_step += 1
-
-                # Detects if the string was accepted, rejected, or other
-                if reason == self.FinalState.ACCEPTED:
-                    print("Aceptado")
-                elif reason == self.FinalState.REJECTED:
-                    print("Rechazado")
-                elif reason == self.FinalState.OUTSIDE:
-                    print("Fuera")
-                elif reason == self.FinalState.UNDECIDABLE:
-                    print("Indecidible")
-                elif reason == self.FinalState.REJECTED:
-                    print("Rechazado")
+        for initial_string, snapshot in strings:
+            if snapshot is not None:
+                verdict, steps = self.resume(initial_string, snapshot, quiet)
+            elif cache is not None:
+                verdict, steps = cache.decide(fingerprint, initial_string, self.decide)
+            else:
+                verdict, steps = self.decide(initial_string, quiet)
+            print(verdict)
+
+    """Runs a single string on the TM. Returns the verdict that run prints for it and the steps taken"""
+    def decide(self, initial_string, quiet=True):
+        # Strings that cannot be run are decided without any step
+        result = self._start(initial_string)
+        if result is not None:
+            return result
+
+        # The profiled runs have a loop of their own
+        if self._profiler is not None:
+            return self._decide_profiled(initial_string, quiet)
+
+        # If everything worked well initializing the TM
+        return self._simulate(initial_string, quiet)
+
+    """Loads a string on the tape. Returns the verdict and steps of the strings that cannot be run, None
+        for the others"""
+    def _start(self, initial_string):
+        # Calls the method to restart the variables
+        self._clean()
+
+        # Starts the turing machine, and stores if any error was found
+        character, error = self._init_tape(initial_string)
+
+        # Detects that a invalid character was entered and returns an error message
+        if(error):
+            return "Caracter inválido: \'" + character + "\'", 0
+        elif(self._tape.span()[1] >= self._max_length): # The input does not fit in max_length
+            return self.VERDICTS[self.FinalState.OUTSIDE], 0
+        return None
+
+    """Runs a string quantum steps at a time, quietly. Yields None after each quantum the machine did not
+        stop in, and then the verdict and steps. Each string has a tape of its own, so the steppers of many
+        strings can be interleaved, see scheduler.py"""
+    def stepper(self, initial_string, quantum):
+        tape = Tape(None)
+        self._tape = tape
+        result = self._start(initial_string)
+        if result is not None:
+            yield result
+            return
+
+        state, head, step = self._current_state, self._head_position, self._current_step
+        while True:
+            # Put the configuration of this string back in the machine, the other steppers changed it
+            self._tape, self._head_position = tape, head
+            self._current_state, self._current_step = state, step
+            reason = self._advance(quantum)
+            if reason is not None:
+                yield self.VERDICTS[reason], self._current_step
+                return
+            state, head, step = self._current_state, self._head_position, self._current_step
+            yield None
+
+    """Runs at most steps steps from the current configuration. Returns why the machine stopped, None if
+        it did not"""
+    def _advance(self, steps):
+        for step in range(steps):
+            current_rule = self._decode()
+
+            # No rule was found from this state to another, reject
+            if(current_rule == None):
+                return self.FinalState.REJECTED
+            self._execute(current_rule, True)
+
+            stop, reason = self._verify()
+            self._current_step += 1
+            if stop:
+                return reason
+        return None
+
+    """Runs until the machine stops, returning why, or until the head of the input tape is about to read
+        position frontier, returning None. The prefix batches run the input a cell at a time with it, see
+        prefix_batch.py"""
+    def _advance_to(self, frontier):
+        while self._head_position != frontier:
+            current_rule = self._decode()
+
+            # No rule was found from this state to another, reject
+            if(current_rule == None):
+                return self.FinalState.REJECTED
+            self._execute(current_rule, True)
+
+            stop, reason = self._verify()
+            self._current_step += 1
+            if stop:
+                return reason
+        return None
+
+    """Writes a symbol of the input at a position of the input tape"""
+    def _write_input(self, position, symbol):
+        self._tape[position] = symbol
+
+    """Continues the run of a string from a configuration taken by snapshot. Returns the same as decide"""
+    def resume(self, initial_string, snapshot, quiet=True):
+        self._clean()
+        self.restore(snapshot)
+        return self._simulate(initial_string, quiet)
+
+    """Runs the steps from the current configuration until the machine stops"""
+    def _simulate(self, initial_string, quiet):
+        stop = False
+        reason = -1
+
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.begin(initial_string, self._current_state, [self._head_position], [self._tape])
+
+        detector = self._cycle_detector
+        if detector is not None:
+            detector.start(self._current_state, [self._head_position], [self._tape])
+
+        # Step after which the next checkpoint is saved, never reached without checkpoints
+        checkpointer = self._checkpointer
+        next_checkpoint = checkpointer.next_step(self._current_step) if checkpointer is not None else -1
+
+        # Loop as long as the machine is not accepted, rejected or reached max steps
+        while(not stop):
+            # Calls the method to find a transition from the current state
+            current_rule = self._decode()
+
+            # No rule was found from this state to another, reject
+            if(current_rule == None):
+                reason = self.FinalState.REJECTED
+                break
+
+            # Remember the configuration before the step to update the hash of the cycle detector
+            if detector is not None:
+                state, head, symbol = self._current_state, self._head_position, self._tape[self._head_position]
+            self._execute(current_rule, quiet)
+
+            # Calls the method to find transitions and check if the machine terminated (reason)
+            stop, reason = self._verify()
+            self._current_step += 1
+            if self._current_step == next_checkpoint and not stop:
+                checkpointer.save(self, initial_string)
+                next_checkpoint += checkpointer.interval
+
+            # Stops if the configuration was already seen
+            if not stop and detector is not None \
+                    and detector.step(state, self._current_state, [head], [self._head_position], [symbol], [self._tape]):
+                reason = self.FinalState.LOOPING
+                break
+
+        # Write the steps left in the buffer before the verdict
+        if not quiet:
+            self._tracer.flush()
+        if recorder is not None:
+            recorder.end(self.VERDICTS[reason])
 
+        # Detects if the string was accepted, rejected, or other
+        return self.VERDICTS[reason], self._current_step
+
+    """Same loop as _simulate, counting the steps of each rule and state and the positions of the heads"""
+    def _decide_profiled(self, initial_string, quiet):
+        rules = {}
+        states = {}
+        head_ranges = [[self._head_position, self._head_position]]
+
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.begin(initial_string, self._current_state, [self._head_position], [self._tape])
+
+        detector = self._cycle_detector
+        if detector is not None:
+            detector.start(self._current_state, [self._head_position], [self._tape])
+
+        start = time.perf_counter()
+
+        stop = False
+        reason = -1
+        while(not stop):
+            current_rule = self._decode()
+
+            # No rule was found from this state to another, reject
+            if(current_rule == None):
+                reason = self.FinalState.REJECTED
+                break
+            rules[current_rule[0]] = rules.get(current_rule[0], 0) + 1
+            states[self._current_state] = states.get(self._current_state, 0) + 1
+
+            # Remember the configuration before the step to update the hash of the cycle detector
+            if detector is not None:
+                state, head, symbol = self._current_state, self._head_position, self._tape[self._head_position]
+            self._execute(current_rule, quiet)
+            if self._head_position < head_ranges[0][0]:
+                head_ranges[0][0] = self._head_position
+            elif self._head_position > head_ranges[0][1]:
+                head_ranges[0][1] = self._head_position
+
+            stop, reason = self._verify()
+            self._current_step += 1
+
+            # Stops if the configuration was already seen
+            if not stop and detector is not None \
+                    and detector.step(state, self._current_state, [head], [self._head_position], [symbol], [self._tape]):
+                reason = self.FinalState.LOOPING
+                break
+
+        seconds = time.perf_counter() - start
+        if not quiet:
+            self._tracer.flush()
+        if recorder is not None:
+            recorder.end(self.VERDICTS[reason])
+        self._profiler.add(initial_string, self.VERDICTS[reason], self._current_step, seconds, rules, states,
+                           head_ranges, [max(self._tape.span()[1] - self._tape.span()[0] + 1, 0)])
+        return self.VERDICTS[reason], self._current_step
 
     # Method to print the turing machine
     def __str__(self):
@@ -0,0 +1,199 @@
+########################################################################################################
+#
+#	vectorized_machine.py -- Runs many strings of a Turing Machine at once with NumPy
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Lockstep simulation
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Lockstep simulation
+#
+#   The strings of a batch are loaded into an N x width array of symbol ids, one row per string, and all
+#   the N configurations advance together, one step at a time:
+#
+#       1. the symbols under the heads are gathered with fancy indexing,
+#       2. the action of each row is looked up in the flat (state, symbol) table of the compiled machine,
+#       3. the writes and head moves are scattered back,
+#       4. the rows that halted are dropped from the arrays of active rows.
+#
+#   Since every row starts at the same time, the step counter is shared by all of them, and the verdicts
+#   and steps are the same as running each string with TuringMachine.run.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. Only single tape machines are supported, the integer tables come from CompiledMachine.
+#   b. The tapes grow like the Tape class, doubling towards the side a head ran out of, so the width is
+#       about the longest string plus how far the heads went and not max_length.
+#   c. When less than half of the rows are still running, the tapes array is compacted to those rows.
+#   d. The steps are never printed, the runs are always quiet.
+#
+
+import numpy as np # Arrays of symbol ids and vectorized lookups
+from compiled_machine import CompiledMachine # Integer encoding of the machine
+
+########################################################################################################
+# VectorizedMachine class. Runs batches of strings of a single tape machine in lockstep.
+#
+class VectorizedMachine:
+    """ Runs batches of strings of a compiled single tape machine with NumPy """
+
+    # Number of strings simulated together by run
+    BATCH_SIZE = 4096
+
+    # Constructor method. Compiles the given (already loaded) single tape machine, unless it is given
+    # already compiled
+    def __init__(self, machine, compiled=None):
+        if hasattr(machine, '_number_of_tapes'):
+            raise ValueError("The vectorized engine only runs single tape machines")
+
+        self._machine = machine
+        self._compiled = compiled or CompiledMachine(machine)
+        self.FinalState = self._compiled.FinalState
+        self.VERDICTS = self._compiled.VERDICTS
+        self._max_length = machine._max_length
+        self._max_steps = machine._max_steps
+
+        # The tables of the compiled machine as NumPy arrays
+        self._table = np.array(self._compiled._table, dtype=np.int64)
+        self._next_bases = np.array(self._compiled._next_bases, dtype=np.int64)
+        self._writes = np.array(self._compiled._single_writes, dtype=np.uint8)
+        self._moves = np.array(self._compiled._single_moves, dtype=np.int64)
+        self._halts = np.frombuffer(bytes(self._compiled._halts), dtype=np.uint8)
+        self._initial_base = self._compiled._state_ids[machine._initial_state] * self._compiled._stride
+
+    """ Runs a batch of strings. Returns the verdict and the steps taken for each one, in order """
+    def decide_batch(self, strings):
+        results = [None] * len(strings)
+        rows = [] # Index of each valid string in strings
+        encoded_strings = []
+
+        # Invalid characters and strings that do not fit are decided before running
+        for index, initial_string in enumerate(strings):
+            encoded, character = self._compiled._encode_input(initial_string)
+            if encoded is None:
+                results[index] = ("Caracter inválido: \'" + character + "\'", 0)
+            elif len(encoded) > self._max_length:
+                results[index] = (self.VERDICTS[self.FinalState.OUTSIDE], 0)
+            else:
+                rows.append(index)
+                encoded_strings.append(encoded)
+
+        if rows:
+            for row, reason, steps in zip(rows, *self._run_lockstep(encoded_strings)):
+                results[row] = (self.VERDICTS[self.FinalState(reason)], int(steps))
+        return results
+
+    """ Runs a single string, for callers that decide one string at a time """
+    def decide(self, initial_string, quiet=True):
+        return self.decide_batch([initial_string])[0]
+
+    """ Advances all the encoded strings together. Returns the final state value and steps of each one """
+    def _run_lockstep(self, encoded_strings):
+        number_of_rows = len(encoded_strings)
+        reasons = np.full(number_of_rows, self.FinalState.REJECTED.value, dtype=np.int64)
+        steps = np.zeros(number_of_rows, dtype=np.int64)
+
+        # One row per string, position 0 of every tape is at column origin
+        width = max(len(encoded) for encoded in encoded_strings) + 1
+        tapes = np.zeros((number_of_rows, width), dtype=np.uint8)
+        for row, encoded in enumerate(encoded_strings):
+            tapes[row, :len(encoded)] = np.frombuffer(bytes(encoded), dtype=np.uint8)
+        origin = 0
+
+        # Active rows: their result index, their row in tapes, their state (times the stride) and head column
+        results = np.arange(number_of_rows)
+        tape_rows = np.arange(number_of_rows)
+        bases = np.full(number_of_rows, self._initial_base, dtype=np.int64)
+        heads = np.zeros(number_of_rows, dtype=np.int64)
+
+        for step in range(max(self._max_steps, 0) + 1):
+            if results.size == 0:
+                break
+
+            # Gather the symbols under the heads and look up the actions
+            actions = self._table[bases + tapes[tape_rows, heads]]
+
+            # No rule was found from this state to another, reject
+            no_rule = actions < 0
+            if no_rule.any():
+                reasons[results[no_rule]] = self.FinalState.REJECTED.value
+                steps[results[no_rule]] = step
+                keep = ~no_rule
+                results, tape_rows, bases, heads, actions = \
+                    results[keep], tape_rows[keep], bases[keep], heads[keep], actions[keep]
+                if results.size == 0:
+                    break
+
+            # Scatter the writes and move the heads
+            tapes[tape_rows, heads] = self._writes[actions]
+            heads = heads + self._moves[actions]
+            bases = self._next_bases[actions]
+
+            # Same checks, in the same order, as _verify
+            halts = self._halts[actions]
+            outside = (halts == 0) & (heads - origin == self._max_length)
+            done = (halts != 0) | outside
+            if done.any():
+                reasons[results[halts == 1]] = self.FinalState.ACCEPTED.value
+                reasons[results[halts == 2]] = self.FinalState.REJECTED.value
+                reasons[results[outside]] = self.FinalState.UNDECIDABLE.value
+                steps[results[done]] = step + 1
+                keep = ~done
+                results, tape_rows, bases, heads = results[keep], tape_rows[keep], bases[keep], heads[keep]
+                if results.size == 0:
+                    break
+
+                # Compact the tapes when most of their rows are finished
+                if 2 * results.size < tapes.shape[0]:
+                    tapes = tapes[tape_rows]
+                    tape_rows = np.arange(results.size)
+
+            # Grow the tapes when a head ran out of columns, doubling towards that side
+            if heads.min() < 0:
+                extra = max(int(-heads.min()), tapes.shape[1])
+                tapes = np.concatenate((np.zeros((tapes.shape[0], extra), dtype=np.uint8), tapes), axis=1)
+                heads = heads + extra
+                origin += extra
+            if heads.max() >= tapes.shape[1]:
+                extra = max(int(heads.max()) - tapes.shape[1] + 1, tapes.shape[1])
+                tapes = np.concatenate((tapes, np.zeros((tapes.shape[0], extra), dtype=np.uint8)), axis=1)
+
+        # The rows still running used every step allowed
+        steps[results] = max(self._max_steps, 0) + 1
+        return reasons, steps
+
+    """ Runs all the strings loaded on the machine in batches, printing the verdict of each one """
+    def run(self, quiet=True):
+        batch = []
+        for initial_string in self._machine.pending_strings():
+            batch.append(initial_string)
+            if len(batch) == self.BATCH_SIZE:
+                self._print_batch(batch)
+                batch = []
+        if batch:
+            self._print_batch(batch)
+
+    """ Runs a batch and prints its verdicts. The ones in the cache of the machine, if there is one, are not run """
+    def _print_batch(self, batch):
+        cache = self._machine._result_cache
+        if cache is None:
+            results = self.decide_batch(batch)
+        else:
+            fingerprint = cache.fingerprint(self._machine)
+            keys = [cache.key(initial_string) for initial_string in batch]
+            results = [cache.get(fingerprint, key) for key in keys]
+
+            # Only the strings missing from the cache run, together
+            missing = [index for index, result in enumerate(results) if result is None]
+            for index, result in zip(missing, self.decide_batch([batch[index] for index in missing])):
+                results[index] = result
+                cache.put(fingerprint, keys[index], *result)
+
+        for verdict, steps in results:
+            print(verdict)
@@ -0,0 +1,269 @@
+#!/bin/python3
+
+########################################################################################################
+#
+#	verdict_server.py -- Serves the verdicts of loaded Turing Machines over a socket
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Protocol
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Protocol
+#
+#   The server loads its machines once and then answers requests over a TCP or Unix socket. Requests and
+#   answers are JSON objects, one per line:
+#
+#       {"id": 7, "machine": "palin", "inputs": ["010", "0110"], "max_steps": 1000, "timeout": 0.5}
+#       {"id": 7, "verdicts": ["Aceptado", "Aceptado"]}
+#
+#   "id" is copied to the answer, "max_steps" can only lower the max_steps of the machine and "timeout"
+#   is in seconds; both are optional. A single string can be sent as "input" and is answered as "verdict".
+#   A request that cannot be answered gets {"id": ..., "error": "..."}.
+#
+#   The verdicts are the ones main.py prints for the same strings.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The strings run on a pool of worker processes, each one loads (and compiles) every machine when
+#       it starts, so the event loop only reads requests and writes answers.
+#   b. Each connection has at most MAX_PENDING requests running. The next lines are not read until one
+#       of them finishes, so a client that sends faster than the machines run is held back by the socket.
+#   c. The answers are written as their requests finish, not in the order they were received, "id" tells
+#       them apart.
+#   d. A request that times out is answered with an error, and its worker stops running it: the request
+#       is given the time it has to end, and the worker sets a timer (SIGALRM) that interrupts its run at
+#       that time, wherever it is. A request that waited for a worker past that time is not run at all.
+#       The compiled engines mark what their interrupted runs wrote on the tapes, so it is blanked before
+#       the next string of the worker.
+#
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import build_machine
+
+# Requests of a connection running at the same time
+MAX_PENDING = 64
+
+# Machines of each worker process, by name, loaded once by _init_worker
+_worker_machines = {}
+
+""" Loads the machines of a worker process, it is called once when the process starts """
+def _init_worker(machines, engine):
+    signal.signal(signal.SIGALRM, _expire)
+    for name, (config, machine_type) in machines.items():
+        _worker_machines[name] = build_machine(config, machine_type, engine, precompiled=True)
+
+""" Interrupts the run of a request when its time is over, see remark d """
+def _expire(signum, frame):
+    raise TimeoutError("The request ran out of time")
+
+""" Runs strings on a machine of the worker, with at most max_steps steps, until the time deadline (from
+    time.time()) if there is one. Returns their verdicts """
+def _decide(name, inputs, max_steps, deadline=None):
+    machine = _worker_machines[name]
+    configured = machine._max_steps
+    if max_steps is not None:
+        machine._max_steps = min(max_steps, configured)
+    try:
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError("The request ran out of time")
+            signal.setitimer(signal.ITIMER_REAL, remaining)
+        try:
+            return [machine.decide(initial_string)[0] for initial_string in inputs]
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    finally:
+        machine._max_steps = configured
+
+########################################################################################################
+# VerdictServer class. Answers the requests of the clients with the verdicts of its worker pool.
+#
+class VerdictServer:
+    """ JSON lines server of the verdicts of a set of machines """
+
+    # Constructor method. The machines are name -> (configuration file, type of machine)
+    def __init__(self, machines, engine='compiled', jobs=None, timeout=None):
+        self._machines = machines
+        self._timeout = timeout # Seconds a request can take when it does not ask for less
+        self._pool = ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1, initializer=_init_worker,
+                                         initargs=(machines, engine))
+
+    """ Answers a request, the answer is a dictionary """
+    async def _answer(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'id': None, 'error': "The request is not valid JSON"}
+        if not isinstance(request, dict):
+            return {'id': None, 'error': "The request is not a JSON object"}
+
+        answer = {'id': request.get('id')}
+        name = request.get('machine')
+        single = 'input' in request
+        inputs = [request['input']] if single else request.get('inputs')
+        if name not in self._machines:
+            answer['error'] = f"Unknown machine {name}"
+            return answer
+        if not isinstance(inputs, list) or not all(isinstance(initial_string, str) for initial_string in inputs):
+            answer['error'] = "The inputs must be strings"
+            return answer
+        max_steps = request.get('max_steps')
+        if max_steps is not None and (not isinstance(max_steps, int) or isinstance(max_steps, bool)):
+            answer['error'] = "max_steps must be an integer"
+            return answer
+        timeout = request.get('timeout', self._timeout)
+        if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool)
+                                    or not 0 < timeout < float('inf')):
+            answer['error'] = "timeout must be a positive number of seconds"
+            return answer
+
+        # The strings run on the pool, the event loop keeps serving the other requests
+        deadline = None if timeout is None else time.time() + timeout
+        future = asyncio.get_running_loop().run_in_executor(self._pool, _decide, name, inputs, max_steps, deadline)
+        try:
+            verdicts = await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            answer['error'] = f"The request took more than {timeout} seconds"
+            return answer
+        except Exception as error:
+            answer['error'] = f"{type(error).__name__}: {error}"
+            return answer
+
+        if single:
+            answer['verdict'] = verdicts[0]
+        else:
+            answer['verdicts'] = verdicts
+        return answer
+
+    """ Serves a connection: reads its requests and writes each answer as soon as it is ready """
+    async def _serve(self, reader, writer):
+        pending = asyncio.Semaphore(MAX_PENDING)
+        tasks = set()
+
+        async def respond(line):
+            try:
+                answer = await self._answer(line)
+                writer.write((json.dumps(answer, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+            finally:
+                pending.release()
+
+        try:
+            while True:
+                # Stop reading while the connection has too many requests running
+                await pending.acquire()
+                line = await reader.readline()
+                if not line:
+                    pending.release()
+                    break
+                if not line.strip():
+                    pending.release()
+                    continue
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    """ Listens on a Unix socket if path is given, on host and port otherwise, until it is cancelled """
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        if path is not None:
+            server = await asyncio.start_unix_server(self._serve, path)
+        else:
+            server = await asyncio.start_server(self._serve, host, port)
+        async with server:
+            await server.serve_forever()
+
+    """ Stops the worker processes """
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves the verdicts of Turing machines as JSON lines.")
+    parser.add_argument('-m',
+                        '--machine',
+                        action='append',
+                        nargs='+',
+                        metavar=('NAME', 'CONFIG'),
+                        required=True,
+                        help="A machine to serve: its name in the requests, its configuration file and, "
+                             "optionally, its type (mtd by default, or mtkc). Can be given many times")
+
+    parser.add_argument('-e',
+                        '--engine',
+                        action='store',
+                        type=str,
+                        choices=['interpreted', 'compiled', 'generated'],
+                        default='compiled',
+                        help='Engine the workers run the machines with')
+
+    parser.add_argument('-j',
+                        '--jobs',
+                        action='store',
+                        type=int,
+                        help='Number of worker processes, one per processor by default')
+
+    parser.add_argument('--host',
+                        action='store',
+                        type=str,
+                        default='127.0.0.1',
+                        help='Address to listen on')
+
+    parser.add_argument('--port',
+                        action='store',
+                        type=int,
+                        default=8765,
+                        help='TCP port to listen on')
+
+    parser.add_argument('-u',
+                        '--unix',
+                        action='store',
+                        type=str,
+                        help='Listen on this Unix socket instead of TCP')
+
+    parser.add_argument('--timeout',
+                        action='store',
+                        type=float,
+                        help='Seconds a request can take, when it does not give its own timeout')
+    args = parser.parse_args()
+
+    if args.timeout is not None and not 0 < args.timeout < float('inf'):
+        print("The timeout is a positive number of seconds, refer to the README.md")
+        sys.exit(0)
+
+    machines = {}
+    for machine in args.machine:
+        if len(machine) not in (2, 3) or (len(machine) == 3 and machine[2] not in ('mtd', 'mtkc')):
+            print("A machine is given as NAME CONFIG [mtd|mtkc], refer to the README.md")
+            sys.exit(0)
+        machines[machine[0]] = (machine[1], machine[2] if len(machine) == 3 else 'mtd')
+
+    server = VerdictServer(machines, args.engine, args.jobs, args.timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,176 @@
+########################################################################################################
+#
+#	workloads.py -- Generates parametric machines and input strings for the benchmarks
+#
+#	version 1.0
+#
+########################################################################################################
+#
+#   CONTENTS
+#
+#   1. Workloads
+#   2. Implementation remarks
+#
+#-------------------------------------------------------------------------------------------------------
+#   1. Workloads
+#
+#   Each generator writes a configuration file in the given directory and returns a Workload with it, the
+#   type of machine (mtd or mtkc) and the input strings:
+#
+#       increment   : datos_prueba/increment.txt on random inputs of n bits
+#       palindrome  : datos_prueba/mtkcintas-palin.txt extended to k tapes, on palindromes of length n
+#                     (and as many strings that are not)
+#       table       : a machine with every rule of |Q| states and |Γ| symbols, that wanders over the tape
+#                     until it runs out of steps
+#       busy beaver : the 4 and 5 state busy beaver champions, the 5 state one cut at max_steps
+#
+#   suite() gives the workloads the benchmark runs by default.
+#
+#-------------------------------------------------------------------------------------------------------
+#   2. Implementation remarks
+#   a. The inputs come from a random generator with a fixed seed, so every run of a workload (and of the
+#       benchmark) uses the same strings and gets the same verdicts.
+#   b. The table and busy beaver machines are written as multitape machines of one tape, since only their
+#       blank '_' can be read in the cells that were never written.
+#
+
+import os # Paths of the configuration files
+import random # Input strings
+import string # Symbols of the table machines
+from collections import namedtuple # Workload records
+
+# A generated benchmark: its name, the type of machine, the configuration file and the input strings
+Workload = namedtuple('Workload', ['name', 'machine_type', 'config', 'inputs'])
+
+""" Writes a configuration file from its lines """
+def _write(directory, name, lines):
+    config = os.path.join(directory, name + '.txt')
+    with open(config, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return config
+
+""" Binary increment of datos_prueba/increment.txt on count random inputs of bits bits """
+def increment(directory, bits, count=1000, seed=0):
+    generator = random.Random(seed)
+    config = _write(directory, f"increment-{bits}", [
+        f"counter,{bits + 2},{4 * bits + 10}",
+        "q0,q1,q2,q4,q5",
+        "0,1,_",
+        "0,1,_",
+        "q0",
+        "q4,q5",
+        "q0,_,q1,_,L",
+        "q0,0,q0,0,R",
+        "q0,1,q0,1,R",
+        "q1,_,q2,_,R",
+        "q1,0,q2,1,L",
+        "q1,1,q1,0,L",
+        "q2,_,q4,_,L",
+        "q2,0,q2,0,R",
+        "q2,1,q2,1,R"])
+
+    # The input ends with a written blank, the first empty cell has no rules
+    inputs = [''.join(generator.choice('01') for bit in range(bits)) + '_' for index in range(count)]
+    return Workload(f"increment-{bits}", 'mtd', config, inputs)
+
+""" Palindromes of datos_prueba/mtkcintas-palin.txt on tapes tapes: the input is copied to every other tape
+    and then read backwards on the first one while the others are read forwards """
+def palindrome(directory, tapes, length, count=100, seed=0):
+    generator = random.Random(seed)
+    others = tapes - 1
+    rules = []
+    for symbol in '01':
+        rules.append(','.join(['q0', symbol] + ['_'] * others + ['q0'] + [symbol] * tapes + ['r'] * tapes))
+    rules.append(','.join(['q0'] + ['_'] * tapes + ['q1'] + ['_'] * tapes + ['s'] + ['l'] * others))
+
+    # Rewind the copies, the first blank found on all of them ends it
+    rules.append(','.join(['q1'] + ['_'] * tapes + ['q2'] + ['_'] * tapes + ['l'] + ['r'] * others))
+    rules.append(','.join(['q1', '_'] + ['*'] * others + ['q1', '_'] + ['*'] * others + ['s'] + ['l'] * others))
+
+    # Compare, a mismatch has no rule and rejects
+    for symbol in '01':
+        rules.append(','.join(['q2'] + [symbol] * tapes + ['q2'] + [symbol] * tapes + ['l'] + ['r'] * others))
+    rules.append(','.join(['q2'] + ['_'] * tapes + ['q3'] + ['_'] * tapes + ['s'] * tapes))
+
+    config = _write(directory, f"palindrome-{tapes}x{length}", [
+        f"palindromo,{tapes},{length + 2},{4 * length + 10}",
+        "q0,q1,q2,q3",
+        "0,1"] + ["0,1"] * tapes + [
+        "q0",
+        "q3,q4"] + rules)
+
+    inputs = []
+    for index in range(count):
+        half = ''.join(generator.choice('01') for bit in range(length // 2))
+        palindrome = half + half[::-1]
+        if index % 2:
+            # Flip a random bit, so half of the strings are not palindromes
+            position = generator.randrange(len(palindrome))
+            palindrome = palindrome[:position] + ('1' if palindrome[position] == '0' else '0') + palindrome[position + 1:]
+        inputs.append(palindrome)
+    return Workload(f"palindrome-{tapes}x{length}", 'mtkc', config, inputs)
+
+""" A machine with a rule for each of states states and symbols symbols, run for max_steps steps on count
+    random inputs of length length """
+def table(directory, states, symbols, max_steps=10000, count=20, length=20, seed=0):
+    generator = random.Random(seed)
+    names = (string.digits + string.ascii_letters)[:symbols - 1]
+    alphabet = ['_'] + list(names)
+    state_names = [f"q{state}" for state in range(states)]
+
+    rules = []
+    for state in range(states):
+        for symbol in range(symbols):
+            rules.append(f"q{state},{alphabet[symbol]},q{generator.randrange(states)},"
+                         f"{alphabet[generator.randrange(symbols)]},{generator.choice('rl')}")
+
+    config = _write(directory, f"table-{states}x{symbols}", [
+        f"table,1,{10 * max_steps},{max_steps}",
+        ','.join(state_names + ['qa', 'qr']),
+        ','.join(names),
+        ','.join(alphabet),
+        "q0",
+        "qa,qr"] + rules)
+
+    inputs = [''.join(generator.choice(names) for position in range(length)) for index in range(count)]
+    return Workload(f"table-{states}x{symbols}", 'mtkc', config, inputs)
+
+# Busy beaver champions, (state, symbol read) -> (symbol written, move, next state), H halts
+BUSY_BEAVERS = {
+    4: {('A', '0'): ('1', 'r', 'B'), ('A', '1'): ('1', 'l', 'B'),
+        ('B', '0'): ('1', 'l', 'A'), ('B', '1'): ('0', 'l', 'C'),
+        ('C', '0'): ('1', 'r', 'H'), ('C', '1'): ('1', 'l', 'D'),
+        ('D', '0'): ('1', 'r', 'D'), ('D', '1'): ('0', 'r', 'A')},
+    5: {('A', '0'): ('1', 'r', 'B'), ('A', '1'): ('1', 'l', 'C'),
+        ('B', '0'): ('1', 'r', 'C'), ('B', '1'): ('1', 'r', 'B'),
+        ('C', '0'): ('1', 'r', 'D'), ('C', '1'): ('0', 'l', 'E'),
+        ('D', '0'): ('1', 'l', 'A'), ('D', '1'): ('1', 'l', 'D'),
+        ('E', '0'): ('1', 'r', 'H'), ('E', '1'): ('0', 'l', 'A')}}
+
+""" The busy beaver champion of states states, run count times on the empty tape for at most max_steps """
+def busy_beaver(directory, states, max_steps=10 ** 6, count=1):
+    rules = []
+    for (state, read), (write, move, next_state) in BUSY_BEAVERS[states].items():
+        # The cells that were never written hold the blank, which is read as a 0
+        for symbol in (['_', '0'] if read == '0' else [read]):
+            rules.append(f"{state},{symbol},{next_state},{write},{move}")
+
+    state_names = sorted({state for state, read in BUSY_BEAVERS[states]})
+    config = _write(directory, f"busy-beaver-{states}", [
+        f"beaver,1,{max_steps},{max_steps}",
+        ','.join(state_names + ['H', 'R']),
+        "0,1",
+        "0,1",
+        "A",
+        "H,R"] + rules)
+    return Workload(f"busy-beaver-{states}", 'mtkc', config, [''] * count)
+
+""" The workloads run by default by the benchmark, with scale times their number of inputs """
+def suite(directory, scale=1):
+    return [increment(directory, 64, count=int(1000 * scale)),
+            increment(directory, 1024, count=int(50 * scale)),
+            palindrome(directory, 2, 200, count=int(100 * scale)),
+            palindrome(directory, 4, 200, count=int(50 * scale)),
+            table(directory, 64, 48, count=int(20 * scale)),
+            busy_beaver(directory, 4, count=int(500 * scale)),
+            busy_beaver(directory, 5, max_steps=int(200000 * scale))]